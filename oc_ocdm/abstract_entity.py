@@ -19,6 +19,7 @@ from abc import ABC
 from typing import TYPE_CHECKING
 
 from oc_ocdm.support.support import create_type, create_literal, get_short_name, is_dataset, is_string_empty
+from oc_ocdm.support.entity_graph import EntityGraph
 from rdflib import URIRef, RDFS, RDF, Literal, Graph
 
 if TYPE_CHECKING:
@@ -41,6 +42,26 @@ class AbstractEntity(ABC):
         self.g: Graph = Graph()
         self.res: URIRef = URIRef("")
         self.short_name: str = ""
+        # Last result of get_update_query, together with the state of the entity it was computed from
+        self._update_query_cache: Optional[Tuple] = None
+
+    @property
+    def was_modified(self) -> bool:
+        """
+        Whether the triples of the entity changed since it was created or imported, or since
+        the last call to its ``commit_changes`` method (if any).
+
+        The answer is immediate for entities whose graph is an ``EntityGraph``, since changes
+        are tracked while they're being made. For any other graph it's
+        conservatively assumed that the entity was modified.
+        """
+        if isinstance(self.g, EntityGraph):
+            return self.g.is_dirty
+        return True
+
+    def _reset_changes(self) -> None:
+        if isinstance(self.g, EntityGraph):
+            self.g.reset_changes()
 
     def remove_every_triple(self) -> None:
         """
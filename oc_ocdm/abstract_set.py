@@ -18,11 +18,101 @@ from __future__ import annotations
 from abc import ABC, abstractmethod
 from typing import TYPE_CHECKING
 
+from rdflib import Graph
+
 from oc_ocdm.abstract_entity import AbstractEntity
+from oc_ocdm.support.namespace_view import NamespaceManagerView
 
 if TYPE_CHECKING:
-    from typing import List, ClassVar, Dict, Optional
-    from rdflib import URIRef, Graph
+    from typing import List, ClassVar, Dict, Optional, Tuple, Iterator, Iterable, Any
+    from rdflib import URIRef
+    from rdflib.namespace import NamespaceManager
+    from oc_ocdm.counter_handler.counter_handler import CounterHandler
+
+
+class EntityRegistry(dict):
+    """
+    A ``dict`` mapping each URI with the related entity, which also keeps the
+    contained entities grouped by their short name. Such groups are updated every
+    time an entity gets registered into (or removed from) the dictionary, so that
+    retrieving every entity of a given type doesn't require scanning the whole set.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        """
+        Constructor of the ``EntityRegistry`` class.
+        """
+        super(EntityRegistry, self).__init__()
+        self._by_short_name: Dict[str, Dict[URIRef, AbstractEntity]] = {}
+        self.update(*args, **kwargs)
+
+    def __setitem__(self, res: URIRef, entity: AbstractEntity) -> None:
+        if res in self:
+            self._unregister(res, dict.__getitem__(self, res))
+        super(EntityRegistry, self).__setitem__(res, entity)
+        self._by_short_name.setdefault(entity.short_name, {})[res] = entity
+
+    def __delitem__(self, res: URIRef) -> None:
+        entity: AbstractEntity = dict.__getitem__(self, res)
+        super(EntityRegistry, self).__delitem__(res)
+        self._unregister(res, entity)
+
+    def __reduce__(self) -> Tuple:
+        return self.__class__, (), None, None, iter(self.items())
+
+    def _unregister(self, res: URIRef, entity: AbstractEntity) -> None:
+        group: Optional[Dict[URIRef, AbstractEntity]] = self._by_short_name.get(entity.short_name)
+        if group is not None:
+            group.pop(res, None)
+
+    def pop(self, res: URIRef, *args) -> Any:
+        if res in self:
+            entity: AbstractEntity = dict.__getitem__(self, res)
+            del self[res]
+            return entity
+        return super(EntityRegistry, self).pop(res, *args)
+
+    def popitem(self) -> Tuple[URIRef, AbstractEntity]:
+        res, entity = super(EntityRegistry, self).popitem()
+        self._unregister(res, entity)
+        return res, entity
+
+    def setdefault(self, res: URIRef, default: AbstractEntity = None) -> AbstractEntity:
+        if res not in self:
+            self[res] = default
+        return dict.__getitem__(self, res)
+
+    def update(self, *args, **kwargs) -> None:
+        for res, entity in dict(*args, **kwargs).items():
+            self[res] = entity
+
+    def clear(self) -> None:
+        super(EntityRegistry, self).clear()
+        self._by_short_name.clear()
+
+    def count(self, short_name: str) -> int:
+        """
+        It allows to count the registered entities having the given short name.
+
+        :param short_name: The short name of the requested type of entity
+        :type short_name: str
+        :return: The number of registered entities having the given short name
+        """
+        group: Optional[Dict[URIRef, AbstractEntity]] = self._by_short_name.get(short_name)
+        return 0 if group is None else len(group)
+
+    def of_type(self, short_name: str) -> Iterable[AbstractEntity]:
+        """
+        It allows to retrieve a live view over the registered entities having the given short name.
+
+        **NOTE: the returned view reflects any later change to the registry. It must be
+        copied (e.g. into a tuple) before adding or removing entities while iterating over it.**
+
+        :param short_name: The short name of the requested type of entity
+        :type short_name: str
+        :return: A view over the requested entities, in order of registration
+        """
+        return self._by_short_name.setdefault(short_name, {}).values()
 
 
 class AbstractSet(ABC):
@@ -32,12 +122,70 @@ class AbstractSet(ABC):
     """
 
     short_name_to_type_iri: ClassVar[Dict[str, URIRef]] = {}
+    # Every concrete set assigns identifiers to its entities through a counter handler
+    counter_handler: CounterHandler
 
     def __init__(self) -> None:
         """
         Constructor of the ``AbstractSet`` class.
         """
-        self.res_to_entity: Dict[URIRef, AbstractEntity] = {}
+        self.res_to_entity: EntityRegistry = EntityRegistry()
+        self._namespace_manager: Optional[NamespaceManager] = None
+
+    @property
+    def namespace_manager(self) -> NamespaceManager:
+        """
+        The namespace manager shared by the graphs of every entity contained in the set.
+        It gets created (and its prefixes get bound) only the first time it's requested.
+
+        Entity graphs don't reference it directly: each of them gets a copy-on-write view over it
+        (see ``_new_namespace_manager``), hence the prefixes bound through an entity graph (e.g. by
+        a serializer) never affect the other graphs. Instead, the prefixes bound on this namespace
+        manager are seen by every graph which didn't bind any prefix of its own.
+
+        :return: The namespace manager of the set
+        """
+        if self._namespace_manager is None:
+            holder: Graph = Graph()
+            self._set_ns(holder)
+            self._namespace_manager = holder.namespace_manager
+        return self._namespace_manager
+
+    def close(self) -> None:
+        """
+        It closes the counter handler of the set, so that the counter values which are still
+        pending get persisted and the files (or connections) held by the handler get released.
+        It is also called when leaving a ``with`` block.
+
+        :return: None
+        """
+        self.counter_handler.close()
+
+    def __enter__(self) -> AbstractSet:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def _new_namespace_manager(self) -> NamespaceManagerView:
+        """
+        It creates the namespace manager of a new entity graph, i.e. a copy-on-write view
+        over the namespace manager shared by the whole set.
+
+        :return: The namespace manager of the new graph
+        """
+        return NamespaceManagerView(self.namespace_manager)
+
+    def _set_ns(self, g: Graph) -> None:
+        """
+        Method that concrete implementations can override in order to bind
+        their own prefixes on the namespace manager of the set.
+
+        :param g: The graph on which the prefixes must be bound
+        :type g: Graph
+        :return: None
+        """
+        pass
 
     def graphs(self) -> List[Graph]:
         """
@@ -52,6 +200,41 @@ class AbstractSet(ABC):
                 result.append(entity.g)
         return result
 
+    def count_entities(self, short_name: str) -> int:
+        """
+        A utility method that allows to count the entities of a given type contained in the set.
+        Its cost doesn't depend on the number of contained entities.
+
+        :param short_name: The short name of the requested type of entity (e.g. 'br')
+        :type short_name: str
+        :return: The number of contained entities having the given short name
+        """
+        return self.res_to_entity.count(short_name)
+
+    def iter_entities(self, short_name: str) -> Iterator[AbstractEntity]:
+        """
+        A utility method that allows to lazily iterate over the entities of a given type
+        contained in the set.
+
+        **WARNING: entities must not be added to (or removed from) the set while iterating!**
+
+        :param short_name: The short name of the requested type of entity (e.g. 'br')
+        :type short_name: str
+        :return: An iterator over the requested entities, in order of creation
+        """
+        return iter(self.res_to_entity.of_type(short_name))
+
+    def get_entities(self, short_name: str) -> Tuple[AbstractEntity]:
+        """
+        A utility method that allows to retrieve a snapshot of the entities of a given type
+        contained in the set. Its cost is linear in the number of returned entities.
+
+        :param short_name: The short name of the requested type of entity (e.g. 'br')
+        :type short_name: str
+        :return: A tuple containing the requested entities, in order of creation
+        """
+        return tuple(self.res_to_entity.of_type(short_name))
+
     @abstractmethod
     def get_entity(self, res: URIRef) -> Optional[AbstractEntity]:
         """
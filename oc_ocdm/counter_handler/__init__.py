@@ -17,3 +17,5 @@
 from oc_ocdm.counter_handler.counter_handler import CounterHandler
 from oc_ocdm.counter_handler.filesystem_counter_handler import FilesystemCounterHandler
 from oc_ocdm.counter_handler.in_memory_counter_handler import InMemoryCounterHandler
+from oc_ocdm.counter_handler.shared_filesystem_counter_handler import SharedFilesystemCounterHandler
+from oc_ocdm.counter_handler.sqlite_counter_handler import SqliteCounterHandler
@@ -13,12 +13,47 @@
 # DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
 # ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
 # SOFTWARE.
+from __future__ import annotations
+
 from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Dict, Iterable
 
 
 class CounterHandler(ABC):
     """Abstract class representing the interface for every concrete counter handler."""
 
+    # Whether the counters can be concurrently updated by other handlers (e.g. in other processes),
+    # in which case they must never be updated by means of a read-modify-write cycle of the caller
+    shared: bool = False
+
+    def flush(self) -> None:
+        """
+        It persists the counter values that are still pending, for those concrete implementations
+        which don't immediately persist every change. Otherwise, it does nothing.
+
+        :return: None
+        """
+        pass
+
+    def close(self) -> None:
+        """
+        It persists the counter values that are still pending and it releases the resources held
+        by the handler (e.g. open files or connections), for those concrete implementations which
+        hold any of them. Otherwise, it just flushes the handler.
+
+        :return: None
+        """
+        self.flush()
+
+    def __enter__(self) -> CounterHandler:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
     @abstractmethod
     def set_counter(self, new_value: int, entity_short_name: str, prov_short_name: str = "",
                     identifier: int = 1) -> None:
@@ -82,6 +117,106 @@ class CounterHandler(ABC):
         """
         raise NotImplementedError
 
+    def reserve_counter(self, n: int, entity_short_name: str, prov_short_name: str = "",
+                        identifier: int = 1) -> int:
+        """
+        It allows to reserve a contiguous range of ``n`` counter values of graph and provenance entities,
+        i.e. to increment the counter value by ``n`` units at once.
+
+        Concrete implementations should override this method, which just
+        calls ``increment_counter`` ``n`` times.
+
+        :param n: The number of counter values to be reserved
+        :type n: int
+        :param entity_short_name: The short name associated either to the type of the entity itself
+         or, in case of a provenance entity, to the type of the relative graph entity.
+        :type entity_short_name: str
+        :param prov_short_name: In case of a provenance entity, the short name associated to the type
+         of the entity itself. An empty string otherwise.
+        :type prov_short_name: str
+        :param identifier: In case of a provenance entity, the counter value that identifies the relative
+          graph entity. The integer value '1' otherwise.
+        :type identifier: int
+        :raises ValueError: if ``n`` is less than or equal to zero.
+        :return: The first counter value of the reserved range (the last one is the newly-updated counter value).
+        """
+        if n <= 0:
+            raise ValueError("n must be a positive non-zero integer number!")
+
+        last_value: int = 0
+        for _ in range(n):
+            last_value = self.increment_counter(entity_short_name, prov_short_name, identifier)
+        return last_value - n + 1
+
+    def increment_counters(self, increments: Dict[int, int], entity_short_name: str,
+                           prov_short_name: str = "") -> Dict[int, int]:
+        """
+        It allows to increment many counter values of graph and provenance entities at once.
+
+        Concrete implementations should override this method, which just
+        calls ``reserve_counter`` for each identifier.
+
+        :param increments: A dictionary mapping the identifiers (i.e., in case of provenance entities, the counter
+          values that identify the relative graph entities) to the increments to be applied
+        :type increments: Dict[int, int]
+        :param entity_short_name: The short name associated either to the type of the entity itself
+         or, in case of a provenance entity, to the type of the relative graph entity.
+        :type entity_short_name: str
+        :param prov_short_name: In case of a provenance entity, the short name associated to the type
+         of the entity itself. An empty string otherwise.
+        :type prov_short_name: str
+        :raises ValueError: if any of the increments is less than or equal to zero.
+        :return: A dictionary mapping each identifier to the newly-updated (already incremented) counter value.
+        """
+        if any(increment <= 0 for increment in increments.values()):
+            raise ValueError("increment must be a positive non-zero integer number!")
+
+        return {identifier: self.reserve_counter(increment, entity_short_name, prov_short_name,
+                                                 identifier) + increment - 1
+                for identifier, increment in increments.items()}
+
+    def read_counters(self, entity_short_name: str, prov_short_name: str, identifiers: Iterable[int]) -> Dict[int, int]:
+        """
+        It allows to read many counter values of graph and provenance entities at once.
+
+        Concrete implementations may override this method, which just
+        calls ``read_counter`` for each identifier.
+
+        :param entity_short_name: The short name associated either to the type of the entity itself
+         or, in case of a provenance entity, to the type of the relative graph entity.
+        :type entity_short_name: str
+        :param prov_short_name: In case of a provenance entity, the short name associated to the type
+         of the entity itself. An empty string otherwise.
+        :type prov_short_name: str
+        :param identifiers: In case of provenance entities, the counter values that identify the relative
+          graph entities.
+        :type identifiers: Iterable[int]
+        :return: A dictionary mapping each identifier to the requested counter value.
+        """
+        return {identifier: self.read_counter(entity_short_name, prov_short_name, identifier)
+                for identifier in identifiers}
+
+    def set_counters(self, new_values: Dict[int, int], entity_short_name: str, prov_short_name: str = "") -> None:
+        """
+        It allows to set many counter values of graph and provenance entities at once.
+
+        Concrete implementations may override this method, which just
+        calls ``set_counter`` for each identifier.
+
+        :param new_values: A dictionary mapping the identifiers (i.e., in case of provenance entities, the counter
+          values that identify the relative graph entities) to the new counter values to be set
+        :type new_values: Dict[int, int]
+        :param entity_short_name: The short name associated either to the type of the entity itself
+         or, in case of a provenance entity, to the type of the relative graph entity.
+        :type entity_short_name: str
+        :param prov_short_name: In case of a provenance entity, the short name associated to the type
+         of the entity itself. An empty string otherwise.
+        :type prov_short_name: str
+        :return: None
+        """
+        for identifier, new_value in new_values.items():
+            self.set_counter(new_value, entity_short_name, prov_short_name, identifier)
+
     @abstractmethod
     def set_metadata_counter(self, new_value: int, entity_short_name: str, dataset_name: str) -> None:
         """
@@ -15,13 +15,14 @@
 # SOFTWARE.
 from __future__ import annotations
 
+import mmap
 import os
 from shutil import copymode, move
 from tempfile import mkstemp
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
-    from typing import BinaryIO, Tuple, List, Dict
+    from typing import BinaryIO, Tuple, List, Dict, Set, Optional, TextIO, Iterable
 
 from oc_ocdm.counter_handler.counter_handler import CounterHandler
 from oc_ocdm.support.support import is_string_empty
@@ -34,17 +35,54 @@ class FilesystemCounterHandler(CounterHandler):
     _initial_line_len: int = 3
     _trailing_char: str = " "
 
-    def __init__(self, info_dir: str) -> None:
+    _journal_name: str = "counters.journal"
+
+    def __init__(self, info_dir: str, write_back: bool = False, block_size: int = 1000,
+                 flush_every: int = 0, use_mmap: bool = False) -> None:
         """
         Constructor of the ``FilesystemCounterHandler`` class.
 
+        By default, every change is immediately written to the counter files. In ``write_back``
+        mode, instead, counter values are cached in memory and written to their files only when
+        ``flush`` is called (which also happens when leaving a ``with`` block, or automatically
+        after ``flush_every`` changes). In the meantime, changes are appended to a journal
+        inside ``info_dir``, which gets replayed by the next handler created for the same folder
+        if the process terminates without flushing. Identifiers of graph and metadata
+        entities are reserved ``block_size`` at a time and each reservation is synced
+        to disk before any identifier of the block is handed out: after a crash
+        some identifiers can be skipped, but none of them will ever be handed out twice.
+
+        In ``use_mmap`` mode, every counter file is memory-mapped the first time it is accessed
+        (its line length being read just once), so that counter values are read and written
+        in place. Files are grown geometrically, by appending empty lines (i.e. zero values),
+        whenever a counter beyond their end gets written, and such padding lines are cut off
+        again by ``flush``. This mode is meant for a single process owning ``info_dir``: changes
+        reach the files (through the OS page cache) immediately, while ``flush`` also forces them
+        to be written to the disk. The files are kept mapped until ``close`` is called.
+
         :param info_dir: The path to the folder that does/will contain the counter values.
         :type info_dir: str
-        :raises ValueError: if ``info_dir`` is None or an empty string.
+        :param write_back: If True, counter values are cached and written to their files only when flushed.
+        :type write_back: bool
+        :param block_size: In ``write_back`` mode, the number of identifiers reserved at a time.
+        :type block_size: int
+        :param flush_every: In ``write_back`` mode, the number of changes after which an automatic flush
+          is performed (a non-positive value disables automatic flushes).
+        :type flush_every: int
+        :param use_mmap: If True, counter files are memory-mapped and their values are accessed in place.
+        :type use_mmap: bool
+        :raises ValueError: if ``info_dir`` is None or an empty string, if ``block_size`` is not positive
+          or if both ``write_back`` and ``use_mmap`` are enabled.
         """
         if info_dir is None or is_string_empty(info_dir):
             raise ValueError("info_dir parameter is required!")
 
+        if block_size <= 0:
+            raise ValueError("block_size must be a positive non-zero integer number!")
+
+        if write_back and use_mmap:
+            raise ValueError("write_back and use_mmap can't be enabled at the same time!")
+
         if info_dir[-1] != os.sep:
             info_dir += os.sep
 
@@ -57,6 +95,27 @@ class FilesystemCounterHandler(CounterHandler):
         self.prov_files: Dict[str, str] = {key: ("prov_file_" + key + ".txt")
                                            for key in self.short_names}
 
+        self.write_back: bool = write_back
+        self.block_size: int = block_size
+        self.flush_every: int = flush_every
+        self._journal_path: str = info_dir + self._journal_name
+        self._journal: Optional[TextIO] = None
+        # Cached counter values, indexed by (file path, line number)
+        self._cache: Dict[Tuple[str, int], int] = {}
+        self._dirty: Set[Tuple[str, int]] = set()
+        # The highest identifier of the block currently reserved for each entity counter
+        self._reserved: Dict[Tuple[str, int], int] = {}
+        self._pending_changes: int = 0
+        self._open_files: Dict[str, Tuple[BinaryIO, int]] = {}
+        self._prov_paths: Set[str] = {self._get_prov_path(key) for key in self.short_names}
+        self.use_mmap: bool = use_mmap
+        # Memory-mapped files, together with their line length
+        self._mapped_files: Dict[str, Tuple[BinaryIO, mmap.mmap, int]] = {}
+        # The number of lines actually used by the memory-mapped files which were padded
+        self._used_lines: Dict[str, int] = {}
+
+        self._recover_journal()
+
     def set_counter(self, new_value: int, entity_short_name: str, prov_short_name: str = "",
                     identifier: int = 1) -> None:
         """
@@ -83,7 +142,7 @@ class FilesystemCounterHandler(CounterHandler):
             file_path: str = self._get_prov_path(entity_short_name)
         else:
             file_path: str = self._get_info_path(entity_short_name)
-        self._set_number(new_value, file_path, identifier)
+        self._set_value(new_value, file_path, identifier)
 
     def read_counter(self, entity_short_name: str, prov_short_name: str = "", identifier: int = 1) -> int:
         """
@@ -105,7 +164,7 @@ class FilesystemCounterHandler(CounterHandler):
             file_path: str = self._get_prov_path(entity_short_name)
         else:
             file_path: str = self._get_info_path(entity_short_name)
-        return self._read_number(file_path, identifier)[0]
+        return self._read_value(file_path, identifier)
 
     def increment_counter(self, entity_short_name: str, prov_short_name: str = "", identifier: int = 1) -> int:
         """
@@ -127,7 +186,348 @@ class FilesystemCounterHandler(CounterHandler):
             file_path: str = self._get_prov_path(entity_short_name)
         else:
             file_path: str = self._get_info_path(entity_short_name)
-        return self._add_number(file_path, identifier)
+        return self._increment_value(file_path, identifier)
+
+    def reserve_counter(self, n: int, entity_short_name: str, prov_short_name: str = "",
+                        identifier: int = 1) -> int:
+        """
+        It allows to reserve a contiguous range of ``n`` counter values of graph and provenance entities,
+        i.e. to increment the counter value by ``n`` units at once (with a single file access).
+
+        :param n: The number of counter values to be reserved
+        :type n: int
+        :param entity_short_name: The short name associated either to the type of the entity itself
+         or, in case of a provenance entity, to the type of the relative graph entity.
+        :type entity_short_name: str
+        :param prov_short_name: In case of a provenance entity, the short name associated to the type
+         of the entity itself. An empty string otherwise.
+        :type prov_short_name: str
+        :param identifier: In case of a provenance entity, the counter value that identifies the relative
+          graph entity. The integer value '1' otherwise.
+        :type identifier: int
+        :raises ValueError: if ``n`` or ``identifier`` are less than or equal to zero.
+        :return: The first counter value of the reserved range (the last one is the newly-updated counter value).
+        """
+        if n <= 0:
+            raise ValueError("n must be a positive non-zero integer number!")
+
+        if prov_short_name == "se":
+            file_path: str = self._get_prov_path(entity_short_name)
+        else:
+            file_path: str = self._get_info_path(entity_short_name)
+        return self._increment_value(file_path, identifier, n) - n + 1
+
+    def read_counters(self, entity_short_name: str, prov_short_name: str, identifiers: Iterable[int]) -> Dict[int, int]:
+        """
+        It allows to read many counter values of graph and provenance entities at once. Unless counter values
+        are cached or memory-mapped, they are read with a single sequential sweep of the counter file.
+
+        :param entity_short_name: The short name associated either to the type of the entity itself
+         or, in case of a provenance entity, to the type of the relative graph entity.
+        :type entity_short_name: str
+        :param prov_short_name: In case of a provenance entity, the short name associated to the type
+         of the entity itself. An empty string otherwise.
+        :type prov_short_name: str
+        :param identifiers: In case of provenance entities, the counter values that identify the relative
+          graph entities.
+        :type identifiers: Iterable[int]
+        :raises ValueError: if any of the ``identifiers`` is less than or equal to zero.
+        :return: A dictionary mapping each identifier to the requested counter value.
+        """
+        if self.write_back or self.use_mmap:
+            return super(FilesystemCounterHandler, self).read_counters(entity_short_name, prov_short_name,
+                                                                       identifiers)
+
+        if prov_short_name == "se":
+            file_path: str = self._get_prov_path(entity_short_name)
+        else:
+            file_path: str = self._get_info_path(entity_short_name)
+        return self._read_numbers(file_path, identifiers)
+
+    def set_counters(self, new_values: Dict[int, int], entity_short_name: str, prov_short_name: str = "") -> None:
+        """
+        It allows to set many counter values of graph and provenance entities at once. Unless counter values
+        are cached or memory-mapped, they are written with a single sequential sweep of the counter file.
+
+        :param new_values: A dictionary mapping the identifiers (i.e., in case of provenance entities, the counter
+          values that identify the relative graph entities) to the new counter values to be set
+        :type new_values: Dict[int, int]
+        :param entity_short_name: The short name associated either to the type of the entity itself
+         or, in case of a provenance entity, to the type of the relative graph entity.
+        :type entity_short_name: str
+        :param prov_short_name: In case of a provenance entity, the short name associated to the type
+         of the entity itself. An empty string otherwise.
+        :type prov_short_name: str
+        :raises ValueError: if any of the new values is a negative integer or any of the identifiers
+          is less than or equal to zero.
+        :return: None
+        """
+        if self.write_back or self.use_mmap:
+            return super(FilesystemCounterHandler, self).set_counters(new_values, entity_short_name,
+                                                                      prov_short_name)
+
+        if any(new_value < 0 for new_value in new_values.values()):
+            raise ValueError("new_value must be a non negative integer!")
+        if any(identifier <= 0 for identifier in new_values):
+            raise ValueError("line_number must be a positive non-zero integer number!")
+
+        if len(new_values) > 0:
+            if prov_short_name == "se":
+                file_path: str = self._get_prov_path(entity_short_name)
+            else:
+                file_path: str = self._get_info_path(entity_short_name)
+            self._write_numbers(file_path, new_values)
+
+    def flush(self) -> None:
+        """
+        In ``write_back`` mode, it writes every pending counter value to its file and it empties
+        the journal. Since the journal is replayed after a crash, the changes are applied
+        atomically: either all of them or none of them. In ``use_mmap`` mode, it writes
+        the changed pages of every memory-mapped file to the disk, after removing the
+        padding lines appended to the files which were grown.
+
+        :return: None
+        """
+        for file_path, used_lines in self._used_lines.items():
+            _, _, cur_line_len = self._mapped_files[file_path]
+            self._unmap_file(file_path)
+            os.truncate(file_path, used_lines * cur_line_len)
+        self._used_lines.clear()
+        for _, mapped_file, _ in self._mapped_files.values():
+            mapped_file.flush()
+
+        if not self.write_back or len(self._dirty) <= 0:
+            return
+
+        self._sync_journal()
+        for file, _ in self._open_files.values():
+            file.close()
+        self._open_files.clear()
+        values_by_file: Dict[str, Dict[int, int]] = {}
+        for file_path, line_number in self._dirty:
+            values_by_file.setdefault(file_path, {})[line_number] = self._cache[(file_path, line_number)]
+        for file_path, values in values_by_file.items():
+            self._write_numbers(file_path, values)
+        self._clear_journal()
+
+        self._cache.clear()
+        self._dirty.clear()
+        self._reserved.clear()
+        self._pending_changes = 0
+
+    def close(self) -> None:
+        """
+        It flushes the handler and it releases every file it keeps open or memory-mapped.
+        The handler can still be used afterwards: files are opened again when needed.
+
+        :return: None
+        """
+        self.flush()
+        for file_path in list(self._mapped_files):
+            self._unmap_file(file_path)
+        for file, _ in self._open_files.values():
+            file.close()
+        self._open_files.clear()
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def _read_value(self, file_path: str, line_number: int) -> int:
+        if self.use_mmap:
+            return self._read_mapped_number(file_path, line_number)
+        elif not self.write_back:
+            return self._read_number(file_path, line_number)[0]
+
+        key: Tuple[str, int] = (file_path, line_number)
+        value: Optional[int] = self._cache.get(key)
+        if value is None:
+            value = self._read_number_from_open_file(file_path, line_number)
+            self._cache[key] = value
+        return value
+
+    def _read_number_from_open_file(self, file_path: str, line_number: int) -> int:
+        # Files don't change until the next flush: they're kept open, together with their line length
+        if line_number <= 0:
+            raise ValueError("line_number must be a positive non-zero integer number!")
+
+        if file_path not in self._open_files:
+            self.__initialize_file_if_not_existing(file_path)
+            file: BinaryIO = open(file_path, 'rb')
+            self._open_files[file_path] = (file, self._get_line_len(file))
+        file, cur_line_len = self._open_files[file_path]
+
+        file.seek((line_number - 1) * cur_line_len)
+        line: str = file.read(cur_line_len).decode('ascii')
+        try:
+            return int(line.rstrip(self._trailing_char + '\n'))
+        except ValueError:
+            return 0
+
+    def _increment_value(self, file_path: str, line_number: int, increment: int = 1) -> int:
+        if self.use_mmap:
+            new_value: int = self._read_mapped_number(file_path, line_number) + increment
+            self._write_mapped_number(new_value, file_path, line_number)
+            return new_value
+        elif not self.write_back:
+            return self._add_number(file_path, line_number, increment)
+
+        new_value: int = self._read_value(file_path, line_number) + increment
+        self._cache_value(new_value, file_path, line_number, is_increment=True)
+        return new_value
+
+    def _set_value(self, new_value: int, file_path: str, line_number: int) -> None:
+        if self.use_mmap:
+            return self._write_mapped_number(new_value, file_path, line_number)
+        elif not self.write_back:
+            return self._set_number(new_value, file_path, line_number)
+
+        if line_number <= 0:
+            raise ValueError("line_number must be a positive non-zero integer number!")
+        self._cache_value(new_value, file_path, line_number, is_increment=False)
+
+    def _get_mapped_file(self, file_path: str) -> Tuple[mmap.mmap, int]:
+        if file_path not in self._mapped_files:
+            self.__initialize_file_if_not_existing(file_path)
+            file: BinaryIO = open(file_path, 'r+b')
+            self._mapped_files[file_path] = (file, mmap.mmap(file.fileno(), 0), self._get_line_len(file))
+        _, mapped_file, cur_line_len = self._mapped_files[file_path]
+        return mapped_file, cur_line_len
+
+    def _unmap_file(self, file_path: str) -> None:
+        file, mapped_file, _ = self._mapped_files.pop(file_path)
+        mapped_file.close()
+        file.close()
+
+    def _read_mapped_number(self, file_path: str, line_number: int) -> int:
+        if line_number <= 0:
+            raise ValueError("line_number must be a positive non-zero integer number!")
+
+        mapped_file, cur_line_len = self._get_mapped_file(file_path)
+        line_offset: int = (line_number - 1) * cur_line_len
+        try:
+            line: bytes = mapped_file[line_offset:line_offset + cur_line_len]
+            return int(line.decode('ascii').rstrip(self._trailing_char + '\n'))
+        except ValueError:
+            # Lines beyond the end of the file are read as empty lines
+            return 0
+
+    def _write_mapped_number(self, new_value: int, file_path: str, line_number: int) -> None:
+        if new_value < 0:
+            raise ValueError("new_value must be a non negative integer!")
+
+        if line_number <= 0:
+            raise ValueError("line_number must be a positive non-zero integer number!")
+
+        mapped_file, cur_line_len = self._get_mapped_file(file_path)
+        cur_number_len: int = len(str(new_value)) + 1
+        if cur_number_len > cur_line_len:
+            self._unmap_file(file_path)
+            self._increase_line_len(file_path, new_length=cur_number_len)
+            mapped_file, cur_line_len = self._get_mapped_file(file_path)
+
+        n_lines: int = len(mapped_file) // cur_line_len
+        if line_number > n_lines:
+            # The file is at least doubled, so that it gets remapped only a logarithmic number of times.
+            # Padding lines are removed when flushing, hence the number of lines in use is tracked
+            self._used_lines.setdefault(file_path, n_lines)
+            self._unmap_file(file_path)
+            with open(file_path, 'ab') as file:
+                empty_line: str = (self._trailing_char * (cur_line_len - 1)) + '\n'
+                file.write(empty_line.encode('ascii') * (max(line_number, 2 * n_lines) - n_lines))
+            mapped_file, cur_line_len = self._get_mapped_file(file_path)
+        if line_number > self._used_lines.get(file_path, line_number):
+            self._used_lines[file_path] = line_number
+
+        line_offset: int = (line_number - 1) * cur_line_len
+        line: str = str(new_value).ljust(cur_line_len - 1, self._trailing_char) + '\n'
+        mapped_file[line_offset:line_offset + cur_line_len] = line.encode('ascii')
+
+    def _cache_value(self, new_value: int, file_path: str, line_number: int, is_increment: bool) -> None:
+        key: Tuple[str, int] = (file_path, line_number)
+        self._cache[key] = new_value
+        self._dirty.add(key)
+
+        if file_path in self._prov_paths:
+            # Snapshot counters must match the stored snapshots: they can't be reserved in advance
+            self._write_journal(file_path, line_number, new_value)
+        elif not is_increment:
+            self._reserved[key] = new_value
+            self._write_journal(file_path, line_number, new_value)
+        elif new_value > self._reserved.get(key, 0):
+            # The identifier is handed out only after its reservation becomes durable
+            reserved_value: int = new_value + self.block_size - 1
+            self._reserved[key] = reserved_value
+            self._write_journal(file_path, line_number, reserved_value)
+            self._sync_journal()
+
+        self._pending_changes += 1
+        if 0 < self.flush_every <= self._pending_changes:
+            self.flush()
+
+    def _write_journal(self, file_path: str, line_number: int, value: int) -> None:
+        if self._journal is None:
+            if not os.path.exists(self.info_dir):
+                os.makedirs(self.info_dir)
+            self._journal = open(self._journal_path, 'at', encoding='utf-8')
+        self._journal.write(f"{os.path.relpath(file_path, self.info_dir)}\t{line_number}\t{value}\n")
+        # Records reach the OS straight away: they survive the crash of the process even before being synced
+        self._journal.flush()
+
+    def _sync_journal(self) -> None:
+        if self._journal is not None:
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+
+    def _clear_journal(self) -> None:
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        if os.path.isfile(self._journal_path):
+            os.remove(self._journal_path)
+
+    def _recover_journal(self) -> None:
+        if not os.path.isfile(self._journal_path):
+            return
+
+        values_by_file: Dict[str, Dict[int, int]] = {}
+        with open(self._journal_path, 'rt', encoding='utf-8') as journal:
+            for record in journal:
+                fields: List[str] = record.rstrip('\n').split('\t')
+                if not record.endswith('\n') or len(fields) != 3:
+                    # The last record could have been partially written
+                    continue
+                file_path: str = self.info_dir + fields[0]
+                values_by_file.setdefault(file_path, {})[int(fields[1])] = int(fields[2])
+        for file_path, values in values_by_file.items():
+            self._write_numbers(file_path, values)
+        self._clear_journal()
+
+    def _write_numbers(self, file_path: str, values: Dict[int, int]) -> None:
+        # It writes many values to the same file at once, opening it just once
+        self.__initialize_file_if_not_existing(file_path)
+
+        with open(file_path, 'rb') as file:
+            cur_line_len: int = self._get_line_len(file)
+        max_number_len: int = max(len(str(value)) for value in values.values()) + 1
+        if max_number_len > cur_line_len:
+            self._increase_line_len(file_path, new_length=max_number_len)
+            cur_line_len = max_number_len
+
+        with open(file_path, 'r+b') as file:
+            file.seek(0, os.SEEK_END)
+            n_lines: int = file.tell() // cur_line_len
+            max_line_number: int = max(values)
+            if max_line_number > n_lines:
+                # Missing lines are added as empty lines
+                file.seek(n_lines * cur_line_len)
+                empty_line: str = (self._trailing_char * (cur_line_len - 1)) + '\n'
+                file.write(empty_line.encode('ascii') * (max_line_number - n_lines))
+            for line_number in sorted(values):
+                file.seek((line_number - 1) * cur_line_len)
+                line: str = str(values[line_number]).ljust(cur_line_len - 1, self._trailing_char) + '\n'
+                file.write(line.encode('ascii'))
+            file.flush()
+            os.fsync(file.fileno())
 
     def _get_info_path(self, short_name: str) -> str:
         return self.info_dir + self.info_files[short_name]
@@ -169,14 +569,34 @@ class FilesystemCounterHandler(CounterHandler):
 
         return cur_number, cur_line_len
 
-    def _add_number(self, file_path: str, line_number: int = 1) -> int:
+    def _read_numbers(self, file_path: str, line_numbers: Iterable[int]) -> Dict[int, int]:
+        # It reads many values from the same file at once, in the order in which they are stored
+        sorted_line_numbers: List[int] = sorted(set(line_numbers))
+        if len(sorted_line_numbers) > 0 and sorted_line_numbers[0] <= 0:
+            raise ValueError("line_number must be a positive non-zero integer number!")
+
+        self.__initialize_file_if_not_existing(file_path)
+
+        values: Dict[int, int] = {}
+        with open(file_path, 'rb') as file:
+            cur_line_len: int = self._get_line_len(file)
+            for line_number in sorted_line_numbers:
+                file.seek((line_number - 1) * cur_line_len)
+                line: str = file.read(cur_line_len).decode('ascii')
+                try:
+                    values[line_number] = int(line.rstrip(self._trailing_char + '\n'))
+                except ValueError:
+                    values[line_number] = 0
+        return values
+
+    def _add_number(self, file_path: str, line_number: int = 1, increment: int = 1) -> int:
         if line_number <= 0:
             raise ValueError("line_number must be a positive non-zero integer number!")
 
         self.__initialize_file_if_not_existing(file_path)
 
         cur_number, cur_line_len = self._read_number(file_path, line_number)
-        cur_number += 1
+        cur_number += increment
 
         cur_number_len: int = len(str(cur_number)) + 1
         if cur_number_len > cur_line_len:
@@ -303,7 +723,7 @@ class FilesystemCounterHandler(CounterHandler):
             raise ValueError("entity_short_name is not a known metadata short name!")
 
         file_path: str = self._get_metadata_path(entity_short_name, dataset_name)
-        return self._set_number(new_value, file_path, 1)
+        return self._set_value(new_value, file_path, 1)
 
     def read_metadata_counter(self, entity_short_name: str, dataset_name: str) -> int:
         """
@@ -323,7 +743,7 @@ class FilesystemCounterHandler(CounterHandler):
             raise ValueError("entity_short_name is not a known metadata short name!")
 
         file_path: str = self._get_metadata_path(entity_short_name, dataset_name)
-        return self._read_number(file_path, 1)[0]
+        return self._read_value(file_path, 1)
 
     def increment_metadata_counter(self, entity_short_name: str, dataset_name: str) -> int:
         """
@@ -343,4 +763,4 @@ class FilesystemCounterHandler(CounterHandler):
             raise ValueError("entity_short_name is not a known metadata short name!")
 
         file_path: str = self._get_metadata_path(entity_short_name, dataset_name)
-        return self._add_number(file_path, 1)
+        return self._increment_value(file_path, 1)
@@ -158,6 +158,52 @@ class InMemoryCounterHandler(CounterHandler):
             self.entity_counters[entity_short_name] += 1
             return self.entity_counters[entity_short_name]
 
+    def reserve_counter(self, n: int, entity_short_name: str, prov_short_name: str = "",
+                        identifier: int = 1) -> int:
+        """
+        It allows to reserve a contiguous range of ``n`` counter values of graph and provenance entities,
+        i.e. to increment the counter value by ``n`` units at once.
+
+        :param n: The number of counter values to be reserved
+        :type n: int
+        :param entity_short_name: The short name associated either to the type of the entity itself
+         or, in case of a provenance entity, to the type of the relative graph entity.
+        :type entity_short_name: str
+        :param prov_short_name: In case of a provenance entity, the short name associated to the type
+         of the entity itself. An empty string otherwise.
+        :type prov_short_name: str
+        :param identifier: In case of a provenance entity, the counter value that identifies the relative
+          graph entity. The integer value '1' otherwise.
+        :type identifier: int
+        :raises ValueError: if ``n`` or ``identifier`` are less than or equal to zero, ``entity_short_name``
+          is not a known short name or ``prov_short_name`` is not a known provenance short name.
+        :return: The first counter value of the reserved range (the last one is the newly-updated counter value).
+        """
+        if n <= 0:
+            raise ValueError("n must be a positive non-zero integer number!")
+
+        if entity_short_name not in self.short_names:
+            raise ValueError("entity_short_name is not a known short name!")
+
+        if prov_short_name != "":
+            if prov_short_name not in self.prov_short_names:
+                raise ValueError("prov_short_name is not a known provenance short name!")
+            if identifier <= 0:
+                raise ValueError("identifier must be a positive non-zero integer number!")
+
+        identifier -= 1  # Internally we use zero_indexing!
+        if prov_short_name in self.prov_short_names:
+            # It's a provenance entity!
+            missing_counters: int = identifier - (len(self.prov_counters[entity_short_name][prov_short_name]) - 1)
+            if missing_counters > 0:
+                self.prov_counters[entity_short_name][prov_short_name] += [0]*missing_counters
+            self.prov_counters[entity_short_name][prov_short_name][identifier] += n
+            return self.prov_counters[entity_short_name][prov_short_name][identifier] - n + 1
+        else:
+            # It's an entity!
+            self.entity_counters[entity_short_name] += n
+            return self.entity_counters[entity_short_name] - n + 1
+
     def set_metadata_counter(self, new_value: int, entity_short_name: str, dataset_name: str) -> None:
         """
         It allows to set the counter value of metadata entities.
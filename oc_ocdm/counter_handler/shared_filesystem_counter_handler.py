@@ -0,0 +1,228 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2016, Silvio Peroni <essepuntato@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+from __future__ import annotations
+
+import os
+from threading import RLock
+from typing import TYPE_CHECKING
+
+from filelock import FileLock
+
+if TYPE_CHECKING:
+    from typing import Dict, Iterable, Tuple
+
+from oc_ocdm.counter_handler.filesystem_counter_handler import FilesystemCounterHandler
+
+
+class SharedFilesystemCounterHandler(FilesystemCounterHandler):
+    """A ``FilesystemCounterHandler`` whose counter files can be safely shared by many processes
+    (and threads) at the same time."""
+
+    shared: bool = True
+
+    def __init__(self, info_dir: str, lease_size: int = 100, timeout: float = -1) -> None:
+        """
+        Constructor of the ``SharedFilesystemCounterHandler`` class.
+
+        Every access to a counter file is guarded by an exclusive lock on a sibling ``.lock`` file,
+        so that each read-modify-write cycle is atomic with respect to every other handler working
+        on the same ``info_dir``. In order to keep the lock contention low, identifiers of graph and
+        metadata entities are leased ``lease_size`` at a time: the counter file is advanced by a whole
+        lease under the lock, and the identifiers of the lease are then handed out without touching
+        the filesystem. Identifiers that are still unused are given back by ``flush`` (or when leaving
+        a ``with`` block), provided that no other handler leased new identifiers in the meantime;
+        otherwise they are simply skipped. Snapshot counters are never leased, since they must
+        match the stored snapshots.
+
+        :param info_dir: The path to the folder that does/will contain the counter values.
+        :type info_dir: str
+        :param lease_size: The number of identifiers leased at a time.
+        :type lease_size: int
+        :param timeout: The maximum number of seconds to wait for a lock (a negative value means forever).
+        :type timeout: float
+        :raises ValueError: if ``info_dir`` is None or an empty string, or if ``lease_size`` is not positive.
+        """
+        if lease_size <= 0:
+            raise ValueError("lease_size must be a positive non-zero integer number!")
+
+        self.lease_size: int = lease_size
+        self.timeout: float = timeout
+        self._locks: Dict[str, FileLock] = {}
+        self._thread_lock: RLock = RLock()
+        # The next and the last identifier of the lease currently held for each entity counter
+        self._leases: Dict[Tuple[str, int], Tuple[int, int]] = {}
+        self._pid: int = os.getpid()
+        super(SharedFilesystemCounterHandler, self).__init__(info_dir)
+
+    def flush(self) -> None:
+        """
+        It gives back the identifiers of every lease which have not been handed out yet,
+        unless the relative counter has been advanced by some other handler in the meantime.
+
+        :return: None
+        """
+        with self._thread_lock:
+            self._check_pid()
+            for (file_path, line_number), (next_value, last_value) in self._leases.items():
+                if next_value > last_value:
+                    continue
+                with self._lock(file_path):
+                    if self._read_number(file_path, line_number)[0] == last_value:
+                        self._set_number(next_value - 1, file_path, line_number)
+            self._leases.clear()
+
+    def increment_counters(self, increments: Dict[int, int], entity_short_name: str,
+                           prov_short_name: str = "") -> Dict[int, int]:
+        """
+        It allows to increment many counter values of graph and provenance entities at once.
+        Snapshot counters are incremented with a single read-modify-write cycle of the counter file
+        performed under its lock, while the other counters are incremented through their leases.
+
+        :param increments: A dictionary mapping the identifiers (i.e., in case of provenance entities, the counter
+          values that identify the relative graph entities) to the increments to be applied
+        :type increments: Dict[int, int]
+        :param entity_short_name: The short name associated either to the type of the entity itself
+         or, in case of a provenance entity, to the type of the relative graph entity.
+        :type entity_short_name: str
+        :param prov_short_name: In case of a provenance entity, the short name associated to the type
+         of the entity itself. An empty string otherwise.
+        :type prov_short_name: str
+        :raises ValueError: if any of the increments or of the identifiers is less than or equal to zero.
+        :return: A dictionary mapping each identifier to the newly-updated (already incremented) counter value.
+        """
+        if prov_short_name != "se":
+            return super(SharedFilesystemCounterHandler, self).increment_counters(increments, entity_short_name,
+                                                                                  prov_short_name)
+        if any(increment <= 0 for increment in increments.values()):
+            raise ValueError("increment must be a positive non-zero integer number!")
+        if len(increments) <= 0:
+            return {}
+
+        file_path: str = self._get_prov_path(entity_short_name)
+        with self._thread_lock:
+            self._check_pid()
+            with self._lock(file_path):
+                new_values: Dict[int, int] = {identifier: value + increments[identifier] for identifier, value
+                                              in self._read_numbers(file_path, increments).items()}
+                self._write_numbers(file_path, new_values)
+        return new_values
+
+    def read_counters(self, entity_short_name: str, prov_short_name: str, identifiers: Iterable[int]) -> Dict[int, int]:
+        """
+        It allows to read many counter values of graph and provenance entities at once,
+        with a single sequential sweep of the counter file performed under its lock.
+
+        :param entity_short_name: The short name associated either to the type of the entity itself
+         or, in case of a provenance entity, to the type of the relative graph entity.
+        :type entity_short_name: str
+        :param prov_short_name: In case of a provenance entity, the short name associated to the type
+         of the entity itself. An empty string otherwise.
+        :type prov_short_name: str
+        :param identifiers: In case of provenance entities, the counter values that identify the relative
+          graph entities.
+        :type identifiers: Iterable[int]
+        :raises ValueError: if any of the ``identifiers`` is less than or equal to zero.
+        :return: A dictionary mapping each identifier to the requested counter value.
+        """
+        if prov_short_name == "se":
+            file_path: str = self._get_prov_path(entity_short_name)
+        else:
+            file_path: str = self._get_info_path(entity_short_name)
+        with self._thread_lock, self._lock(file_path):
+            return self._read_numbers(file_path, identifiers)
+
+    def set_counters(self, new_values: Dict[int, int], entity_short_name: str, prov_short_name: str = "") -> None:
+        """
+        It allows to set many counter values of graph and provenance entities at once,
+        with a single sequential sweep of the counter file performed under its lock.
+
+        :param new_values: A dictionary mapping the identifiers (i.e., in case of provenance entities, the counter
+          values that identify the relative graph entities) to the new counter values to be set
+        :type new_values: Dict[int, int]
+        :param entity_short_name: The short name associated either to the type of the entity itself
+         or, in case of a provenance entity, to the type of the relative graph entity.
+        :type entity_short_name: str
+        :param prov_short_name: In case of a provenance entity, the short name associated to the type
+         of the entity itself. An empty string otherwise.
+        :type prov_short_name: str
+        :raises ValueError: if any of the new values is a negative integer or any of the identifiers
+          is less than or equal to zero.
+        :return: None
+        """
+        if prov_short_name == "se":
+            file_path: str = self._get_prov_path(entity_short_name)
+        else:
+            file_path: str = self._get_info_path(entity_short_name)
+        with self._thread_lock:
+            self._check_pid()
+            with self._lock(file_path):
+                super(SharedFilesystemCounterHandler, self).set_counters(new_values, entity_short_name,
+                                                                         prov_short_name)
+            for identifier in new_values:
+                self._leases.pop((file_path, identifier), None)
+
+    def _read_value(self, file_path: str, line_number: int) -> int:
+        with self._thread_lock, self._lock(file_path):
+            return self._read_number(file_path, line_number)[0]
+
+    def _increment_value(self, file_path: str, line_number: int, increment: int = 1) -> int:
+        with self._thread_lock:
+            self._check_pid()
+            if file_path in self._prov_paths:
+                with self._lock(file_path):
+                    return self._add_number(file_path, line_number, increment)
+
+            key: Tuple[str, int] = (file_path, line_number)
+            next_value, last_value = self._leases.get(key, (1, 0))
+            if next_value + increment - 1 > last_value:
+                # The rest of the current lease (if any) is skipped, since the range must be contiguous
+                size: int = max(self.lease_size, increment)
+                with self._lock(file_path):
+                    last_value = self._add_number(file_path, line_number, size)
+                next_value = last_value - size + 1
+
+            new_value: int = next_value + increment - 1
+            self._leases[key] = (new_value + 1, last_value)
+            return new_value
+
+    def _set_value(self, new_value: int, file_path: str, line_number: int) -> None:
+        with self._thread_lock:
+            self._check_pid()
+            with self._lock(file_path):
+                self._set_number(new_value, file_path, line_number)
+            # The counter could have been moved below (or above) the current lease
+            self._leases.pop((file_path, line_number), None)
+
+    def _recover_journal(self) -> None:
+        # Many handlers could be created at the same time for the same folder
+        if os.path.isfile(self._journal_path):
+            with FileLock(f"{self._journal_path}.lock", timeout=self.timeout):
+                super(SharedFilesystemCounterHandler, self)._recover_journal()
+
+    def _lock(self, file_path: str) -> FileLock:
+        lock: FileLock = self._locks.get(file_path)
+        if lock is None:
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            lock = FileLock(f"{file_path}.lock", timeout=self.timeout)
+            self._locks[file_path] = lock
+        return lock
+
+    def _check_pid(self) -> None:
+        # A forked child process must neither reuse the leases nor the locks of its parent
+        if os.getpid() != self._pid:
+            self._pid = os.getpid()
+            self._leases.clear()
+            self._locks.clear()
@@ -0,0 +1,446 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2016, Silvio Peroni <essepuntato@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+from __future__ import annotations
+
+import os
+import sqlite3
+from contextlib import contextmanager
+from threading import Lock
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Dict, Iterable, Iterator, List, Tuple
+
+from oc_ocdm.counter_handler.counter_handler import CounterHandler
+from oc_ocdm.counter_handler.filesystem_counter_handler import FilesystemCounterHandler
+from oc_ocdm.support.support import is_string_empty
+
+
+class SqliteCounterHandler(CounterHandler):
+    """A concrete implementation of the ``CounterHandler`` interface that persistently stores
+    the counter values within an SQLite database."""
+
+    _tables: Dict[str, Tuple[str, ...]] = {
+        "counters": ("entity", "prov", "identifier"),
+        "metadata_counters": ("dataset", "entity")
+    }
+    # The 'INSERT ... ON CONFLICT DO UPDATE' syntax is available since SQLite 3.24.0
+    _upsert_supported: bool = sqlite3.sqlite_version_info >= (3, 24, 0)
+    shared: bool = True
+
+    def __init__(self, database: str) -> None:
+        """
+        Constructor of the ``SqliteCounterHandler`` class.
+
+        Every counter is a row of an indexed table, hence reading or updating it never requires
+        rewriting other counters, no matter how many of them are stored. Each change is applied
+        within its own transaction, which makes the handler safe to be used by many threads
+        and processes at the same time.
+
+        :param database: The path to the SQLite database file that does/will contain the counter values.
+        :type database: str
+        :raises ValueError: if ``database`` is None or an empty string.
+        """
+        if database is None or is_string_empty(database):
+            raise ValueError("database parameter is required!")
+
+        self.database: str = database
+        self.short_names: List[str] = ["an", "ar", "be", "br", "ci", "de", "id", "pl", "ra", "re", "rp"]
+        self.prov_short_names: List[str] = ["se"]
+        self.metadata_short_names: List[str] = ["di"]
+
+        self._lock: Lock = Lock()
+        self._connection: sqlite3.Connection = self._connect()
+        self._pid: int = os.getpid()
+
+    def set_counter(self, new_value: int, entity_short_name: str, prov_short_name: str = "",
+                    identifier: int = 1) -> None:
+        """
+        It allows to set the counter value of graph and provenance entities.
+
+        :param new_value: The new counter value to be set
+        :type new_value: int
+        :param entity_short_name: The short name associated either to the type of the entity itself
+         or, in case of a provenance entity, to the type of the relative graph entity.
+        :type entity_short_name: str
+        :param prov_short_name: In case of a provenance entity, the short name associated to the type
+         of the entity itself. An empty string otherwise.
+        :type prov_short_name: str
+        :param identifier: In case of a provenance entity, the counter value that identifies the relative
+          graph entity. The integer value '1' otherwise.
+        :type identifier: int
+        :raises ValueError: if ``new_value`` is a negative integer, ``identifier`` is less than or equal to zero,
+          ``entity_short_name`` is not a known short name or ``prov_short_name`` is not a known provenance short name.
+        :return: None
+        """
+        if new_value < 0:
+            raise ValueError("new_value must be a non negative integer!")
+
+        key: Tuple = self._get_key(entity_short_name, prov_short_name, identifier)
+        self._set_value("counters", key, new_value)
+
+    def read_counter(self, entity_short_name: str, prov_short_name: str = "", identifier: int = 1) -> int:
+        """
+        It allows to read the counter value of graph and provenance entities.
+
+        :param entity_short_name: The short name associated either to the type of the entity itself
+         or, in case of a provenance entity, to the type of the relative graph entity.
+        :type entity_short_name: str
+        :param prov_short_name: In case of a provenance entity, the short name associated to the type
+         of the entity itself. An empty string otherwise.
+        :type prov_short_name: str
+        :param identifier: In case of a provenance entity, the counter value that identifies the relative
+          graph entity. The integer value '1' otherwise.
+        :type identifier: int
+        :raises ValueError: if ``identifier`` is less than or equal to zero, ``entity_short_name``
+          is not a known short name or ``prov_short_name`` is not a known provenance short name.
+        :return: The requested counter value.
+        """
+        key: Tuple = self._get_key(entity_short_name, prov_short_name, identifier)
+        return self._read_value("counters", key)
+
+    def increment_counter(self, entity_short_name: str, prov_short_name: str = "", identifier: int = 1) -> int:
+        """
+        It allows to increment the counter value of graph and provenance entities by one unit.
+
+        :param entity_short_name: The short name associated either to the type of the entity itself
+         or, in case of a provenance entity, to the type of the relative graph entity.
+        :type entity_short_name: str
+        :param prov_short_name: In case of a provenance entity, the short name associated to the type
+         of the entity itself. An empty string otherwise.
+        :type prov_short_name: str
+        :param identifier: In case of a provenance entity, the counter value that identifies the relative
+          graph entity. The integer value '1' otherwise.
+        :type identifier: int
+        :raises ValueError: if ``identifier`` is less than or equal to zero, ``entity_short_name``
+          is not a known short name or ``prov_short_name`` is not a known provenance short name.
+        :return: The newly-updated (already incremented) counter value.
+        """
+        key: Tuple = self._get_key(entity_short_name, prov_short_name, identifier)
+        return self._increment_value("counters", key, 1)
+
+    def reserve_counter(self, n: int, entity_short_name: str, prov_short_name: str = "",
+                        identifier: int = 1) -> int:
+        """
+        It allows to reserve a contiguous range of ``n`` counter values of graph and provenance entities,
+        i.e. to increment the counter value by ``n`` units at once (within a single transaction).
+
+        :param n: The number of counter values to be reserved
+        :type n: int
+        :param entity_short_name: The short name associated either to the type of the entity itself
+         or, in case of a provenance entity, to the type of the relative graph entity.
+        :type entity_short_name: str
+        :param prov_short_name: In case of a provenance entity, the short name associated to the type
+         of the entity itself. An empty string otherwise.
+        :type prov_short_name: str
+        :param identifier: In case of a provenance entity, the counter value that identifies the relative
+          graph entity. The integer value '1' otherwise.
+        :type identifier: int
+        :raises ValueError: if ``n`` or ``identifier`` are less than or equal to zero, ``entity_short_name``
+          is not a known short name or ``prov_short_name`` is not a known provenance short name.
+        :return: The first counter value of the reserved range (the last one is the newly-updated counter value).
+        """
+        if n <= 0:
+            raise ValueError("n must be a positive non-zero integer number!")
+
+        key: Tuple = self._get_key(entity_short_name, prov_short_name, identifier)
+        return self._increment_value("counters", key, n) - n + 1
+
+    def increment_counters(self, increments: Dict[int, int], entity_short_name: str,
+                           prov_short_name: str = "") -> Dict[int, int]:
+        """
+        It allows to increment many counter values of graph and provenance entities at once (within a single
+        transaction).
+
+        :param increments: A dictionary mapping the identifiers (i.e., in case of provenance entities, the counter
+          values that identify the relative graph entities) to the increments to be applied
+        :type increments: Dict[int, int]
+        :param entity_short_name: The short name associated either to the type of the entity itself
+         or, in case of a provenance entity, to the type of the relative graph entity.
+        :type entity_short_name: str
+        :param prov_short_name: In case of a provenance entity, the short name associated to the type
+         of the entity itself. An empty string otherwise.
+        :type prov_short_name: str
+        :raises ValueError: if any of the increments or of the identifiers is less than or equal to zero,
+          ``entity_short_name`` is not a known short name or ``prov_short_name`` is not a known provenance
+          short name.
+        :return: A dictionary mapping each identifier to the newly-updated (already incremented) counter value.
+        """
+        if any(increment <= 0 for increment in increments.values()):
+            raise ValueError("increment must be a positive non-zero integer number!")
+
+        keys: Dict[int, Tuple] = {identifier: self._get_key(entity_short_name, prov_short_name, identifier)
+                                  for identifier in sorted(increments)}
+        with self._transaction() as cursor:
+            return {identifier: self._add_value(cursor, "counters", key, increments[identifier])
+                    for identifier, key in keys.items()}
+
+    def read_counters(self, entity_short_name: str, prov_short_name: str, identifiers: Iterable[int]) -> Dict[int, int]:
+        """
+        It allows to read many counter values of graph and provenance entities at once (within a single
+        transaction).
+
+        :param entity_short_name: The short name associated either to the type of the entity itself
+         or, in case of a provenance entity, to the type of the relative graph entity.
+        :type entity_short_name: str
+        :param prov_short_name: In case of a provenance entity, the short name associated to the type
+         of the entity itself. An empty string otherwise.
+        :type prov_short_name: str
+        :param identifiers: In case of provenance entities, the counter values that identify the relative
+          graph entities.
+        :type identifiers: Iterable[int]
+        :raises ValueError: if any of the ``identifiers`` is less than or equal to zero, ``entity_short_name``
+          is not a known short name or ``prov_short_name`` is not a known provenance short name.
+        :return: A dictionary mapping each identifier to the requested counter value.
+        """
+        keys: List[Tuple] = [self._get_key(entity_short_name, prov_short_name, identifier)
+                             for identifier in sorted(set(identifiers))]
+        values: Dict[int, int] = {}
+        with self._transaction(write=False) as cursor:
+            for key in keys:
+                cursor.execute(f"SELECT value FROM counters WHERE {self._get_condition('counters')}", key)
+                row: Tuple[int] = cursor.fetchone()
+                values[key[2]] = 0 if row is None else row[0]
+        return values
+
+    def set_counters(self, new_values: Dict[int, int], entity_short_name: str, prov_short_name: str = "") -> None:
+        """
+        It allows to set many counter values of graph and provenance entities at once (within a single
+        transaction).
+
+        :param new_values: A dictionary mapping the identifiers (i.e., in case of provenance entities, the counter
+          values that identify the relative graph entities) to the new counter values to be set
+        :type new_values: Dict[int, int]
+        :param entity_short_name: The short name associated either to the type of the entity itself
+         or, in case of a provenance entity, to the type of the relative graph entity.
+        :type entity_short_name: str
+        :param prov_short_name: In case of a provenance entity, the short name associated to the type
+         of the entity itself. An empty string otherwise.
+        :type prov_short_name: str
+        :raises ValueError: if any of the new values is a negative integer, any of the identifiers is less than
+          or equal to zero, ``entity_short_name`` is not a known short name or ``prov_short_name`` is not
+          a known provenance short name.
+        :return: None
+        """
+        if any(new_value < 0 for new_value in new_values.values()):
+            raise ValueError("new_value must be a non negative integer!")
+
+        rows: List[Tuple] = [(*self._get_key(entity_short_name, prov_short_name, identifier), new_value)
+                             for identifier, new_value in new_values.items()]
+        with self._transaction() as cursor:
+            cursor.executemany("INSERT OR REPLACE INTO counters VALUES (?, ?, ?, ?)", rows)
+
+    def set_metadata_counter(self, new_value: int, entity_short_name: str, dataset_name: str) -> None:
+        """
+        It allows to set the counter value of metadata entities.
+
+        :param new_value: The new counter value to be set
+        :type new_value: int
+        :param entity_short_name: The short name associated either to the type of the entity itself.
+        :type entity_short_name: str
+        :param dataset_name: In case of a ``Dataset``, its name. Otherwise, the name of the relative dataset.
+        :type dataset_name: str
+        :raises ValueError: if ``new_value`` is a negative integer, ``dataset_name`` is None or
+          ``entity_short_name`` is not a known metadata short name.
+        :return: None
+        """
+        if new_value < 0:
+            raise ValueError("new_value must be a non negative integer!")
+
+        key: Tuple = self._get_metadata_key(entity_short_name, dataset_name)
+        self._set_value("metadata_counters", key, new_value)
+
+    def read_metadata_counter(self, entity_short_name: str, dataset_name: str) -> int:
+        """
+        It allows to read the counter value of metadata entities.
+
+        :param entity_short_name: The short name associated either to the type of the entity itself.
+        :type entity_short_name: str
+        :param dataset_name: In case of a ``Dataset``, its name. Otherwise, the name of the relative dataset.
+        :type dataset_name: str
+        :raises ValueError: if ``dataset_name`` is None or ``entity_short_name`` is not a known metadata short name.
+        :return: The requested counter value.
+        """
+        key: Tuple = self._get_metadata_key(entity_short_name, dataset_name)
+        return self._read_value("metadata_counters", key)
+
+    def increment_metadata_counter(self, entity_short_name: str, dataset_name: str) -> int:
+        """
+        It allows to increment the counter value of metadata entities by one unit.
+
+        :param entity_short_name: The short name associated either to the type of the entity itself.
+        :type entity_short_name: str
+        :param dataset_name: In case of a ``Dataset``, its name. Otherwise, the name of the relative dataset.
+        :type dataset_name: str
+        :raises ValueError: if ``dataset_name`` is None or ``entity_short_name`` is not a known metadata short name.
+        :return: The newly-updated (already incremented) counter value.
+        """
+        key: Tuple = self._get_metadata_key(entity_short_name, dataset_name)
+        return self._increment_value("metadata_counters", key, 1)
+
+    def import_filesystem_counters(self, info_dir: str) -> int:
+        """
+        It copies every counter value stored by a ``FilesystemCounterHandler`` inside ``info_dir``
+        into the database (overwriting the values that are already stored, if any). Counter files are
+        read sequentially and all of their values are inserted within a single transaction.
+
+        :param info_dir: The path to the folder that contains the counter values.
+        :type info_dir: str
+        :raises ValueError: if ``info_dir`` is None or an empty string.
+        :return: The number of imported counter values.
+        """
+        # The constructor also replays the journal left behind by an interrupted write-back handler
+        filesystem_handler: FilesystemCounterHandler = FilesystemCounterHandler(info_dir)
+
+        with self._transaction() as cursor:
+            cursor.executemany("INSERT OR REPLACE INTO counters VALUES (?, ?, ?, ?)",
+                               self._iter_filesystem_counters(filesystem_handler))
+            imported: int = cursor.rowcount
+            cursor.executemany("INSERT OR REPLACE INTO metadata_counters VALUES (?, ?, ?)",
+                               self._iter_filesystem_metadata_counters(filesystem_handler))
+            imported += cursor.rowcount
+        return imported
+
+    def close(self) -> None:
+        """
+        It closes the connection to the database.
+
+        :return: None
+        """
+        with self._lock:
+            self._connection.close()
+
+    def _get_key(self, entity_short_name: str, prov_short_name: str, identifier: int) -> Tuple[str, str, int]:
+        if entity_short_name not in self.short_names:
+            raise ValueError("entity_short_name is not a known short name!")
+
+        if prov_short_name != "" and prov_short_name not in self.prov_short_names:
+            raise ValueError("prov_short_name is not a known provenance short name!")
+
+        if identifier <= 0:
+            raise ValueError("identifier must be a positive non-zero integer number!")
+
+        return entity_short_name, prov_short_name, identifier
+
+    def _get_metadata_key(self, entity_short_name: str, dataset_name: str) -> Tuple[str, str]:
+        if dataset_name is None:
+            raise ValueError("dataset_name must be provided!")
+
+        if entity_short_name not in self.metadata_short_names:
+            raise ValueError("entity_short_name is not a known metadata short name!")
+
+        return dataset_name, entity_short_name
+
+    def _read_value(self, table: str, key: Tuple) -> int:
+        with self._transaction(write=False) as cursor:
+            cursor.execute(f"SELECT value FROM {table} WHERE {self._get_condition(table)}", key)
+            row: Tuple[int] = cursor.fetchone()
+        return 0 if row is None else row[0]
+
+    def _increment_value(self, table: str, key: Tuple, increment: int) -> int:
+        with self._transaction() as cursor:
+            return self._add_value(cursor, table, key, increment)
+
+    def _add_value(self, cursor: sqlite3.Cursor, table: str, key: Tuple, increment: int) -> int:
+        columns: Tuple[str, ...] = self._tables[table]
+        if self._upsert_supported:
+            cursor.execute(f"INSERT INTO {table} VALUES ({', '.join('?' * (len(columns) + 1))}) "
+                           f"ON CONFLICT ({', '.join(columns)}) DO UPDATE SET value = value + excluded.value",
+                           (*key, increment))
+        else:
+            # Older SQLite versions lack the UPSERT syntax, but the transaction keeps both statements atomic
+            cursor.execute(f"INSERT OR IGNORE INTO {table} VALUES ({', '.join('?' * (len(columns) + 1))})",
+                           (*key, 0))
+            cursor.execute(f"UPDATE {table} SET value = value + ? WHERE {self._get_condition(table)}",
+                           (increment, *key))
+        cursor.execute(f"SELECT value FROM {table} WHERE {self._get_condition(table)}", key)
+        return cursor.fetchone()[0]
+
+    def _set_value(self, table: str, key: Tuple, new_value: int) -> None:
+        with self._transaction() as cursor:
+            cursor.execute(f"INSERT OR REPLACE INTO {table} VALUES ({', '.join('?' * (len(key) + 1))})",
+                           (*key, new_value))
+
+    def _get_condition(self, table: str) -> str:
+        return ' AND '.join(f"{column} = ?" for column in self._tables[table])
+
+    @contextmanager
+    def _transaction(self, write: bool = True) -> Iterator[sqlite3.Cursor]:
+        with self._lock:
+            if os.getpid() != self._pid:
+                # A forked child process can't share the connection of its parent
+                self._pid = os.getpid()
+                self._connection = self._connect()
+            cursor: sqlite3.Cursor = self._connection.cursor()
+            # Writers lock the database straight away, so that read-modify-write cycles are atomic,
+            # while readers only take a shared lock and don't block the other processes
+            cursor.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+            try:
+                yield cursor
+            except BaseException:
+                cursor.execute("ROLLBACK")
+                raise
+            else:
+                cursor.execute("COMMIT")
+            finally:
+                cursor.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        directory: str = os.path.dirname(self.database)
+        if directory != "" and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+
+        connection: sqlite3.Connection = sqlite3.connect(self.database, timeout=60, isolation_level=None,
+                                                         check_same_thread=False)
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute("PRAGMA synchronous = NORMAL")
+        connection.execute("CREATE TABLE IF NOT EXISTS counters (entity TEXT NOT NULL, prov TEXT NOT NULL, "
+                           "identifier INTEGER NOT NULL, value INTEGER NOT NULL, "
+                           "PRIMARY KEY (entity, prov, identifier)) WITHOUT ROWID")
+        connection.execute("CREATE TABLE IF NOT EXISTS metadata_counters (dataset TEXT NOT NULL, "
+                           "entity TEXT NOT NULL, value INTEGER NOT NULL, "
+                           "PRIMARY KEY (dataset, entity)) WITHOUT ROWID")
+        return connection
+
+    def _iter_filesystem_counters(self, filesystem_handler: FilesystemCounterHandler) -> Iterator[Tuple]:
+        for short_name in self.short_names:
+            for identifier, value in self._read_counter_file(filesystem_handler._get_info_path(short_name)):
+                yield short_name, "", identifier, value
+            for identifier, value in self._read_counter_file(filesystem_handler._get_prov_path(short_name)):
+                yield short_name, "se", identifier, value
+
+    def _iter_filesystem_metadata_counters(self, filesystem_handler: FilesystemCounterHandler) -> Iterator[Tuple]:
+        if not os.path.isdir(filesystem_handler.datasets_dir):
+            return
+        for dataset_name in os.listdir(filesystem_handler.datasets_dir):
+            for short_name in self.metadata_short_names:
+                file_path: str = filesystem_handler._get_metadata_path(short_name, dataset_name)
+                for _, value in self._read_counter_file(file_path):
+                    yield dataset_name, short_name, value
+
+    @staticmethod
+    def _read_counter_file(file_path: str) -> Iterator[Tuple[int, int]]:
+        if not os.path.isfile(file_path):
+            return
+        with open(file_path, 'rt', encoding='ascii', errors='replace') as file:
+            for line_number, line in enumerate(file, start=1):
+                try:
+                    value: int = int(line.rstrip(FilesystemCounterHandler._trailing_char + '\n'))
+                except ValueError:
+                    # Empty (or corrupted) lines are read as zero by the FilesystemCounterHandler
+                    continue
+                if value > 0:
+                    yield line_number, value
@@ -175,7 +175,6 @@ class GraphEntity(AbstractEntity):
         self.source: str = source
         self.short_name: str = short_name
         self.g_set: GraphSet = g_set
-        self.preexisting_graph: Graph = Graph(identifier=g.identifier)
         self._merge_list: Tuple[GraphEntity] = tuple()
         # FLAGS
         self._to_be_deleted: bool = False
@@ -187,6 +186,7 @@ class GraphEntity(AbstractEntity):
             self.res = self._generate_new_res(g, count)
         else:
             self.res = res
+        self.preexisting_graph: Graph = self._new_preexisting_graph()
 
         if g_set is not None:
             # If not already done, register this GraphEntity instance inside the GraphSet
@@ -203,6 +203,8 @@ class GraphEntity(AbstractEntity):
             for p, o in preexisting_graph.predicate_objects(self.res):
                 self.g.add((self.res, p, o))
                 self.preexisting_graph.add((self.res, p, o))
+            # From now on, changes are tracked with respect to the preexisting graph
+            self._reset_changes()
         else:
             # Add mandatory information to the entity graph
             self._create_type(res_type)
@@ -213,6 +215,12 @@ class GraphEntity(AbstractEntity):
     def _generate_new_res(g: Graph, count: str) -> URIRef:
         return URIRef(str(g.identifier) + count)
 
+    def _new_preexisting_graph(self) -> Graph:
+        if self.g_set is not None:
+            return self.g_set._new_preexisting_graph(self.g.identifier, self.res)
+        else:
+            return Graph(identifier=self.g.identifier)
+
     @property
     def to_be_deleted(self) -> bool:
         return self._to_be_deleted
@@ -228,8 +236,8 @@ class GraphEntity(AbstractEntity):
     def mark_as_to_be_deleted(self) -> None:
         # Here we must REMOVE triples pointing
         # to 'self' [THIS CANNOT BE UNDONE]:
-        for res, entity in self.g_set.res_to_entity.items():
-            triples_list: List[Tuple] = list(entity.g.triples((res, None, self.res)))
+        for entity in self.g_set.get_referrers(self.res):
+            triples_list: List[Tuple] = list(entity.g.triples((entity.res, None, self.res)))
             for triple in triples_list:
                 entity.g.remove(triple)
 
@@ -250,8 +258,8 @@ class GraphEntity(AbstractEntity):
 
         # Here we must REDIRECT triples pointing
         # to 'other' to make them point to 'self':
-        for res, entity in self.g_set.res_to_entity.items():
-            triples_list: List[Tuple] = list(entity.g.triples((res, None, other.res)))
+        for entity in self.g_set.get_referrers(other.res):
+            triples_list: List[Tuple] = list(entity.g.triples((entity.res, None, other.res)))
             for triple in triples_list:
                 entity.g.remove(triple)
                 new_triple = (triple[0], triple[1], self.res)
@@ -274,12 +282,15 @@ class GraphEntity(AbstractEntity):
         other.mark_as_to_be_deleted()
 
     def commit_changes(self):
-        self.preexisting_graph = Graph(identifier=self.g.identifier)
-        if self._to_be_deleted:
-            self.remove_every_triple()
-        else:
-            for triple in self.g.triples((self.res, None, None)):
-                self.preexisting_graph.add(triple)
+        # An unchanged entity already has a preexisting graph matching its current content
+        if self._to_be_deleted or self.was_modified:
+            self.preexisting_graph = self._new_preexisting_graph()
+            if self._to_be_deleted:
+                self.remove_every_triple()
+            else:
+                for triple in self.g.triples((self.res, None, None)):
+                    self.preexisting_graph.add(triple)
+            self._reset_changes()
         self._to_be_deleted = False
         self._was_merged = False
         self._merge_list = tuple()
@@ -21,13 +21,15 @@ from SPARQLWrapper import SPARQLWrapper, RDFXML
 
 from oc_ocdm.reader import Reader
 from oc_ocdm.abstract_set import AbstractSet
+from oc_ocdm.support.entity_graph import EntityGraph, SubjectGraph
 from oc_ocdm.support.support import get_count, get_short_name
 
 if TYPE_CHECKING:
-    from typing import Dict, ClassVar, Tuple, Optional, List, Set
-    from rdflib import ConjunctiveGraph
+    from typing import Any, Dict, ClassVar, Tuple, Optional, List, Set, Iterator, Callable
+    from rdflib import ConjunctiveGraph, term
 
-from rdflib import Graph, Namespace, URIRef
+from rdflib import Graph, Namespace, URIRef, RDF
+from rdflib.plugins.stores.memory import Memory
 
 from oc_ocdm.graph.graph_entity import GraphEntity
 from oc_ocdm.counter_handler.counter_handler import CounterHandler
@@ -62,11 +64,16 @@ class GraphSet(AbstractSet):
         "rp": "in-text reference pointer"
     }
 
+    # The registry created by AbstractSet maps a URIRef with the related graph entity
+    res_to_entity: Dict[URIRef, GraphEntity]
+
     def __init__(self, base_iri: str, info_dir: str = "", supplier_prefix: str = "",
-                 wanted_label: bool = True) -> None:
+                 wanted_label: bool = True, shared_store: bool = False,
+                 counter_handler: CounterHandler = None) -> None:
         super(GraphSet, self).__init__()
-        # The following variable maps a URIRef with the related graph entity
-        self.res_to_entity: Dict[URIRef, GraphEntity] = {}
+        # The following variable maps a URIRef with the set of entities whose graph contains
+        # (or contained) at least one triple having such URIRef as object
+        self._referrers: Dict[URIRef, Set[URIRef]] = {}
         self.base_iri: str = base_iri
         self.supplier_prefix: str = supplier_prefix
         self.wanted_label: bool = wanted_label
@@ -86,15 +93,79 @@ class GraphSet(AbstractSet):
         self.g_re: str = base_iri + "re/"
         self.g_rp: str = base_iri + "rp/"
 
-        if info_dir is not None and info_dir != "":
+        # A custom counter handler (e.g. one shared among processes or backed by a database)
+        # can be provided in place of the default one, which depends on info_dir
+        if counter_handler is not None:
+            self.counter_handler: CounterHandler = counter_handler
+        elif info_dir is not None and info_dir != "":
             self.counter_handler: CounterHandler = FilesystemCounterHandler(info_dir)
         else:
             self.counter_handler: CounterHandler = InMemoryCounterHandler()
 
+        # When requested, the triples of every entity (and the ones of their preexisting graphs)
+        # get stored inside a single indexed quad store, instead of a dedicated store for each
+        # entity. In that case each entity only holds a lightweight view over its own triples.
+        self.shared_store: bool = shared_store
+        self._store: Optional[Memory] = None
+        self._preexisting_store: Optional[Memory] = None
+        if self.shared_store:
+            self._store = Memory()
+            self._preexisting_store = Memory()
+
+        # Counter values reserved in advance by add_many, which get consumed by _add
+        self._reserved_counts: Dict[str, Iterator[int]] = {}
+
     def get_entity(self, res: URIRef) -> Optional[GraphEntity]:
         if res in self.res_to_entity:
             return self.res_to_entity[res]
 
+    def get_referrers(self, res: URIRef) -> List[GraphEntity]:
+        """
+        A utility method that allows to retrieve every entity of the set whose graph
+        contains at least one triple having the given URI as object.
+
+        **NOTE: the cost of this operation is proportional to the number of referring
+        entities and not to the number of entities contained inside the set.**
+
+        :param res: The URI referred by the requested entities
+        :type res: URIRef
+        :return: The requested list of entities
+        """
+        result: List[GraphEntity] = []
+        candidates: Optional[Set[URIRef]] = self._referrers.get(res)
+        if candidates is None:
+            return result
+
+        for subj in list(candidates):
+            entity: Optional[GraphEntity] = self.res_to_entity.get(subj)
+            if entity is not None and (subj, None, res) in entity.g:
+                result.append(entity)
+            else:
+                # Stale entry: the reference was removed from the entity (or the entity
+                # from the set) after having been indexed
+                candidates.discard(subj)
+
+        if len(candidates) <= 0:
+            del self._referrers[res]
+        return result
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        # Entity graphs are pickled without the callback of the set and without the shared stores
+        # (see EntityGraph.__getstate__), hence they get attached to the set again
+        for entity in self.res_to_entity.values():
+            if self.shared_store and isinstance(entity.g, SubjectGraph):
+                entity.g = entity.g.with_store(self._store)
+            if self.shared_store and isinstance(entity.preexisting_graph, SubjectGraph):
+                entity.preexisting_graph = entity.preexisting_graph.with_store(self._preexisting_store)
+            if isinstance(entity.g, EntityGraph):
+                entity.g.on_add = self._index_triple
+
+    def _index_triple(self, triple: Tuple[term]) -> None:
+        s, p, o = triple
+        if type(o) == URIRef and p != RDF.type:
+            self._referrers.setdefault(o, set()).add(s)
+
     # Add resources related to bibliographic entities
     def add_an(self, resp_agent: str, source: str = None, res: URIRef = None,
                preexisting_graph: Graph = None) -> ReferenceAnnotation:
@@ -129,6 +200,39 @@ class GraphSet(AbstractSet):
                                       resp_agent, source, count, label, "be",
                                       preexisting_graph)
 
+    def add_many(self, short_name: str, n: int, resp_agent: str, source: str = None) -> List[GraphEntity]:
+        """
+        A utility method that creates ``n`` new entities of the same type at once, e.g.
+        ``add_many("br", 1000, resp_agent)`` is equivalent to calling ``add_br(resp_agent)``
+        a thousand times.
+
+        **NOTE: the whole range of counter values needed by the new entities is reserved with
+        a single call to the counter handler, instead of one call for each entity.**
+
+        :param short_name: The short name associated to the type of the new entities (e.g. "br")
+        :type short_name: str
+        :param n: The number of entities to be created
+        :type n: int
+        :param resp_agent: The responsible agent of the new entities
+        :type resp_agent: str
+        :param source: The primary source of the new entities
+        :type source: str, optional
+        :raises ValueError: if ``short_name`` is not a known short name.
+        :return: The list of the new entities, sorted by their counter value
+        """
+        if short_name not in self.labels:
+            raise ValueError(f"Given short_name '{short_name}' is not a known short name.")
+        if n <= 0:
+            return []
+
+        add_method: Callable[..., GraphEntity] = getattr(self, "add_" + short_name)
+        first_count: int = self.counter_handler.reserve_counter(n, short_name)
+        self._reserved_counts[short_name] = iter(range(first_count, first_count + n))
+        try:
+            return [add_method(resp_agent, source) for _ in range(n)]
+        finally:
+            del self._reserved_counts[short_name]
+
     def add_br(self, resp_agent: str, source: str = None, res: URIRef = None,
                preexisting_graph: Graph = None) -> BibliographicResource:
         if res is not None and get_short_name(res) != "br":
@@ -218,9 +322,6 @@ class GraphSet(AbstractSet):
                                   preexisting_graph)
 
     def _add(self, graph_url: str, short_name: str, res: URIRef = None) -> Tuple[Graph, Optional[str], Optional[str]]:
-        cur_g: Graph = Graph(identifier=graph_url)
-        self._set_ns(cur_g)
-
         count: Optional[str] = None
         label: Optional[str] = None
 
@@ -231,15 +332,40 @@ class GraphSet(AbstractSet):
                 res_count: int = -1
             if res_count > self.counter_handler.read_counter(short_name):
                 self.counter_handler.set_counter(res_count, short_name)
-            return cur_g, count, label
+            return self._new_graph(graph_url, res), count, label
 
-        count = self.supplier_prefix + str(self.counter_handler.increment_counter(short_name))
+        reserved_counts: Optional[Iterator[int]] = self._reserved_counts.get(short_name)
+        if reserved_counts is not None:
+            count = self.supplier_prefix + str(next(reserved_counts))
+        else:
+            count = self.supplier_prefix + str(self.counter_handler.increment_counter(short_name))
+        cur_g: Graph = self._new_graph(graph_url, URIRef(graph_url + count))
 
         if self.wanted_label:
             label = "%s %s [%s/%s]" % (self.labels[short_name], count, short_name, count)
 
         return cur_g, count, label
 
+    def _new_graph(self, graph_url: str, res: URIRef) -> Graph:
+        if self.shared_store:
+            cur_g: Graph = SubjectGraph(self._store, graph_url, res, on_add=self._index_triple,
+                                        namespace_manager=self._new_namespace_manager())
+            # The returned graph must be empty, as if it was created from scratch
+            cur_g.remove((res, None, None))
+            return cur_g
+        else:
+            return EntityGraph(identifier=graph_url, on_add=self._index_triple,
+                               namespace_manager=self._new_namespace_manager())
+
+    def _new_preexisting_graph(self, graph_url: str, res: URIRef) -> Graph:
+        if self.shared_store:
+            cur_g: Graph = SubjectGraph(self._preexisting_store, graph_url, res)
+            # The returned graph must be empty, as if it was created from scratch
+            cur_g.remove((res, None, None))
+            return cur_g
+        else:
+            return Graph(identifier=graph_url)
+
     def get_orphans(self) -> List[GraphEntity]:
         full_set_of_entities: Set[URIRef] = set(self.res_to_entity.keys())
         referenced_entities: Set[URIRef] = set()
@@ -278,6 +404,8 @@ class GraphSet(AbstractSet):
             entity.commit_changes()
             if entity.to_be_deleted:
                 del self.res_to_entity[res]
+        # Counters which are not persisted immediately (e.g. in write-back mode) are persisted now
+        self.counter_handler.flush()
 
     def _set_ns(self, g: Graph) -> None:
         g.namespace_manager.bind("an", Namespace(self.g_an))
@@ -309,89 +437,34 @@ class GraphSet(AbstractSet):
         g.namespace_manager.bind("pro", GraphEntity.PRO)
 
     def get_an(self) -> Tuple[ReferenceAnnotation]:
-        result: Tuple[ReferenceAnnotation] = tuple()
-        for ref in self.res_to_entity:
-            entity: GraphEntity = self.res_to_entity[ref]
-            if isinstance(entity, ReferenceAnnotation):
-                result += (entity, )
-        return result
+        return self.get_entities("an")
 
     def get_ar(self) -> Tuple[AgentRole]:
-        result: Tuple[AgentRole] = tuple()
-        for ref in self.res_to_entity:
-            entity: GraphEntity = self.res_to_entity[ref]
-            if isinstance(entity, AgentRole):
-                result += (entity, )
-        return result
+        return self.get_entities("ar")
 
     def get_be(self) -> Tuple[BibliographicReference]:
-        result: Tuple[BibliographicReference] = tuple()
-        for ref in self.res_to_entity:
-            entity: GraphEntity = self.res_to_entity[ref]
-            if isinstance(entity, BibliographicReference):
-                result += (entity, )
-        return result
+        return self.get_entities("be")
 
     def get_br(self) -> Tuple[BibliographicResource]:
-        result: Tuple[BibliographicResource] = tuple()
-        for ref in self.res_to_entity:
-            entity: GraphEntity = self.res_to_entity[ref]
-            if isinstance(entity, BibliographicResource):
-                result += (entity, )
-        return result
+        return self.get_entities("br")
 
     def get_ci(self) -> Tuple[Citation]:
-        result: Tuple[Citation] = tuple()
-        for ref in self.res_to_entity:
-            entity: GraphEntity = self.res_to_entity[ref]
-            if isinstance(entity, Citation):
-                result += (entity, )
-        return result
+        return self.get_entities("ci")
 
     def get_de(self) -> Tuple[DiscourseElement]:
-        result: Tuple[DiscourseElement] = tuple()
-        for ref in self.res_to_entity:
-            entity: GraphEntity = self.res_to_entity[ref]
-            if isinstance(entity, DiscourseElement):
-                result += (entity, )
-        return result
+        return self.get_entities("de")
 
     def get_id(self) -> Tuple[Identifier]:
-        result: Tuple[Identifier] = tuple()
-        for ref in self.res_to_entity:
-            entity: GraphEntity = self.res_to_entity[ref]
-            if isinstance(entity, Identifier):
-                result += (entity, )
-        return result
+        return self.get_entities("id")
 
     def get_pl(self) -> Tuple[PointerList]:
-        result: Tuple[PointerList] = tuple()
-        for ref in self.res_to_entity:
-            entity: GraphEntity = self.res_to_entity[ref]
-            if isinstance(entity, PointerList):
-                result += (entity, )
-        return result
+        return self.get_entities("pl")
 
     def get_rp(self) -> Tuple[ReferencePointer]:
-        result: Tuple[ReferencePointer] = tuple()
-        for ref in self.res_to_entity:
-            entity: GraphEntity = self.res_to_entity[ref]
-            if isinstance(entity, ReferencePointer):
-                result += (entity, )
-        return result
+        return self.get_entities("rp")
 
     def get_ra(self) -> Tuple[ResponsibleAgent]:
-        result: Tuple[ResponsibleAgent] = tuple()
-        for ref in self.res_to_entity:
-            entity: GraphEntity = self.res_to_entity[ref]
-            if isinstance(entity, ResponsibleAgent):
-                result += (entity, )
-        return result
+        return self.get_entities("ra")
 
     def get_re(self) -> Tuple[ResourceEmbodiment]:
-        result: Tuple[ResourceEmbodiment] = tuple()
-        for ref in self.res_to_entity:
-            entity: GraphEntity = self.res_to_entity[ref]
-            if isinstance(entity, ResourceEmbodiment):
-                result += (entity, )
-        return result
+        return self.get_entities("re")
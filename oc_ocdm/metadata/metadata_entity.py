@@ -96,6 +96,8 @@ class MetadataEntity(AbstractEntity):
             for p, o in preexisting_graph.predicate_objects(self.res):
                 self.g.add((self.res, p, o))
                 self.preexisting_graph.add((self.res, p, o))
+            # From now on, changes are tracked with respect to the preexisting graph
+            self._reset_changes()
         else:
             # Add mandatory information to the entity graph
             self._create_type(res_type)
@@ -170,12 +172,15 @@ class MetadataEntity(AbstractEntity):
         other.mark_as_to_be_deleted()
 
     def commit_changes(self):
-        self.preexisting_graph = Graph(identifier=self.g.identifier)
-        if self._to_be_deleted:
-            self.remove_every_triple()
-        else:
-            for triple in self.g.triples((self.res, None, None)):
-                self.preexisting_graph.add(triple)
+        # An unchanged entity already has a preexisting graph matching its current content
+        if self._to_be_deleted or self.was_modified:
+            self.preexisting_graph = Graph(identifier=self.g.identifier)
+            if self._to_be_deleted:
+                self.remove_every_triple()
+            else:
+                for triple in self.g.triples((self.res, None, None)):
+                    self.preexisting_graph.add(triple)
+            self._reset_changes()
         self._to_be_deleted = False
         self._was_merged = False
         self._merge_list = tuple()
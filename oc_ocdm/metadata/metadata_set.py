@@ -22,6 +22,7 @@ from oc_ocdm.counter_handler.filesystem_counter_handler import FilesystemCounter
 from oc_ocdm.counter_handler.in_memory_counter_handler import InMemoryCounterHandler
 from oc_ocdm.metadata.entities.dataset import Dataset
 from oc_ocdm.metadata.entities.distribution import Distribution
+from oc_ocdm.support.entity_graph import EntityGraph
 from oc_ocdm.support.support import get_count, is_dataset, get_short_name
 
 if TYPE_CHECKING:
@@ -40,16 +41,22 @@ class MetadataSet(AbstractSet):
         "di": "distribution"
     }
 
-    def __init__(self, base_iri: str, info_dir: str = "", wanted_label: bool = True) -> None:
+    # The registry created by AbstractSet maps a URIRef with the related metadata entity
+    res_to_entity: Dict[URIRef, MetadataEntity]
+
+    def __init__(self, base_iri: str, info_dir: str = "", wanted_label: bool = True,
+                 counter_handler: CounterHandler = None) -> None:
         super(MetadataSet, self).__init__()
-        # The following variable maps a URIRef with the related metadata entity
-        self.res_to_entity: Dict[URIRef, MetadataEntity] = {}
         self.base_iri: str = base_iri
         if self.base_iri[-1] != '/':
             self.base_iri += '/'
         self.wanted_label: bool = wanted_label
 
-        if info_dir is not None and info_dir != "":
+        # A custom counter handler (e.g. one shared among processes or backed by a database)
+        # can be provided in place of the default one, which depends on info_dir
+        if counter_handler is not None:
+            self.counter_handler: CounterHandler = counter_handler
+        elif info_dir is not None and info_dir != "":
             self.counter_handler: CounterHandler = FilesystemCounterHandler(info_dir)
         else:
             self.counter_handler: CounterHandler = InMemoryCounterHandler()
@@ -85,8 +92,7 @@ class MetadataSet(AbstractSet):
 
     def _add_metadata(self, short_name: str, dataset_name: str,
                       res: URIRef = None) -> Tuple[Graph, Optional[str], Optional[str]]:
-        cur_g: Graph = Graph()
-        self._set_ns(cur_g)
+        cur_g: Graph = EntityGraph(namespace_manager=self._new_namespace_manager())
 
         count: Optional[str] = None
         label: Optional[str] = None
@@ -114,6 +120,8 @@ class MetadataSet(AbstractSet):
             entity.commit_changes()
             if entity.to_be_deleted:
                 del self.res_to_entity[res]
+        # Counters which are not persisted immediately (e.g. in write-back mode) are persisted now
+        self.counter_handler.flush()
 
     @staticmethod
     def _set_ns(g: Graph) -> None:
@@ -122,17 +130,7 @@ class MetadataSet(AbstractSet):
         g.namespace_manager.bind("void", MetadataEntity.VOID)
 
     def get_dataset(self) -> Tuple[Dataset]:
-        result: Tuple[Dataset] = tuple()
-        for ref in self.res_to_entity:
-            entity: MetadataEntity = self.res_to_entity[ref]
-            if isinstance(entity, Dataset):
-                result += (entity, )
-        return result
+        return self.get_entities("_dataset_")
 
     def get_di(self) -> Tuple[Distribution]:
-        result: Tuple[Distribution] = tuple()
-        for ref in self.res_to_entity:
-            entity: MetadataEntity = self.res_to_entity[ref]
-            if isinstance(entity, Distribution):
-                result += (entity, )
-        return result
+        return self.get_entities("di")
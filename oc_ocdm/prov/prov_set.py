@@ -23,7 +23,7 @@ from oc_ocdm.prov.entities.snapshot_entity import SnapshotEntity
 from oc_ocdm.support.query_utils import get_update_query
 
 if TYPE_CHECKING:
-    from typing import Optional, Tuple, List, Dict, ClassVar
+    from typing import Optional, Tuple, List, Dict, Set, ClassVar
     from oc_ocdm.graph.graph_entity import GraphEntity
 
 from rdflib import Graph, URIRef
@@ -42,20 +42,31 @@ class ProvSet(AbstractSet):
         "se": "snapshot of entity metadata"
     }
 
+    # The registry created by AbstractSet maps a URIRef with the related provenance entity
+    res_to_entity: Dict[URIRef, ProvEntity]
+
     def __init__(self, prov_subj_graph_set: GraphSet, base_iri: str, info_dir: str = "",
-                 wanted_label: bool = True) -> None:
+                 wanted_label: bool = True, counter_handler: CounterHandler = None) -> None:
         super(ProvSet, self).__init__()
         self.prov_g: GraphSet = prov_subj_graph_set
-        # The following variable maps a URIRef with the related provenance entity
-        self.res_to_entity: Dict[URIRef, ProvEntity] = {}
         self.base_iri: str = base_iri
         self.wanted_label: bool = wanted_label
 
-        if info_dir is not None and info_dir != "":
+        # A custom counter handler (e.g. one shared among processes or backed by a database)
+        # can be provided in place of the default one, which depends on info_dir
+        if counter_handler is not None:
+            self.counter_handler: CounterHandler = counter_handler
+        elif info_dir is not None and info_dir != "":
             self.counter_handler: CounterHandler = FilesystemCounterHandler(info_dir)
         else:
             self.counter_handler: CounterHandler = InMemoryCounterHandler()
 
+        # While generating provenance, snapshot counters are read and written in bulk through this cache
+        self._snapshot_counters: Optional[Dict[Tuple[str, int], int]] = None
+        self._changed_snapshot_counters: Set[Tuple[str, int]] = set()
+        # The snapshot counter values reserved in advance on a shared counter handler
+        self._reserved_snapshot_counters: Dict[Tuple[str, int], int] = {}
+
     def get_entity(self, res: URIRef) -> Optional[ProvEntity]:
         if res in self.res_to_entity:
             return self.res_to_entity[res]
@@ -102,11 +113,33 @@ class ProvSet(AbstractSet):
         return merge_description
 
     def generate_provenance(self, c_time: float = None) -> None:
+        """
+        It generates the snapshots of every graph entity which was created, modified, merged or deleted.
+
+        The snapshot counters are read in bulk beforehand and, unless the counter handler is shared with
+        other handlers, they are written back in bulk afterwards. Otherwise, every new snapshot counter value
+        is reserved in advance with a single atomic increment per counter file, so that concurrent handlers
+        never mint the same snapshot.
+
+        :param c_time: The generation time of the snapshots, as a POSIX timestamp (defaults to now)
+        :type c_time: float
+        :return: None
+        """
         if c_time is None:
             cur_time: str = datetime.now(tz=timezone.utc).replace(microsecond=0).isoformat(sep="T")
         else:
             cur_time: str = datetime.fromtimestamp(c_time, tz=timezone.utc).replace(microsecond=0).isoformat(sep="T")
 
+        self._prefetch_snapshot_counters()
+        try:
+            if self.counter_handler.shared:
+                self._reserve_snapshot_counters()
+            self._generate_snapshots(cur_time)
+        finally:
+            self._store_snapshot_counters()
+            self.counter_handler.flush()
+
+    def _generate_snapshots(self, cur_time: str) -> None:
         # MERGED ENTITIES
         for cur_subj in self.prov_g.res_to_entity.values():
             if cur_subj is None or (not cur_subj.was_merged or cur_subj.to_be_deleted):
@@ -150,6 +183,9 @@ class ProvSet(AbstractSet):
                 # Here we must skip every entity which was merged while not being marked as to be deleted,
                 # since we already processed those entities in the previous loop.
                 continue
+            elif self._is_unchanged(cur_subj):
+                # Nothing to be done, without even looking at the triples of the entity
+                continue
 
             last_snapshot_res: Optional[URIRef] = self._retrieve_last_snapshot(cur_subj.res)
             if last_snapshot_res is None:
@@ -186,8 +222,7 @@ class ProvSet(AbstractSet):
 
     def _add_prov(self, graph_url: str, short_name: str, prov_subject: GraphEntity,
                   res: URIRef = None) -> Tuple[Graph, Optional[str], Optional[str]]:
-        cur_g: Graph = Graph(identifier=graph_url)
-        self._set_ns(cur_g)
+        cur_g: Graph = Graph(identifier=graph_url, namespace_manager=self._new_namespace_manager())
 
         count: Optional[str] = None
         label: Optional[str] = None
@@ -197,14 +232,11 @@ class ProvSet(AbstractSet):
                 res_count: int = int(get_count(res))
             except ValueError:
                 res_count: int = -1
-            if res_count > self.counter_handler.read_counter(prov_subject.short_name, "se",
-                                                             int(get_count(prov_subject.res))):
-                self.counter_handler.set_counter(res_count, prov_subject.short_name, "se",
-                                                 int(get_count(prov_subject.res)))
+            if res_count > self._read_snapshot_counter(prov_subject.short_name, int(get_count(prov_subject.res))):
+                self._set_snapshot_counter(res_count, prov_subject.short_name, int(get_count(prov_subject.res)))
             return cur_g, count, label
 
-        count = str(self.counter_handler.increment_counter(
-            prov_subject.short_name, "se", int(get_count(prov_subject.res))))
+        count = str(self._increment_snapshot_counter(prov_subject.short_name, int(get_count(prov_subject.res))))
 
         if self.wanted_label:
             cur_short_name = prov_subject.short_name
@@ -234,16 +266,115 @@ class ProvSet(AbstractSet):
         except ValueError:
             raise ValueError('prov_subject is not a valid URIRef. Unable to extract the count value!')
 
-        last_snapshot_count: str = str(self.counter_handler.read_counter(subj_short_name, "se", int(subj_count)))
+        last_snapshot_count: str = str(self._read_snapshot_counter(subj_short_name, int(subj_count)))
         if int(last_snapshot_count) <= 0:
             return None
         else:
             return URIRef(str(prov_subject) + '/prov/se/' + last_snapshot_count)
 
+    def _is_unchanged(self, cur_subj: GraphEntity) -> bool:
+        # An entity that already has a snapshot doesn't need a new one, unless it was modified,
+        # merged or deleted since it was imported (or since its changes were last committed)
+        if cur_subj.to_be_deleted or cur_subj.was_merged or cur_subj.was_modified:
+            return False
+        try:
+            identifier: int = int(get_count(cur_subj.res))
+        except ValueError:
+            return False
+        return self._read_snapshot_counter(cur_subj.short_name, identifier) > 0
+
+    def _prefetch_snapshot_counters(self) -> None:
+        # The snapshot counters of every entity which could need them are read with one sweep per counter file
+        identifiers: Dict[str, Set[int]] = {}
+        for cur_subj in self.prov_g.res_to_entity.values():
+            if cur_subj is None:
+                continue
+            for entity in (cur_subj, *cur_subj.merge_list):
+                try:
+                    identifiers.setdefault(entity.short_name, set()).add(int(get_count(entity.res)))
+                except ValueError:
+                    continue  # It will be reported by _retrieve_last_snapshot
+
+        self._snapshot_counters = {}
+        self._changed_snapshot_counters = set()
+        for short_name, short_name_identifiers in identifiers.items():
+            values: Dict[int, int] = self.counter_handler.read_counters(short_name, "se", short_name_identifiers)
+            for identifier, value in values.items():
+                self._snapshot_counters[(short_name, identifier)] = value
+
+    def _reserve_snapshot_counters(self) -> None:
+        # Each entity gets at most one new snapshot, under the same conditions checked by _generate_snapshots
+        increments: Dict[str, Dict[int, int]] = {}
+        for cur_subj in self.prov_g.res_to_entity.values():
+            if cur_subj is not None and self._needs_snapshot(cur_subj):
+                increments.setdefault(cur_subj.short_name, {})[int(get_count(cur_subj.res))] = 1
+
+        for short_name, short_name_increments in increments.items():
+            values: Dict[int, int] = self.counter_handler.increment_counters(short_name_increments, short_name, "se")
+            for identifier, value in values.items():
+                self._reserved_snapshot_counters[(short_name, identifier)] = value
+
+    def _needs_snapshot(self, cur_subj: GraphEntity) -> bool:
+        if cur_subj.was_merged and not cur_subj.to_be_deleted:
+            if self._retrieve_last_snapshot(cur_subj.res) is None:
+                return True
+            for entity in cur_subj.merge_list:
+                if self._retrieve_last_snapshot(entity.res) is not None:
+                    return True
+            return get_update_query(cur_subj, entity_type="graph")[0] != ""
+        elif self._is_unchanged(cur_subj):
+            return False
+        elif self._retrieve_last_snapshot(cur_subj.res) is None:
+            return not cur_subj.to_be_deleted
+        return cur_subj.to_be_deleted or get_update_query(cur_subj, entity_type="graph")[0] != ""
+
+    def _store_snapshot_counters(self) -> None:
+        new_values: Dict[str, Dict[int, int]] = {}
+        for short_name, identifier in self._changed_snapshot_counters:
+            new_values.setdefault(short_name, {})[identifier] = self._snapshot_counters[(short_name, identifier)]
+
+        self._snapshot_counters = None
+        self._changed_snapshot_counters = set()
+        self._reserved_snapshot_counters = {}
+        for short_name, short_name_values in new_values.items():
+            self.counter_handler.set_counters(short_name_values, short_name, "se")
+
+    def _read_snapshot_counter(self, short_name: str, identifier: int) -> int:
+        if self._snapshot_counters is None:
+            return self.counter_handler.read_counter(short_name, "se", identifier)
+
+        key: Tuple[str, int] = (short_name, identifier)
+        if key not in self._snapshot_counters:
+            self._snapshot_counters[key] = self.counter_handler.read_counter(short_name, "se", identifier)
+        return self._snapshot_counters[key]
+
+    def _set_snapshot_counter(self, new_value: int, short_name: str, identifier: int) -> None:
+        if self._snapshot_counters is None:
+            return self.counter_handler.set_counter(new_value, short_name, "se", identifier)
+
+        key: Tuple[str, int] = (short_name, identifier)
+        self._snapshot_counters[key] = new_value
+        if self.counter_handler.shared:
+            # Other handlers could advance the counter in the meantime, hence it can't be written back later
+            self.counter_handler.set_counter(new_value, short_name, "se", identifier)
+        else:
+            self._changed_snapshot_counters.add(key)
+
+    def _increment_snapshot_counter(self, short_name: str, identifier: int) -> int:
+        if self._snapshot_counters is None:
+            return self.counter_handler.increment_counter(short_name, "se", identifier)
+
+        key: Tuple[str, int] = (short_name, identifier)
+        if self.counter_handler.shared:
+            new_value: int = self._reserved_snapshot_counters.pop(key, None)
+            if new_value is None:
+                new_value = self.counter_handler.increment_counter(short_name, "se", identifier)
+            self._snapshot_counters[key] = new_value
+            return new_value
+
+        new_value: int = self._read_snapshot_counter(short_name, identifier) + 1
+        self._set_snapshot_counter(new_value, short_name, identifier)
+        return new_value
+
     def get_se(self) -> Tuple[SnapshotEntity]:
-        result: Tuple[SnapshotEntity] = tuple()
-        for ref in self.res_to_entity:
-            entity: ProvEntity = self.res_to_entity[ref]
-            if isinstance(entity, SnapshotEntity):
-                result += (entity, )
-        return result
+        return self.get_entities("se")
@@ -17,23 +17,45 @@ from __future__ import annotations
 
 import json
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from importlib import resources
+from io import BufferedReader, DEFAULT_BUFFER_SIZE
 from zipfile import ZipFile
 
 from filelock import FileLock
-from SPARQLWrapper import SPARQLWrapper, RDFXML
 from pyshex import ShExEvaluator
 from rdflib import RDF, Namespace, ConjunctiveGraph, Graph
 from typing import TYPE_CHECKING
 
 from oc_ocdm.graph.graph_entity import GraphEntity
 from oc_ocdm.support.reporter import Reporter
+from oc_ocdm.support.sparql_session import SparqlSession
 
 if TYPE_CHECKING:
-    from typing import List, Set, Dict, Any, Optional
+    from typing import List, Set, Dict, Any, Optional, Iterable
     from rdflib import URIRef, term
     from oc_ocdm.graph.graph_set import GraphSet
 
+# The supported formats, in the order they're tried when the format of a file can't be guessed
+supported_formats: List[str] = ["json-ld", "rdfxml", "turtle", "trig", "nt11", "nquads"]
+extension_to_format: Dict[str, str] = {
+    '.json': "json-ld",
+    '.jsonld': "json-ld",
+    '.rdf': "rdfxml",
+    '.xml': "rdfxml",
+    '.owl': "rdfxml",
+    '.ttl': "turtle",
+    '.trig': "trig",
+    '.nt': "nt11",
+    '.nq': "nquads"
+}
+# The number of bytes read from the beginning of a file in order to guess its format
+sniffing_size: int = 8192
+# A term of an N-Triples/N-Quads statement: an IRI, a blank node or a literal
+nt_term_regex = re.compile(r'<[^>]*>|_:\S+|"(?:[^"\\]|\\.)*"(?:@[A-Za-z0-9-]+|\^\^<[^>]*>)?')
+
 
 class Reader(object):
 
@@ -60,7 +82,19 @@ class Reader(object):
         else:
             self.reperr: Reporter = reperr
 
-    def load(self, rdf_file_path: str) -> Optional[ConjunctiveGraph]:
+    def load(self, rdf_file_path: str, format: str = None) -> Optional[ConjunctiveGraph]:
+        """
+        It loads the content of an RDF file, which can also be contained inside a ZIP archive.
+
+        Unless it's explicitly specified, the format of the file is guessed from its first bytes
+        and from its extension (or, for ZIP archives, the extension of the contained file).
+
+        :param rdf_file_path: The path of the file to be loaded
+        :type rdf_file_path: str
+        :param format: The ``rdflib`` format of the file (only this format will be used to parse it)
+        :type format: str, optional
+        :return: The loaded graph, or None if it was impossible to load it
+        """
         self.repok.new_article()
         self.reperr.new_article()
 
@@ -68,7 +102,7 @@ class Reader(object):
         if os.path.isfile(rdf_file_path):
 
             try:
-                loaded_graph = self._load_graph(rdf_file_path)
+                loaded_graph = self._load_graph(rdf_file_path, format)
             except Exception as e:
                 self.reperr.add_sentence("[1] "
                                          "It was impossible to handle the format used for "
@@ -80,47 +114,100 @@ class Reader(object):
 
         return loaded_graph
 
-    def _load_graph(self, file_path: str) -> ConjunctiveGraph:
-        formats: List[str] = ["json-ld", "rdfxml", "turtle", "trig", "nt11", "nquads"]
-
-        loaded_graph: ConjunctiveGraph = ConjunctiveGraph()
-
+    def _load_graph(self, file_path: str, format: str = None) -> ConjunctiveGraph:
         errors: str = ""
-        for cur_format in formats:
-            try:
-                lock = FileLock(f"{file_path}.lock")
-                with lock:
-                    if file_path.endswith('.zip'):
-                        with ZipFile(file=file_path, mode="r") as archive:
-                            for zf_name in archive.namelist():
-                                f = archive.open(zf_name)
-                    else:
-                        f = open(file_path, 'rt', encoding='utf-8')
-                    if cur_format == "json-ld":
-                        json_ld_file: Any = json.load(f)
-                        if isinstance(json_ld_file, dict):
-                            json_ld_file: List[Any] = [json_ld_file]
-
-                        for json_ld_resource in json_ld_file:
-                            # Trick to force the use of a pre-loaded context if the format
-                            # specified is JSON-LD
-                            if "@context" in json_ld_resource:
-                                cur_context: str = json_ld_resource["@context"]
-                                if cur_context in self.context_map:
-                                    context_json: Any = self.context_map[cur_context]["@context"]
-                                    json_ld_resource["@context"] = context_json
-
-                            loaded_graph.parse(data=json.dumps(json_ld_resource, ensure_ascii=False),
-                                            format=cur_format)
-                    else:
-                        loaded_graph.parse(file=f, format=cur_format)
-                    f.close()
-                return loaded_graph
-            except Exception as e:
-                errors += f" | {e}"  # Try another format
+        lock = FileLock(f"{file_path}.lock")
+        with lock:
+            if format is not None:
+                formats: List[str] = [format]
+            else:
+                with self._open_rdf_file(file_path) as f:
+                    guessed_format: Optional[str] = self._guess_format(f.name, f.peek(sniffing_size))
+                # The guessed format (if any) is tried first: if it is wrong, the other
+                # supported formats are tried in turn, as when the format can't be guessed
+                formats: List[str] = supported_formats
+                if guessed_format is not None:
+                    formats = [guessed_format] + [cur_format for cur_format in supported_formats
+                                                  if cur_format != guessed_format]
+
+            for cur_format in formats:
+                # A failed attempt could leave behind some of the triples it parsed:
+                # every format must be tried on a brand-new graph
+                loaded_graph: ConjunctiveGraph = ConjunctiveGraph()
+                try:
+                    with self._open_rdf_file(file_path) as f:
+                        if cur_format == "json-ld":
+                            json_ld_file: Any = json.load(f)
+                            if isinstance(json_ld_file, dict):
+                                json_ld_file: List[Any] = [json_ld_file]
+
+                            for json_ld_resource in json_ld_file:
+                                # Trick to force the use of a pre-loaded context if the format
+                                # specified is JSON-LD
+                                if "@context" in json_ld_resource:
+                                    cur_context: str = json_ld_resource["@context"]
+                                    if cur_context in self.context_map:
+                                        context_json: Any = self.context_map[cur_context]["@context"]
+                                        json_ld_resource["@context"] = context_json
+
+                                loaded_graph.parse(data=json.dumps(json_ld_resource, ensure_ascii=False),
+                                                   format=cur_format)
+                        else:
+                            loaded_graph.parse(file=f, format=cur_format)
+                    return loaded_graph
+                except Exception as e:
+                    errors += f" | {e}"  # Try another format
 
         raise IOError("1", f"It was impossible to handle the format used for storing the file '{file_path}'{errors}")
 
+    @staticmethod
+    def _open_rdf_file(file_path: str) -> BufferedReader:
+        if file_path.endswith('.zip'):
+            with ZipFile(file=file_path, mode="r") as archive:
+                # As it always happened, the last file inside the archive is the one that gets loaded
+                zf_name: str = archive.namelist()[-1]
+                return BufferedReader(archive.open(zf_name), buffer_size=sniffing_size)
+        else:
+            return open(file_path, 'rb', buffering=max(DEFAULT_BUFFER_SIZE, sniffing_size))
+
+    @staticmethod
+    def _guess_format(file_name: str, head: bytes) -> Optional[str]:
+        """
+        It guesses the format of an RDF document given its name and its first bytes. N-Triples
+        and N-Quads documents are recognized from their first statement, since the extension of
+        the files written by the ``Storer`` doesn't tell them apart.
+
+        :param file_name: The name of the file that contains the document
+        :type file_name: str
+        :param head: The first bytes of the document
+        :type head: bytes
+        :return: The guessed ``rdflib`` format, or None if it couldn't be guessed
+        """
+        text: str = head.decode('utf-8', errors='ignore').lstrip('\ufeff \t\r\n')
+        if text.startswith('{') or text.startswith('['):
+            return "json-ld"
+        if text.startswith('<?xml') or text.startswith('<!DOCTYPE') or text.startswith('<rdf:RDF'):
+            return "rdfxml"
+
+        lines: List[str] = text.split('\n')
+        if len(head) >= sniffing_size:
+            # Only complete lines can be used to tell N-Triples and N-Quads apart
+            lines = lines[:-1]
+        for line in lines:
+            line = line.strip()
+            if line == "" or line.startswith('#'):
+                continue
+            if line.endswith('.'):
+                terms: List[str] = nt_term_regex.findall(line)
+                if "".join(terms).replace(" ", "") == line[:-1].replace(" ", ""):
+                    if len(terms) == 3:
+                        return "nt11"
+                    elif len(terms) == 4:
+                        return "nquads"
+            break
+
+        return extension_to_format.get(os.path.splitext(file_name)[1].lower())
+
     @staticmethod
     def get_graph_from_subject(graph: Graph, subject: URIRef) -> Graph:
         g: Graph = Graph(identifier=graph.identifier)
@@ -273,17 +360,59 @@ class Reader(object):
     @staticmethod
     def import_entity_from_triplestore(g_set: GraphSet, ts_url: str, res: URIRef, resp_agent: str,
                                        enable_validation: bool = False) -> GraphEntity:
-        sparql: SPARQLWrapper = SPARQLWrapper(ts_url)
-        query: str = f"CONSTRUCT {{<{res}> ?p ?o}} WHERE {{<{res}> ?p ?o}}"
-        sparql.setQuery(query)
-        sparql.setMethod('GET')
-        sparql.setReturnFormat(RDFXML)
-
-        result: ConjunctiveGraph = sparql.query().convert()
-        if result is not None:
-            imported_entities: List[GraphEntity] = Reader.import_entities_from_graph(g_set, result,
-                                                                                     resp_agent, enable_validation)
-            if len(imported_entities) <= 0:
-                raise ValueError("The requested entity was not found or was not recognized as a proper OCDM entity.")
-            else:
-                return imported_entities[0]
\ No newline at end of file
+        imported_entities: List[GraphEntity] = Reader.import_entities_from_triplestore(
+            g_set, ts_url, [res], resp_agent, enable_validation, workers=1)
+        if len(imported_entities) <= 0:
+            raise ValueError("The requested entity was not found or was not recognized as a proper OCDM entity.")
+        else:
+            return imported_entities[0]
+
+    @staticmethod
+    def import_entities_from_triplestore(g_set: GraphSet, ts_url: str, entities: Iterable[URIRef], resp_agent: str,
+                                         enable_validation: bool = False, batch_size: int = 1000,
+                                         workers: int = 4) -> List[GraphEntity]:
+        """
+        It imports many entities from a triplestore at once. The IRIs of the entities are split
+        into batches of ``batch_size`` elements, each of them being fetched through a single
+        CONSTRUCT query (which lists the IRIs inside a VALUES clause). Up to ``workers`` queries
+        are run concurrently, each thread reusing its own persistent connection to the endpoint,
+        and all the results are imported into ``g_set`` in one pass.
+
+        :param g_set: The ``GraphSet`` which the entities will be imported into
+        :type g_set: GraphSet
+        :param ts_url: The URL of the SPARQL endpoint of the triplestore
+        :type ts_url: str
+        :param entities: The IRIs of the entities to be imported
+        :type entities: Iterable[URIRef]
+        :param resp_agent: The responsible agent of the imported entities
+        :type resp_agent: str
+        :param enable_validation: If True, the results are validated before being imported
+        :type enable_validation: bool
+        :param batch_size: The maximum number of IRIs requested by each query
+        :type batch_size: int
+        :param workers: The maximum number of queries which are run concurrently
+        :type workers: int
+        :raises ValueError: if ``batch_size`` or ``workers`` are not positive.
+        :raises SparqlHTTPError: if the triplestore answers any query with an HTTP error status.
+        :return: The imported entities (the ones which were not found or not recognized as proper
+          OCDM entities are ignored)
+        """
+        if batch_size <= 0:
+            raise ValueError("batch_size must be a positive non-zero integer number!")
+        if workers <= 0:
+            raise ValueError("workers must be a positive non-zero integer number!")
+
+        entities: List[URIRef] = list(dict.fromkeys(entities))
+        batches: List[List[URIRef]] = [entities[i:i + batch_size] for i in range(0, len(entities), batch_size)]
+        graph: Graph = Graph()
+        with SparqlSession(ts_url) as session, ThreadPoolExecutor(max_workers=workers) as executor:
+            for result in executor.map(partial(Reader._construct_batch, session), batches):
+                graph += result
+
+        return Reader.import_entities_from_graph(g_set, graph, resp_agent, enable_validation)
+
+    @staticmethod
+    def _construct_batch(session: SparqlSession, batch: List[URIRef]) -> Graph:
+        values: str = " ".join(f"<{res}>" for res in batch)
+        query: str = f"CONSTRUCT {{ ?s ?p ?o }} WHERE {{ VALUES ?s {{ {values} }} ?s ?p ?o }}"
+        return session.construct(query)
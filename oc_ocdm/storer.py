@@ -16,9 +16,16 @@
 from __future__ import annotations
 from filelock import FileLock
 
+import copy
 import os
 import json
-from datetime import datetime
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from http.client import HTTPException
+from threading import BoundedSemaphore, Lock
+from time import sleep
+from urllib.parse import quote_plus, urlencode
 from rdflib import ConjunctiveGraph
 from SPARQLWrapper import SPARQLWrapper
 from typing import TYPE_CHECKING
@@ -28,18 +35,59 @@ from oc_ocdm.prov.prov_entity import ProvEntity
 from oc_ocdm.graph.graph_entity import GraphEntity
 from oc_ocdm.metadata.metadata_entity import MetadataEntity
 from oc_ocdm.reader import Reader
-from oc_ocdm.support.query_utils import get_update_query
+from oc_ocdm.support.query_utils import get_insert_data, get_update_query
+from oc_ocdm.support.nt_writer import nt_line, write_nt, write_nq, iter_quads
 from oc_ocdm.support.support import find_paths
 from oc_ocdm.support.reporter import Reporter
+from oc_ocdm.support.sparql_session import SparqlHTTPError, SparqlSession
+from oc_ocdm.support.upload_journal import UploadJournal
 
 if TYPE_CHECKING:
-    from typing import Dict, List, Tuple, Any, Optional, Set
+    from typing import Dict, List, Tuple, Any, Optional, Set, IO, Iterable, Iterator, Deque, Callable
     from rdflib import URIRef
     from oc_ocdm.abstract_entity import AbstractEntity
     from oc_ocdm.abstract_set import AbstractSet
 
 
+nquads_formats: Set[str] = {'application/n-quads', 'nquads'}
+# HTTP status codes denoting failures which may not happen again if the request is retried
+transient_http_statuses: Set[int] = {408, 429, 500, 502, 503, 504}
+
+
+class _UploadBudget(object):
+    """
+    The limits applied to the batches of update queries sent by :meth:`Storer.upload_all`.
+
+    Every limit is scaled by the same factor, which is halved each time the triplestore rejects
+    a batch because it is too large and grows again by a tenth after each accepted batch,
+    so that the size of the batches follows the one the triplestore can handle.
+    """
+
+    def __init__(self, max_queries: int, max_triples: Optional[int] = None, max_bytes: Optional[int] = None) -> None:
+        self.max_queries: int = max_queries
+        self.max_triples: Optional[int] = max_triples
+        self.max_bytes: Optional[int] = max_bytes
+        self.scale: float = 1.0
+        self._lock: Lock = Lock()
+
+    def _limit(self, limit: Optional[int]) -> Optional[int]:
+        return None if limit is None else max(1, int(limit * self.scale))
+
+    def limits(self) -> Tuple[int, Optional[int], Optional[int]]:
+        with self._lock:
+            return self._limit(self.max_queries), self._limit(self.max_triples), self._limit(self.max_bytes)
+
+    def shrink(self) -> None:
+        with self._lock:
+            self.scale = max(self.scale / 2, 1e-9)
+
+    def grow(self) -> None:
+        with self._lock:
+            self.scale = min(self.scale * 1.1, 1.0)
+
+
 class Storer(object):
+    _upload_journal_name: str = "upload.journal"
 
     def __init__(self, abstract_set: AbstractSet, repok: Reporter = None, reperr: Reporter = None,
                  context_map: Dict[str, Any] = None, default_dir: str = "_", dir_split: int = 0,
@@ -91,22 +139,12 @@ class Storer(object):
 
         cg: ConjunctiveGraph = ConjunctiveGraph()
         for g in self.a_set.graphs():
-            cg.addN([item + (g.identifier,) for item in list(g)])
+            cg.addN((s, p, o, g.identifier) for s, p, o in g)
 
         self._store_in_file(cg, file_path, context_path)
 
     def _store_in_file(self, cur_g: ConjunctiveGraph, cur_file_path: str, context_path: str = None) -> None:
-        # Note: the following lines from here and until 'cur_json_ld' are a sort of hack for including all
-        # the triples of the input graph into the final stored file. Somehow, some of them are not written
-        # in such file otherwise - in particular the provenance ones.
-        new_g: ConjunctiveGraph = ConjunctiveGraph()
-        for s, p, o in cur_g.triples((None, None, None)):
-            g_iri: Optional[URIRef] = None
-            for g_context in cur_g.contexts((s, p, o)):
-                g_iri = g_context.identifier
-                break
-
-            new_g.addN([(s, p, o, g_iri)])
+        # The graph is serialized as it is: no intermediate copy of its quads is made
         zip_file_path = cur_file_path.replace(os.path.splitext(cur_file_path)[1], ".zip")
         lock = FileLock(f"{zip_file_path}.lock") if self.zip_output else FileLock(f"{cur_file_path}.lock")
         with lock:
@@ -115,31 +153,63 @@ class Storer(object):
             if self.output_format == "json-ld":
                 if context_path is not None and context_path in self.context_map:
                     cur_json_ld: Any = json.loads(
-                        new_g.serialize(format="json-ld", context=self.context_map[context_path]))
+                        cur_g.serialize(format="json-ld", context=self.context_map[context_path]))
                     if isinstance(cur_json_ld, dict):
                         cur_json_ld["@context"] = context_path
                     else:  # it is a list
                         for item in cur_json_ld:
                             item["@context"] = context_path
                 else:
-                    cur_json_ld: Any = json.loads(new_g.serialize(format="json-ld"))
-                    if self.zip_output:
-                        dumped_json: bytes = json.dumps(cur_json_ld, ensure_ascii=False).encode('utf-8')
-                        zip_file.writestr(zinfo_or_arcname=os.path.basename(cur_file_path), data=dumped_json)
-                    else:
-                        with open(cur_file_path, 'wt', encoding='utf-8') as f:
-                            json.dump(cur_json_ld, f, ensure_ascii=False)
+                    cur_json_ld: Any = json.loads(cur_g.serialize(format="json-ld"))
+                if self.zip_output:
+                    dumped_json: bytes = json.dumps(cur_json_ld, ensure_ascii=False).encode('utf-8')
+                    zip_file.writestr(zinfo_or_arcname=os.path.basename(cur_file_path), data=dumped_json)
+                else:
+                    with open(cur_file_path, 'wt', encoding='utf-8') as f:
+                        json.dump(cur_json_ld, f, ensure_ascii=False)
             else:
                 if self.zip_output:
-                    rdf_serialization: bytes = new_g.serialize(destination=None, format=self.output_format, encoding="utf-8")
-                    zip_file.writestr(zinfo_or_arcname=os.path.basename(cur_file_path), data=rdf_serialization)
+                    with zip_file.open(os.path.basename(cur_file_path), mode="w", force_zip64=True) as f:
+                        self._write_lines(cur_g, f)
                 else:
-                    new_g.serialize(destination=cur_file_path, format=self.output_format, encoding="utf-8")
+                    with open(cur_file_path, 'wb') as f:
+                        self._write_lines(cur_g, f)
             if self.zip_output:
                 zip_file.close()
         self.repok.add_sentence(f"File '{cur_file_path}' added.")
 
-    def store_all(self, base_dir: str, base_iri: str, context_path: str = None) -> List[str]:
+    def _write_lines(self, cur_g: ConjunctiveGraph, stream: IO[bytes]) -> None:
+        # N-Triples and N-Quads lines are streamed directly from the store of the graph
+        if self.output_format in nquads_formats:
+            write_nq(iter_quads(cur_g), stream)
+            # Just like rdflib does, a blank line ends the document
+            stream.write(b"\n")
+        else:
+            write_nt(cur_g.triples((None, None, None)), stream)
+
+    def store_all(self, base_dir: str, base_iri: str, context_path: str = None, workers: int = 1,
+                  process_pool: bool = False) -> List[str]:
+        """
+        It stores every entity of the set inside the file it belongs to, merging it with the
+        content which is already stored there (if any).
+
+        Since each file is handled independently from the others, the work can be spread among
+        a pool of ``workers``, either threads or processes (which are not limited by the GIL, but
+        need to receive a copy of the data to be stored). Regardless of the number of workers,
+        the messages related to the files are reported in the same order.
+
+        :param base_dir: The path of the directory where files will be stored
+        :type base_dir: str
+        :param base_iri: The base IRI of the entities
+        :type base_iri: str
+        :param context_path: The IRI of the JSON-LD context used by the stored files
+        :type context_path: str, optional
+        :param workers: The number of files that can be processed at the same time
+        :type workers: int, optional
+        :param process_pool: If True, a pool of processes will be used instead of a pool of threads
+        :type process_pool: bool, optional
+        :return: The list of the paths of the stored files
+        """
         self.repok.new_article()
         self.reperr.new_article()
 
@@ -153,51 +223,121 @@ class Storer(object):
             relevant_paths.setdefault(cur_file_path, list())
             relevant_paths[cur_file_path].append(entity)
 
-        for relevant_path, entities_in_path in relevant_paths.items():
-            stored_g = None
-            # Here we try to obtain a reference to the currently stored graph
-            output_filepath = relevant_path.replace(os.path.splitext(relevant_path)[1], ".zip") if self.zip_output else relevant_path
-            if os.path.exists(output_filepath):
-                stored_g = Reader(context_map=self.context_map).load(output_filepath)
-            if stored_g is None:
-                stored_g = ConjunctiveGraph()
-            for entity_in_path in entities_in_path:
-                self.store(entity_in_path, stored_g, relevant_path, context_path, False)
-            self._store_in_file(stored_g, relevant_path, context_path)
+        if workers is None or workers <= 1:
+            for relevant_path, entities_in_path in relevant_paths.items():
+                self._store_file(relevant_path, self._get_data_to_store(entities_in_path), context_path)
+        else:
+            executor: Executor = ProcessPoolExecutor(max_workers=workers) if process_pool \
+                else ThreadPoolExecutor(max_workers=workers)
+            with executor:
+                futures: List[Future] = []
+                for relevant_path, entities_in_path in relevant_paths.items():
+                    # Each file gets its own copy of the storer, which collects the related messages
+                    worker: Storer = self._detached_copy()
+                    futures.append(executor.submit(worker._store_file_and_report, relevant_path,
+                                                   self._get_data_to_store(entities_in_path), context_path))
+                # Results are collected following the order of submission,
+                # so that the reports don't depend on the scheduling of the workers
+                for future in futures:
+                    repok_articles, reperr_articles = future.result()
+                    self._replay_articles(self.repok, repok_articles)
+                    self._replay_articles(self.reperr, reperr_articles)
 
         return list(relevant_paths.keys())
 
+    def _store_file(self, relevant_path: str, data_to_store: List[Tuple[URIRef, bool, List[Tuple]]],
+                    context_path: str = None) -> None:
+        stored_g = None
+        # Here we try to obtain a reference to the currently stored graph
+        output_filepath = relevant_path.replace(os.path.splitext(relevant_path)[1], ".zip") if self.zip_output else relevant_path
+        if os.path.exists(output_filepath):
+            # Errors of the reader are reported by the storer itself, which allows workers to defer them
+            reader: Reader = Reader(repok=Reporter(print_sentences=False), reperr=Reporter(print_sentences=False),
+                                    context_map=self.context_map)
+            stored_g = reader.load(output_filepath)
+            if stored_g is None:
+                self.reperr.add_sentence(f"[4] The content of the file '{output_filepath}' could not be loaded. "
+                                         f"{reader.reperr.get_last_sentence()}")
+        if stored_g is None:
+            stored_g = ConjunctiveGraph()
+        for res, remove_stored, quads in data_to_store:
+            self.repok.new_article()
+            self.reperr.new_article()
+            try:
+                self._merge_into_graph(stored_g, res, remove_stored, quads)
+            except Exception as e:
+                self.reperr.add_sentence(f"[1] It was impossible to store the RDF statements in {relevant_path}. {e}")
+        self._store_in_file(stored_g, relevant_path, context_path)
+
+    def _store_file_and_report(self, relevant_path: str, data_to_store: List[Tuple[URIRef, bool, List[Tuple]]],
+                               context_path: str = None) -> Tuple[List[List[str]], List[List[str]]]:
+        self._store_file(relevant_path, data_to_store, context_path)
+        return self.repok.articles, self.reperr.articles
+
+    def _detached_copy(self) -> Storer:
+        # A copy of this storer that can be handed to a worker: it collects its messages
+        # without printing them and it doesn't reference the (possibly huge) entity set,
+        # which would otherwise get pickled together with it when a pool of processes is used
+        worker: Storer = copy.copy(self)
+        worker.a_set = None
+        worker.repok = Reporter(print_sentences=False)
+        worker.reperr = Reporter(print_sentences=False)
+        return worker
+
+    @staticmethod
+    def _replay_articles(reporter: Reporter, articles: List[List[str]]) -> None:
+        for article in articles:
+            if len(article) > 0:
+                reporter.new_article()
+                for sentence in article:
+                    reporter.add_sentence(sentence)
+
+    def _get_data_to_store(self, entities: List[AbstractEntity]) -> List[Tuple[URIRef, bool, List[Tuple]]]:
+        data_to_store: List[Tuple[URIRef, bool, List[Tuple]]] = []
+        for entity in entities:
+            remove_stored, quads = self._get_quads_to_store(entity)
+            data_to_store.append((entity.res, remove_stored, quads))
+        return data_to_store
+
+    @staticmethod
+    def _get_quads_to_store(entity: AbstractEntity) -> Tuple[bool, List[Tuple]]:
+        """
+        It returns whether the statements about the entity which are already
+        stored must be removed, together with the quads that must be stored.
+        """
+        quads: List[Tuple] = []
+        if isinstance(entity, ProvEntity):
+            remove_stored: bool = False
+        elif isinstance(entity, GraphEntity) or isinstance(entity, MetadataEntity):
+            if entity.to_be_deleted:
+                # We're done as soon as every stored triple of the entity gets removed
+                return True, quads
+            # If the entity was already stored, we're not in 'append mode':
+            # we need to remove the entity that we're going to overwrite.
+            remove_stored: bool = len(entity.preexisting_graph) > 0
+        else:
+            return False, quads
+
+        graph_identifier: URIRef = entity.g.identifier
+        for triple in entity.g.triples((entity.res, None, None)):
+            quads.append((*triple, graph_identifier))
+        return remove_stored, quads
+
+    @staticmethod
+    def _merge_into_graph(destination_g: ConjunctiveGraph, res: URIRef,
+                          remove_stored: bool, quads: List[Tuple]) -> None:
+        if remove_stored:
+            destination_g.remove((res, None, None, None))
+        if len(quads) > 0:
+            destination_g.addN(quads)
+
     def store(self, entity: AbstractEntity, destination_g: ConjunctiveGraph, cur_file_path: str, context_path: str = None, store_now: bool = True) -> ConjunctiveGraph:
         self.repok.new_article()
         self.reperr.new_article()
 
         try:
-            if isinstance(entity, ProvEntity):
-                quads: List[Tuple] = []
-                graph_identifier: URIRef = entity.g.identifier
-                for triple in entity.g.triples((entity.res, None, None)):
-                    quads.append((*triple, graph_identifier))
-                destination_g.addN(quads)
-            elif isinstance(entity, GraphEntity) or isinstance(entity, MetadataEntity):
-                if entity.to_be_deleted:
-                    destination_g.remove((entity.res, None, None, None))
-                else:
-                    if len(entity.preexisting_graph) > 0:
-                        """
-                        We're not in 'append mode', so we need to remove
-                        the entity that we're going to overwrite.
-                        """
-                        destination_g.remove((entity.res, None, None, None))
-                    """
-                    Here we copy data from the entity into the stored graph.
-                    If the entity was marked as to be deleted, then we're
-                    done because we already removed all of its triples.
-                    """
-                    quads: List[Tuple] = []
-                    graph_identifier: URIRef = entity.g.identifier
-                    for triple in entity.g.triples((entity.res, None, None)):
-                        quads.append((*triple, graph_identifier))
-                    destination_g.addN(quads)
+            remove_stored, quads = self._get_quads_to_store(entity)
+            self._merge_into_graph(destination_g, entity.res, remove_stored, quads)
 
             if store_now:
                 self._store_in_file(destination_g, cur_file_path, context_path)
@@ -207,7 +347,9 @@ class Storer(object):
             self.reperr.add_sentence(f"[1] It was impossible to store the RDF statements in {cur_file_path}. {e}")
 
     def upload_and_store(self, base_dir: str, triplestore_url: str, base_iri: str, context_path: str = None,
-                         batch_size: int = 10) -> None:
+                         batch_size: int = 10, workers: int = 1, max_triples: Optional[int] = None,
+                         max_bytes: Optional[int] = None, graph_store_url: Optional[str] = None,
+                         bulk_load_path: Optional[str] = None) -> None:
         stored_graph_path: List[str] = self.store_all(base_dir, base_iri, context_path)
 
         # If some graphs were not stored properly, then no one will be uploaded to the triplestore
@@ -222,7 +364,9 @@ class Storer(object):
                                              f"The statements contained in the JSON-LD file '{file_path}' "
                                              "were not uploaded into the triplestore.")
         else:  # All the files have been stored
-            self.upload_all(triplestore_url, base_dir, batch_size)
+            self.upload_all(triplestore_url, base_dir, batch_size, workers,
+                            max_triples=max_triples, max_bytes=max_bytes,
+                            graph_store_url=graph_store_url, bulk_load_path=bulk_load_path)
 
     def _dir_and_file_paths(self, res: URIRef, base_dir: str, base_iri: str) -> Tuple[str, str]:
         is_json: bool = (self.output_format == "json-ld")
@@ -239,47 +383,339 @@ class Storer(object):
         else:
             return None
 
-    def upload_all(self, triplestore_url: str, base_dir: str = None, batch_size: int = 10) -> bool:
+    def upload_all(self, triplestore_url: str, base_dir: str = None, batch_size: int = 10, workers: int = 1,
+                   max_retries: int = 3, backoff: float = 1.0, max_triples: Optional[int] = None,
+                   max_bytes: Optional[int] = None, graph_store_url: Optional[str] = None,
+                   bulk_load_path: Optional[str] = None) -> bool:
+        """
+        It uploads the changes of every entity to the triplestore, by sending batches made of at most
+        ``batch_size`` update queries, ``max_triples`` added or removed statements and ``max_bytes``
+        bytes of UTF-8 encoded text. A single update query exceeding these limits is sent alone.
+
+        Batches are built by the calling thread while up to ``workers`` threads send the previous
+        ones through persistent connections, so that building queries and waiting for the
+        triplestore overlap. At most two batches per worker can be waiting to be sent: when
+        the senders fall behind, building new batches is suspended. A batch which fails due to a
+        transient problem (a connection error, a timeout or an HTTP status such as 429 or 503) is
+        sent again up to ``max_retries`` times, waiting ``backoff`` seconds before the first retry
+        and doubling the wait before each of the following ones. A batch which is rejected as too
+        large (HTTP status 413) is split in two halves, which are sent separately; the limits applied
+        to the following batches are halved as well, and they are gradually restored as the
+        triplestore accepts the smaller batches. The outcome of each batch is reported in order.
+
+        The statements of the entities which are only added (e.g. when loading new data) don't need
+        to be wrapped inside SPARQL UPDATE requests, which the triplestore would have to parse again.
+        If ``graph_store_url`` is specified, they are posted in the N-Triples format to their
+        named graphs, according to the SPARQL 1.1 Graph Store HTTP Protocol. If ``bulk_load_path``
+        is specified, they are written instead to an N-Quads file, which can be loaded through the
+        native bulk loader of the triplestore. In both cases, only the entities having some
+        statements to be removed are uploaded through SPARQL UPDATE requests.
+
+        If ``base_dir`` is specified, the changes of each batch are appended to a durable upload
+        journal (i.e. the 'upload.journal' file inside ``base_dir``) just before the batch is sent,
+        and they are acknowledged in the journal as soon as the triplestore accepts them. Thus, the
+        journal only holds the changes which are being sent and the ones which could not be uploaded,
+        even because the process was interrupted, so that they can be uploaded later through
+        :meth:`resume_upload`. The changes which were left pending by previous uploads are uploaded
+        again before any other one, as :meth:`resume_upload` does: if any of them still fails,
+        the new changes are only appended to the journal, so that they are never applied before
+        the older ones.
+
+        :param triplestore_url: The URL of the SPARQL endpoint of the triplestore
+        :type triplestore_url: str
+        :param base_dir: If specified, the directory containing the upload journal
+        :type base_dir: str, optional
+        :param batch_size: The maximum number of entities whose changes are sent with each request
+        :type batch_size: int
+        :param workers: The number of threads sending the batches
+        :type workers: int
+        :param max_retries: The maximum number of times a batch is sent again after a transient failure
+        :type max_retries: int
+        :param backoff: The number of seconds to wait before retrying a batch for the first time
+        :type backoff: float
+        :param max_triples: If specified, the maximum number of statements added or removed by each request
+        :type max_triples: int, optional
+        :param max_bytes: If specified, the maximum size in bytes of the data sent with each request
+        :type max_bytes: int, optional
+        :param graph_store_url: If specified, the URL of the Graph Store HTTP Protocol service of the triplestore
+        :type graph_store_url: str, optional
+        :param bulk_load_path: If specified, the path of the N-Quads file where added statements are written
+        :type bulk_load_path: str, optional
+        :raises ValueError: if both ``graph_store_url`` and ``bulk_load_path`` are specified.
+        :return: True if every batch was uploaded, False otherwise
+        """
+        if graph_store_url is not None and bulk_load_path is not None:
+            raise ValueError("graph_store_url and bulk_load_path cannot be specified together!")
+
+        self.repok.new_article()
+        self.reperr.new_article()
+
+        items: Iterator[Tuple[Optional[int], Optional[str], str, int, int]] = \
+            self._get_update_items(graph_store_url is not None or bulk_load_path is not None, bulk_load_path)
+        if base_dir is None:
+            return self._upload_items(items, None, triplestore_url, graph_store_url, batch_size, workers,
+                                      max_retries, backoff, max_triples, max_bytes)
+
+        return self._upload_journaled_items(items, base_dir, triplestore_url, graph_store_url, batch_size,
+                                            workers, max_retries, backoff, max_triples, max_bytes)
+
+    def resume_upload(self, triplestore_url: str, base_dir: str, batch_size: int = 10, workers: int = 1,
+                      max_retries: int = 3, backoff: float = 1.0, max_triples: Optional[int] = None,
+                      max_bytes: Optional[int] = None, graph_store_url: Optional[str] = None) -> bool:
+        """
+        It uploads again, in order, the changes which were left pending in the upload journal of
+        ``base_dir`` (see :meth:`upload_all`), e.g. because the triplestore couldn't be reached or
+        because the upload was interrupted. The changes which are uploaded are acknowledged in the
+        journal, which is removed as soon as no pending change is left. Since the journal contains
+        everything needed, the entities of the set handled by the storer are not involved.
+
+        Since a pending change could conflict with a later one (e.g. both of them could change the
+        same entity), pending changes are sent one batch at a time, regardless of ``workers``, and
+        the upload stops at the first batch which fails.
+
+        The statements which were meant to be posted to a graph store are uploaded through SPARQL
+        UPDATE requests, unless ``graph_store_url`` is specified. The other parameters have the same
+        meaning as in :meth:`upload_all`.
+
+        :param triplestore_url: The URL of the SPARQL endpoint of the triplestore
+        :type triplestore_url: str
+        :param base_dir: The directory containing the upload journal
+        :type base_dir: str
+        :param batch_size: The maximum number of entities whose changes are sent with each request
+        :type batch_size: int
+        :param workers: The number of threads sending the batches (pending changes are always sent by one of them)
+        :type workers: int
+        :param max_retries: The maximum number of times a batch is sent again after a transient failure
+        :type max_retries: int
+        :param backoff: The number of seconds to wait before retrying a batch for the first time
+        :type backoff: float
+        :param max_triples: If specified, the maximum number of statements added or removed by each request
+        :type max_triples: int, optional
+        :param max_bytes: If specified, the maximum size in bytes of the data sent with each request
+        :type max_bytes: int, optional
+        :param graph_store_url: If specified, the URL of the Graph Store HTTP Protocol service of the triplestore
+        :type graph_store_url: str, optional
+        :return: True if every pending change was uploaded, False otherwise
+        """
         self.repok.new_article()
         self.reperr.new_article()
 
+        return self._upload_journaled_items(iter(()), base_dir, triplestore_url, graph_store_url, batch_size,
+                                            workers, max_retries, backoff, max_triples, max_bytes)
+
+    def _upload_journaled_items(self, items: Iterable[Tuple[Optional[int], Optional[str], str, int, int]],
+                                base_dir: str, triplestore_url: str, graph_store_url: Optional[str],
+                                batch_size: int, workers: int, max_retries: int, backoff: float,
+                                max_triples: Optional[int], max_bytes: Optional[int]) -> bool:
+        journal: UploadJournal = UploadJournal(self._get_upload_journal_path(base_dir))
+        try:
+            # Pending changes are replayed in order by a single sender, before any new change is sent
+            result: bool = self._upload_items(journal.iter_pending(), journal, triplestore_url, graph_store_url,
+                                              batch_size, 1, max_retries, backoff, max_triples, max_bytes,
+                                              ordered=True)
+            if result:
+                result = self._upload_items(items, journal, triplestore_url, graph_store_url, batch_size,
+                                            workers, max_retries, backoff, max_triples, max_bytes)
+            else:
+                # New changes must not overtake the pending ones, hence they are kept for later
+                for _, graph_iri, data, n_added, n_removed in items:
+                    journal.append(graph_iri, data, n_added, n_removed)
+        finally:
+            journal.close()
+        return self._compact_upload_journal(journal) and result
+
+    def _get_upload_journal_path(self, base_dir: str) -> str:
+        return os.path.join(base_dir, self._upload_journal_name)
+
+    def _compact_upload_journal(self, journal: UploadJournal) -> bool:
+        pending_changes: int = journal.compact()
+        if pending_changes > 0:
+            self.reperr.add_sentence(f"[5] The changes of {pending_changes} entities were not uploaded "
+                                     f"into the triplestore: they were kept in the upload journal "
+                                     f"'{journal.path}', so that they can be uploaded again.")
+        return pending_changes == 0
+
+    def _upload_items(self, items: Iterable[Tuple[Optional[int], Optional[str], str, int, int]],
+                      journal: Optional[UploadJournal], triplestore_url: str, graph_store_url: Optional[str],
+                      batch_size: int, workers: int, max_retries: int, backoff: float,
+                      max_triples: Optional[int], max_bytes: Optional[int], ordered: bool = False) -> bool:
         if batch_size <= 0:
             batch_size = 10
+        workers = max(1, workers)
+        budget: _UploadBudget = _UploadBudget(batch_size, max_triples, max_bytes)
 
-        query_string: str = ""
-        added_statements: int = 0
-        removed_statements: int = 0
-        skipped_queries: int = 0
         result: bool = True
+        slots: BoundedSemaphore = BoundedSemaphore(2 * workers)
+        pending: Deque[Tuple[Future, Optional[str], List[Tuple[str, int, int, Optional[int]]]]] = deque()
+        with SparqlSession(triplestore_url) as session, \
+                SparqlSession(graph_store_url or triplestore_url) as graph_store, \
+                ThreadPoolExecutor(max_workers=workers) as executor:
+            for graph_iri, batch in self._get_update_batches(items, budget, graph_store_url is not None):
+                if ordered and not result:
+                    # The following batches must not be applied before the one which failed
+                    break
+                slots.acquire()
+                if journal is not None:
+                    batch = self._journal_batch(journal, graph_iri, batch)
+                future: Future = executor.submit(self._send_batch, session, graph_store, graph_iri, batch,
+                                                 budget, max_retries, backoff)
+                future.add_done_callback(lambda _: slots.release())
+                pending.append((future, graph_iri, batch))
+                # In order mode, each batch is sent only after the previous one was accepted
+                while len(pending) > 0 and (ordered or pending[0][0].done()):
+                    result &= self._report_upload(*pending.popleft(), journal)
+        while len(pending) > 0:
+            result &= self._report_upload(*pending.popleft(), journal)
 
-        for idx, entity in enumerate(self.a_set.res_to_entity.values()):
-            update_query, n_added, n_removed = get_update_query(entity, entity_type=self._class_to_entity_type(entity))
+        return result
 
-            if update_query == "":
-                skipped_queries += 1
-            else:
-                index = idx - skipped_queries
-                if index == 0:
-                    # First query
-                    query_string = update_query
-                    added_statements = n_added
-                    removed_statements = n_removed
-                elif index % batch_size == 0:
-                    # batch_size-multiple query
-                    result &= self._query(query_string, triplestore_url, base_dir, added_statements, removed_statements)
-                    query_string = update_query
-                    added_statements = n_added
-                    removed_statements = n_removed
+    @staticmethod
+    def _journal_batch(journal: UploadJournal, graph_iri: Optional[str],
+                       batch: List[Tuple[str, int, int, Optional[int]]]) -> List[Tuple[str, int, int, Optional[int]]]:
+        # New changes are made durable just before being sent, so that the journal only holds the ones
+        # which are being sent or which failed, while the changes already in the journal keep their identifier
+        journaled_batch: List[Tuple[str, int, int, Optional[int]]] = [
+            (data, n_added, n_removed,
+             journal.append(graph_iri, data, n_added, n_removed) if item_id is None else item_id)
+            for data, n_added, n_removed, item_id in batch]
+        journal.sync()
+        return journaled_batch
+
+    def _get_update_items(self, split_insertions: bool = False, bulk_load_path: Optional[str] = None) \
+            -> Iterator[Tuple[Optional[int], Optional[str], str, int, int]]:
+        # Each item holds the changes of an entity: either an update query (without a named graph)
+        # or, if split_insertions is True and the entity is only added, its statements together with
+        # its named graph. If bulk_load_path is specified, such statements are written there instead.
+        bulk_load_statements: int = 0
+        with open(bulk_load_path, 'wb') if bulk_load_path is not None else nullcontext() as bulk_load_file:
+            for entity in self.a_set.res_to_entity.values():
+                entity_type: Optional[str] = self._class_to_entity_type(entity)
+                insert_data: Optional[Tuple[URIRef, List[Tuple]]] = None
+                if split_insertions:
+                    insert_data = get_insert_data(entity, entity_type=entity_type)
+
+                if insert_data is None:
+                    update_query, n_added, n_removed = get_update_query(entity, entity_type=entity_type)
+                    if update_query != "":
+                        yield None, None, update_query, n_added, n_removed
                 else:
-                    # Accumulated query
-                    query_string += " ; " + update_query
-                    added_statements += n_added
-                    removed_statements += n_removed
+                    graph_iri, triples = insert_data
+                    if bulk_load_file is not None:
+                        bulk_load_statements += write_nq(((s, p, o, graph_iri) for s, p, o in triples),
+                                                         bulk_load_file)
+                    elif len(triples) > 0:
+                        yield None, str(graph_iri), "".join(nt_line(triple) for triple in triples), len(triples), 0
 
-        if query_string != "":
-            result &= self._query(query_string, triplestore_url, base_dir, added_statements, removed_statements)
+        if bulk_load_path is not None:
+            self.repok.add_sentence(f"{bulk_load_statements} added statements were written "
+                                    f"to the bulk load file {bulk_load_path}.")
 
-        return result
+    @staticmethod
+    def _get_update_batches(items: Iterable[Tuple[Optional[int], Optional[str], str, int, int]],
+                            budget: _UploadBudget, use_graph_store: bool) \
+            -> Iterator[Tuple[Optional[str], List[Tuple[str, int, int, Optional[int]]]]]:
+        # Update queries are gathered in the batch of the None key, while the statements
+        # to be posted to the graph store are gathered in the batch of their named graph
+        batches: Dict[Optional[str], Tuple[List[Tuple[str, int, int, Optional[int]]], int, int]] = {}
+        limits: Dict[Optional[str], Tuple[int, Optional[int], Optional[int]]] = {}
+
+        for item_id, key, data, n_added, n_removed in items:
+            if key is not None and not use_graph_store:
+                data = Storer._to_insert_query(key, data)
+                key = None
+            if key is None:
+                # Update queries are sent as the 'update' field of an URL-encoded form, hence
+                # the size of the request body is measured after percent-encoding them
+                separator_bytes: int = len(quote_plus(" ; "))
+                query_bytes: int = len(quote_plus(data))
+            else:
+                separator_bytes: int = 0
+                query_bytes: int = len(data.encode("utf-8"))
+
+            batch, n_triples, n_bytes = batches.get(key, ([], 0, 0))
+            query_triples: int = n_added + n_removed
+            if len(batch) > 0:
+                max_queries, max_triples, max_bytes = limits[key]
+                if len(batch) >= max_queries or \
+                        (max_triples is not None and n_triples + query_triples > max_triples) or \
+                        (max_bytes is not None and n_bytes + separator_bytes + query_bytes > max_bytes):
+                    yield key, batch
+                    batch = []
+            if len(batch) == 0:
+                # Limits are read when a batch is started, so that they reflect the latest responses
+                limits[key] = budget.limits()
+                first_bytes: int = query_bytes + (len(urlencode({"update": ""})) if key is None else 0)
+                batches[key] = ([(data, n_added, n_removed, item_id)], query_triples, first_bytes)
+            else:
+                batch.append((data, n_added, n_removed, item_id))
+                batches[key] = (batch, n_triples + query_triples, n_bytes + separator_bytes + query_bytes)
+
+        for key, (batch, _, _) in batches.items():
+            yield key, batch
+
+    def _send_batch(self, session: SparqlSession, graph_store: SparqlSession, graph_iri: Optional[str],
+                    batch: List[Tuple[str, int, int, Optional[int]]], budget: _UploadBudget, max_retries: int,
+                    backoff: float) -> List[Tuple[List[Tuple[str, int, int, Optional[int]]], Exception]]:
+        if graph_iri is None:
+            query_string: str = " ; ".join(update_query for update_query, _, _, _ in batch)
+            send: Callable[[], Any] = lambda: session.update(query_string)
+        else:
+            data: bytes = "".join(statements for statements, _, _, _ in batch).encode("utf-8")
+            send: Callable[[], Any] = lambda: graph_store.post_graph(graph_iri, data)
+
+        error: Optional[Exception] = self._send_with_retries(send, max_retries, backoff)
+        if error is None:
+            budget.grow()
+            return []
+        elif len(batch) > 1 and isinstance(error, SparqlHTTPError) and error.status == 413:
+            budget.shrink()
+            half: int = len(batch) // 2
+            return self._send_batch(session, graph_store, graph_iri, batch[:half], budget, max_retries, backoff) + \
+                self._send_batch(session, graph_store, graph_iri, batch[half:], budget, max_retries, backoff)
+        else:
+            return [(batch, error)]
+
+    @staticmethod
+    def _to_insert_query(graph_iri: str, statements: str) -> str:
+        return f"INSERT DATA {{ GRAPH <{graph_iri}> {{ {statements} }} }}"
+
+    @staticmethod
+    def _send_with_retries(send: Callable[[], Any], max_retries: int, backoff: float) -> Optional[Exception]:
+        attempt: int = 0
+        while True:
+            try:
+                send()
+                return None
+            except Exception as e:
+                if attempt >= max_retries or not Storer._is_transient(e):
+                    return e
+                sleep(backoff * (2 ** attempt))
+                attempt += 1
+
+    @staticmethod
+    def _is_transient(error: Exception) -> bool:
+        if isinstance(error, SparqlHTTPError):
+            return error.status in transient_http_statuses
+        return isinstance(error, (OSError, HTTPException))
+
+    def _report_upload(self, future: Future, graph_iri: Optional[str], batch: List[Tuple[str, int, int, Optional[int]]],
+                       journal: Optional[UploadJournal]) -> bool:
+        failures: List[Tuple[List[Tuple[str, int, int, Optional[int]]], Exception]] = future.result()
+        failed_items: Set[Optional[int]] = set()
+        added_statements: int = sum(n_added for _, n_added, _, _ in batch)
+        removed_statements: int = sum(n_removed for _, _, n_removed, _ in batch)
+        for failed_batch, error in failures:
+            added_statements -= sum(n_added for _, n_added, _, _ in failed_batch)
+            removed_statements -= sum(n_removed for _, _, n_removed, _ in failed_batch)
+            failed_items.update(item_id for _, _, _, item_id in failed_batch)
+            self._report_upload_failure(error)
+        if journal is not None:
+            journal.acknowledge(item_id for _, _, _, item_id in batch if item_id not in failed_items)
+        if len(failures) < 1 or added_statements > 0 or removed_statements > 0:
+            self.repok.add_sentence(
+                f"Triplestore updated with {added_statements} added statements and "
+                f"with {removed_statements} removed statements.")
+        return len(failures) < 1
 
     def upload(self, entity: AbstractEntity, triplestore_url: str, base_dir: str = None) -> bool:
         self.repok.new_article()
@@ -312,16 +748,15 @@ class Storer(object):
                 return True
 
             except Exception as e:
-                self.reperr.add_sentence("[3] "
-                                         "Graph was not loaded into the "
-                                         f"triplestore due to communication problems: {e}")
+                self._report_upload_failure(e)
                 if base_dir is not None:
-                    tp_err_dir: str = base_dir + os.sep + "tp_err"
-                    if not os.path.exists(tp_err_dir):
-                        os.makedirs(tp_err_dir)
-                    cur_file_err: str = tp_err_dir + os.sep + \
-                        datetime.now().strftime('%Y-%m-%d-%H-%M-%S-%f_not_uploaded.txt')
-                    with open(cur_file_err, 'wt', encoding='utf-8') as f:
-                        f.write(query_string)
-
-        return False
\ No newline at end of file
+                    # The query is kept in the upload journal, so that it can be uploaded again later
+                    with UploadJournal(self._get_upload_journal_path(base_dir)) as journal:
+                        journal.append(None, query_string, added_statements, removed_statements)
+
+        return False
+
+    def _report_upload_failure(self, error: Exception) -> None:
+        self.reperr.add_sentence("[3] "
+                                 "Graph was not loaded into the "
+                                 f"triplestore due to communication problems: {error}")
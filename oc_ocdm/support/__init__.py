@@ -19,4 +19,9 @@ from oc_ocdm.support.support import create_date, get_datatype_from_iso_8601, enc
                                     get_resource_number, find_local_line_id, find_paths, has_supplier_prefix,\
                                     is_dataset
 from oc_ocdm.support.reporter import Reporter
-from oc_ocdm.support.query_utils import get_update_query, get_insert_query, get_delete_query
+from oc_ocdm.support.query_utils import get_update_query, get_insert_query, get_delete_query, get_graph_diff
+from oc_ocdm.support.entity_graph import EntityGraph, SubjectGraph
+from oc_ocdm.support.namespace_view import NamespaceManagerView
+from oc_ocdm.support.nt_writer import write_nt, write_nq, nt_line, nq_line, iter_quads
+from oc_ocdm.support.sparql_session import SparqlSession, SparqlHTTPError
+from oc_ocdm.support.upload_journal import UploadJournal
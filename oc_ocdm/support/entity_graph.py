@@ -0,0 +1,218 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2016, Silvio Peroni <essepuntato@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from rdflib import Graph
+from rdflib.plugins.stores.memory import Memory
+
+if TYPE_CHECKING:
+    from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Set, Tuple, Union
+    from rdflib import URIRef, term
+    from rdflib.namespace import NamespaceManager
+    from rdflib.store import Store
+
+
+class EntityGraph(Graph):
+    """
+    A ``rdflib.Graph`` that notifies a callback function every time a new triple gets
+    added to it. Entity sets rely on this class to keep their indexes up to date
+    without having to scan the graph of each contained entity.
+
+    Moreover, it keeps track of the triples that were added and removed since the last
+    call to ``reset_changes``, so that the changes made to an entity can be known
+    without comparing its graph with a copy of its previous content.
+    """
+
+    def __init__(self, identifier: Optional[str] = None, on_add: Callable[[Tuple[term]], None] = None,
+                 store: Union[Store, str] = 'default', namespace_manager: NamespaceManager = None) -> None:
+        """
+        Constructor of the ``EntityGraph`` class.
+
+        :param identifier: The IRI that names the graph
+        :type identifier: str, optional
+        :param on_add: The function that will be called with each triple added to the graph
+        :type on_add: Callable[[Tuple[term]], None], optional
+        :param store: The ``rdflib`` store that will hold the triples of the graph
+        :type store: Union[Store, str], optional
+        :param namespace_manager: The namespace manager of the graph (created on demand if not provided)
+        :type namespace_manager: NamespaceManager, optional
+        """
+        super(EntityGraph, self).__init__(store=store, identifier=identifier, namespace_manager=namespace_manager)
+        self.on_add: Optional[Callable[[Tuple[term]], None]] = on_add
+        # The following counter gets incremented by every operation that (possibly) changes the content
+        # of the graph: it allows to detect whether any value computed from the graph is still valid
+        self.version: int = 0
+        # Net changes with respect to the last baseline (see reset_changes). As long as the
+        # baseline is empty, every triple of the graph is an addition: in that case nothing
+        # gets recorded, so that newly created entities don't keep a second copy of their triples
+        self._empty_baseline: bool = True
+        self._added: Set[Tuple[term]] = set()
+        self._removed: Set[Tuple[term]] = set()
+
+    def __reduce__(self) -> Tuple:
+        return EntityGraph, (self.identifier, None, 'default', self.namespace_manager), self.__getstate__()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Only the triples of the graph are pickled, together with the tracked changes (otherwise the copy
+        # would report wrong changes). The callback is left out, since it usually belongs to an entity set
+        # which would get pickled as a whole: sets attach it again to the graphs of their entities
+        return {"_triples": list(self), **self._get_tracking_state()}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        state = dict(state)
+        for triple in state.pop("_triples", ()):
+            # Restored triples are neither tracked as changes nor notified to any callback
+            Graph.add(self, triple)
+        self.__dict__.update(state)
+
+    def _get_tracking_state(self) -> Dict[str, Any]:
+        return {"version": self.version, "_empty_baseline": self._empty_baseline,
+                "_added": set(self._added), "_removed": set(self._removed)}
+
+    @property
+    def is_dirty(self) -> bool:
+        """
+        Whether the content of the graph differs from the one it had
+        at the time of the last call to ``reset_changes``.
+        """
+        if self._empty_baseline:
+            return next(iter(self), None) is not None
+        return len(self._added) > 0 or len(self._removed) > 0
+
+    def get_changes(self) -> Tuple[Set[Tuple[term]], Set[Tuple[term]]]:
+        """
+        It returns the triples that were removed from the graph and the ones that were
+        added to it since the last call to ``reset_changes``.
+
+        :return: A tuple containing, respectively, the set of removed triples and the set of added triples
+        """
+        if self._empty_baseline:
+            return set(), set(self)
+        return set(self._removed), set(self._added)
+
+    def reset_changes(self) -> None:
+        """
+        It sets the current content of the graph as the baseline against which
+        subsequent changes will be tracked.
+
+        :return: None
+        """
+        self._empty_baseline = next(iter(self), None) is None
+        self._added = set()
+        self._removed = set()
+
+    def add(self, triple: Tuple[term]) -> EntityGraph:
+        if not self._empty_baseline and triple not in self:
+            if triple in self._removed:
+                self._removed.discard(triple)
+            else:
+                self._added.add(triple)
+        super(EntityGraph, self).add(triple)
+        self.version += 1
+        if self.on_add is not None:
+            self.on_add(triple)
+        return self
+
+    def remove(self, triple: Tuple[term]) -> EntityGraph:
+        if not self._empty_baseline:
+            for removed_triple in list(self.triples(triple)):
+                if removed_triple in self._added:
+                    self._added.discard(removed_triple)
+                else:
+                    self._removed.add(removed_triple)
+        super(EntityGraph, self).remove(triple)
+        self.version += 1
+        return self
+
+    def addN(self, quads: Iterable[Tuple[term]]) -> EntityGraph:
+        for s, p, o, c in quads:
+            if isinstance(c, Graph) and c.identifier is self.identifier:
+                self.add((s, p, o))
+        return self
+
+
+class SubjectGraph(EntityGraph):
+    """
+    A lightweight view over a context of a (usually shared) ``rdflib`` store, which only
+    exposes the triples having a given subject. Since every OCDM entity only contains
+    triples about itself, many entities can live inside the same store without having
+    to allocate a dedicated store for each of them.
+    """
+
+    def __init__(self, store: Store, identifier: str, subject: URIRef,
+                 on_add: Callable[[Tuple[term]], None] = None, namespace_manager: NamespaceManager = None) -> None:
+        """
+        Constructor of the ``SubjectGraph`` class.
+
+        :param store: The ``rdflib`` store (which must be context-aware) that holds the triples
+        :type store: Store
+        :param identifier: The IRI that names the graph, i.e. the context of the triples inside the store
+        :type identifier: str
+        :param subject: The only subject exposed by the view
+        :type subject: URIRef
+        :param on_add: The function that will be called with each triple added to the graph
+        :type on_add: Callable[[Tuple[term]], None], optional
+        :param namespace_manager: The namespace manager of the graph (created on demand if not provided)
+        :type namespace_manager: NamespaceManager, optional
+        """
+        super(SubjectGraph, self).__init__(identifier=identifier, on_add=on_add, store=store,
+                                           namespace_manager=namespace_manager)
+        self.subject: URIRef = subject
+
+    def __reduce__(self) -> Tuple:
+        # The (usually shared) store is not pickled: the copy holds the triples of the subject in a store of its own
+        return SubjectGraph, (Memory(), self.identifier, self.subject, None, self.namespace_manager), \
+            self.__getstate__()
+
+    def with_store(self, store: Store, on_add: Callable[[Tuple[term]], None] = None) -> SubjectGraph:
+        """
+        It creates a view over the same context and subject of another store, which keeps tracking the
+        changes made since the last call to ``reset_changes`` on this graph. The triples of this graph
+        are not copied, since they are expected to be contained in ``store`` as well (e.g. when the
+        graph is unpickled together with the shared store of its entity set).
+
+        :param store: The ``rdflib`` store (which must be context-aware) that holds the triples
+        :type store: Store
+        :param on_add: The function that will be called with each triple added to the graph
+        :type on_add: Callable[[Tuple[term]], None], optional
+        :return: The new view
+        """
+        graph: SubjectGraph = SubjectGraph(store, self.identifier, self.subject, on_add=on_add,
+                                           namespace_manager=self.namespace_manager)
+        graph.__setstate__(self._get_tracking_state())
+        return graph
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.triples((None, None, None)))
+
+    def triples(self, triple: Tuple[term]) -> Iterator[Tuple[term]]:
+        s, p, o = triple
+        if s is None:
+            s = self.subject
+        elif s != self.subject:
+            return
+        yield from super(SubjectGraph, self).triples((s, p, o))
+
+    def remove(self, triple: Tuple[term]) -> SubjectGraph:
+        s, p, o = triple
+        if s is None:
+            s = self.subject
+        elif s != self.subject:
+            return self
+        super(SubjectGraph, self).remove((s, p, o))
+        return self
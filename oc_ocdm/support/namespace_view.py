@@ -0,0 +1,107 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2016, Silvio Peroni <essepuntato@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from rdflib import Graph
+from rdflib.namespace import NamespaceManager
+
+if TYPE_CHECKING:
+    from typing import Any, Optional, Tuple
+    from rdflib import URIRef
+
+
+class NamespaceManagerView(object):
+    """
+    A copy-on-write view over a namespace manager shared by many graphs (e.g. the one of an
+    entity set), which can be assigned as the namespace manager of each of them.
+
+    As long as no prefix gets bound through the view, every operation is performed by the shared
+    namespace manager, so that its bindings and its caches are reused by every graph. As soon as
+    a prefix gets bound (either explicitly or by a serializer which needs a new prefix, such as 'ns1'),
+    the view switches to a private copy of the shared namespace manager: the new binding only
+    affects the graph owning the view, while the shared namespace manager is left untouched.
+    """
+
+    __slots__ = ("_shared", "_private")
+
+    def __init__(self, shared: NamespaceManager) -> None:
+        """
+        Constructor of the ``NamespaceManagerView`` class.
+
+        :param shared: The shared namespace manager
+        :type shared: NamespaceManager
+        """
+        self._shared: NamespaceManager = shared
+        self._private: Optional[NamespaceManager] = None
+
+    @property
+    def is_private(self) -> bool:
+        """
+        Whether the view has switched to a private copy of the shared namespace manager.
+        """
+        return self._private is not None
+
+    def bind(self, prefix: Optional[str], namespace: Any, override: bool = True, replace: bool = False) -> None:
+        self._get_private().bind(prefix, namespace, override=override, replace=replace)
+
+    def compute_qname(self, uri: str, generate: bool = True) -> Tuple[str, URIRef, str]:
+        if self._private is None:
+            try:
+                return self._shared.compute_qname(uri, generate=False)
+            except KeyError:
+                if not generate:
+                    raise
+        # A new prefix must be generated for the namespace of the URI
+        return self._get_private().compute_qname(uri, generate=generate)
+
+    def compute_qname_strict(self, uri: str, generate: bool = True) -> Tuple[str, str, str]:
+        if self._private is None:
+            try:
+                return self._shared.compute_qname_strict(uri, generate=False)
+            except KeyError:
+                if not generate:
+                    raise
+        return self._get_private().compute_qname_strict(uri, generate=generate)
+
+    def qname(self, uri: str) -> str:
+        return NamespaceManager.qname(self, uri)
+
+    def qname_strict(self, uri: str) -> str:
+        return NamespaceManager.qname_strict(self, uri)
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("__") or name in self.__slots__:
+            # It avoids any recursion while the view is being unpickled
+            raise AttributeError(name)
+        return getattr(self._shared if self._private is None else self._private, name)
+
+    def __getstate__(self) -> Tuple[NamespaceManager, Optional[NamespaceManager]]:
+        return self._shared, self._private
+
+    def __setstate__(self, state: Tuple[NamespaceManager, Optional[NamespaceManager]]) -> None:
+        self._shared, self._private = state
+
+    def _get_private(self) -> NamespaceManager:
+        if self._private is None:
+            holder: Graph = Graph(bind_namespaces="none")
+            for prefix, namespace in self._shared.namespaces():
+                holder.store.bind(prefix, namespace)
+            self._private = NamespaceManager(holder, bind_namespaces="none")
+            self._private.reset()
+            holder.namespace_manager = self._private
+        return self._private
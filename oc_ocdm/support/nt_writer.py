@@ -0,0 +1,135 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2016, Silvio Peroni <essepuntato@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from rdflib import Literal
+
+if TYPE_CHECKING:
+    from typing import IO, Iterable, List, Tuple
+    from rdflib import ConjunctiveGraph, term
+
+# The size (in characters) of the chunks in which lines are written to the output stream
+DEFAULT_CHUNK_SIZE: int = 1 << 16
+
+
+def _literal_to_nt(literal: Literal) -> str:
+    encoded: str = literal.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"').replace("\r", "\\r")
+    if literal.language:
+        return f'"{encoded}"@{literal.language}'
+    elif literal.datatype:
+        return f'"{encoded}"^^<{literal.datatype}>'
+    else:
+        return f'"{encoded}"'
+
+
+def _term_to_nt(node: term) -> str:
+    if isinstance(node, Literal):
+        return _literal_to_nt(node)
+    return node.n3()
+
+
+def nt_line(triple: Tuple[term, term, term]) -> str:
+    """
+    It returns the N-Triples line that represents the given triple.
+
+    :param triple: The triple to be represented
+    :type triple: Tuple[term, term, term]
+    :return: The line, terminated by a newline character
+    """
+    s, p, o = triple
+    return f"{s.n3()} {p.n3()} {_term_to_nt(o)} .\n"
+
+
+def nq_line(quad: Tuple[term, term, term, term]) -> str:
+    """
+    It returns the N-Quads line that represents the given quad.
+
+    :param quad: The quad to be represented, whose last element is the identifier of its graph
+    :type quad: Tuple[term, term, term, term]
+    :return: The line, terminated by a newline character
+    """
+    s, p, o, c = quad
+    return f"{s.n3()} {p.n3()} {_term_to_nt(o)} {c.n3()} .\n"
+
+
+def _write_lines(lines: Iterable[str], stream: IO[bytes], chunk_size: int) -> int:
+    count: int = 0
+    chunk: List[str] = []
+    chunk_len: int = 0
+    for line in lines:
+        chunk.append(line)
+        chunk_len += len(line)
+        count += 1
+        if chunk_len >= chunk_size:
+            stream.write("".join(chunk).encode("utf-8"))
+            chunk = []
+            chunk_len = 0
+    if len(chunk) > 0:
+        stream.write("".join(chunk).encode("utf-8"))
+    return count
+
+
+def write_nt(triples: Iterable[Tuple[term, term, term]], stream: IO[bytes],
+             chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    It writes the given triples in the N-Triples format to a binary stream (e.g. a file or
+    a member of a ZIP archive). Lines are generated lazily and written in chunks, so that
+    the memory needed doesn't depend on the number of triples.
+
+    :param triples: The triples to be written
+    :type triples: Iterable[Tuple[term, term, term]]
+    :param stream: The binary stream where lines will be written using the UTF-8 encoding
+    :type stream: IO[bytes]
+    :param chunk_size: The (approximate) number of characters written to the stream at once
+    :type chunk_size: int, optional
+    :return: The number of written triples
+    """
+    return _write_lines((nt_line(triple) for triple in triples), stream, chunk_size)
+
+
+def write_nq(quads: Iterable[Tuple[term, term, term, term]], stream: IO[bytes],
+             chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    It writes the given quads in the N-Quads format to a binary stream (e.g. a file or
+    a member of a ZIP archive). Lines are generated lazily and written in chunks, so that
+    the memory needed doesn't depend on the number of quads.
+
+    :param quads: The quads to be written, whose last element is the identifier of their graph
+    :type quads: Iterable[Tuple[term, term, term, term]]
+    :param stream: The binary stream where lines will be written using the UTF-8 encoding
+    :type stream: IO[bytes]
+    :param chunk_size: The (approximate) number of characters written to the stream at once
+    :type chunk_size: int, optional
+    :return: The number of written quads
+    """
+    return _write_lines((nq_line(quad) for quad in quads), stream, chunk_size)
+
+
+def iter_quads(cg: ConjunctiveGraph) -> Iterable[Tuple[term, term, term, term]]:
+    """
+    It iterates over the quads of a ``ConjunctiveGraph``, graph by graph,
+    without copying them.
+
+    :param cg: The graph whose quads will be returned
+    :type cg: ConjunctiveGraph
+    :return: An iterable of quads, whose last element is the identifier of their graph
+    """
+    for context in cg.contexts():
+        identifier: term = context.identifier
+        for s, p, o in context:
+            yield s, p, o, identifier
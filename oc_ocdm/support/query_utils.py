@@ -19,21 +19,23 @@ from typing import TYPE_CHECKING
 
 
 if TYPE_CHECKING:
-    from typing import Tuple
+    from typing import Tuple, Optional, Iterable, List
     from rdflib import URIRef
     from rdflib.compare import IsomorphicGraph
     from oc_ocdm.abstract_entity import AbstractEntity
 
-from rdflib import Graph
+from rdflib import Graph, BNode
 from rdflib.compare import to_isomorphic, graph_diff
 
+from oc_ocdm.support.entity_graph import EntityGraph
+
 
 def get_delete_query(graph_iri: URIRef, data: Graph) -> Tuple[str, int]:
     num_of_statements: int = len(data)
     if num_of_statements <= 0:
         return "", 0
     else:
-        statements: str = data.serialize(format="nt11").replace('\n\n', '')
+        statements: str = _serialize_statements(data)
         delete_string: str = f"DELETE DATA {{ GRAPH <{graph_iri}> {{ {statements} }} }}"
         return delete_string, num_of_statements
 
@@ -43,35 +45,186 @@ def get_insert_query(graph_iri: URIRef, data: Graph) -> Tuple[str, int]:
     if num_of_statements <= 0:
         return "", 0
     else:
-        statements: str = data.serialize(format="nt11").replace('\n\n', '')
+        statements: str = _serialize_statements(data)
         insert_string: str = f"INSERT DATA {{ GRAPH <{graph_iri}> {{ {statements} }} }}"
         return insert_string, num_of_statements
 
 
+def _serialize_statements(data: Graph) -> str:
+    # Statements are sorted, since the order of the triples of a graph depends on the hashes of its terms
+    statements: List[str] = [line for line in data.serialize(format="nt11").splitlines() if line != ""]
+    return "".join(f"{statement}\n" for statement in sorted(statements))
+
+
+def _contains_bnodes(g: Graph) -> bool:
+    for triple in g:
+        for node in triple:
+            if isinstance(node, BNode):
+                return True
+    return False
+
+
+def get_graph_diff(first: Graph, second: Graph) -> Tuple[Graph, Graph]:
+    """
+    It computes the triples that are only contained in the first graph and the ones
+    that are only contained in the second graph.
+
+    Graphs containing blank nodes are compared through ``rdflib.compare.graph_diff``,
+    which canonicalizes them first. Otherwise (which is always the case for OCDM entities)
+    plain set differences are used, without paying the cost of the canonicalization.
+
+    :param first: The first graph
+    :type first: Graph
+    :param second: The second graph
+    :type second: Graph
+    :return: A tuple containing, respectively, the triples only found in the first graph
+      and the ones only found in the second graph
+    """
+    if _contains_bnodes(first) or _contains_bnodes(second):
+        first_iso: IsomorphicGraph = to_isomorphic(first)
+        second_iso: IsomorphicGraph = to_isomorphic(second)
+        if first_iso == second_iso:
+            # Both graphs have exactly the same content!
+            return Graph(), Graph()
+        in_both, in_first, in_second = graph_diff(first_iso, second_iso)
+        return in_first, in_second
+
+    first_triples: set = set(first)
+    second_triples: set = set(second)
+    in_first: Graph = Graph()
+    for triple in first_triples - second_triples:
+        in_first.add(triple)
+    in_second: Graph = Graph()
+    for triple in second_triples - first_triples:
+        in_second.add(triple)
+    return in_first, in_second
+
+
 def get_update_query(entity: AbstractEntity, entity_type: str = "graph") -> Tuple[str, int, int]:
+    to_be_deleted, preexisting_graph = _get_update_state(entity, entity_type)
+
+    # The result is cached as long as neither the entity graph, nor its preexisting graph,
+    # nor its deletion status change. This saves the computation of the same diff
+    # both when generating the provenance and when uploading the entity.
+    cache_key: Optional[Tuple] = _get_cache_key(entity, entity_type, to_be_deleted, preexisting_graph)
+    cached_result: Optional[Tuple[str, int, int]] = _get_cached_update_query(entity, entity_type, to_be_deleted,
+                                                                             cache_key)
+    if cached_result is not None:
+        return cached_result
+
+    result: Tuple[str, int, int] = _build_update_query(*_get_update_data(entity, entity_type, to_be_deleted,
+                                                                         preexisting_graph))
+    if cache_key is not None:
+        entity._update_query_cache = (*cache_key, result)
+    return result
+
+
+def get_insert_data(entity: AbstractEntity, entity_type: str = "graph") -> Optional[Tuple[URIRef, List[Tuple]]]:
+    """
+    It returns the triples that the update query of the entity (see ``get_update_query``) would add,
+    provided that it wouldn't remove any triple. This allows loading new data through means other
+    than SPARQL UPDATE (e.g. the SPARQL 1.1 Graph Store HTTP Protocol or a bulk loader).
+
+    :param entity: The entity whose changes must be returned
+    :type entity: AbstractEntity
+    :param entity_type: The type of the entity (i.e. "graph", "metadata" or "prov")
+    :type entity_type: str
+    :return: A tuple containing the IRI of the named graph of the entity and the triples to be added
+      (possibly none of them), or None if some triples must be removed as well
+    """
+    to_be_deleted, preexisting_graph = _get_update_state(entity, entity_type)
+    graph_iri, to_be_deleted, first, second, compute_diff = _get_update_data(entity, entity_type, to_be_deleted,
+                                                                             preexisting_graph)
+    if to_be_deleted:
+        return None if len(first) > 0 else (graph_iri, [])
+    if compute_diff:
+        first, second = get_graph_diff(_to_graph(first), _to_graph(second))
+    if len(first) > 0:
+        return None
+    return graph_iri, list(second)
+
+
+def get_update_queries(entities: Iterable[AbstractEntity], entity_type: str = "graph") -> List[Tuple[str, int, int]]:
+    """
+    It computes the update queries of many entities at once, exactly as ``get_update_query``
+    would do for each of them (results are cached in the same way).
+
+    :param entities: The entities whose update queries must be computed
+    :type entities: Iterable[AbstractEntity]
+    :param entity_type: The type of the entities (i.e. "graph", "metadata" or "prov")
+    :type entity_type: str
+    :return: A list containing, for each entity, the same tuple returned by ``get_update_query``
+    """
+    return [get_update_query(entity, entity_type) for entity in entities]
+
+
+def _get_update_state(entity: AbstractEntity, entity_type: str) -> Tuple[bool, Graph]:
     if entity_type in ["graph", "metadata"]:
         to_be_deleted: bool = entity.to_be_deleted
         preexisting_graph: Graph = entity.preexisting_graph
     elif entity_type == "prov":
         to_be_deleted: bool = False
         preexisting_graph: Graph = Graph(identifier=entity.g.identifier)
+    return to_be_deleted, preexisting_graph
+
+
+def _get_cache_key(entity: AbstractEntity, entity_type: str, to_be_deleted: bool,
+                   preexisting_graph: Graph) -> Optional[Tuple]:
+    if entity_type != "prov" and isinstance(entity.g, EntityGraph):
+        return entity.g.version, preexisting_graph, to_be_deleted
+    return None
 
+
+def _get_cached_update_query(entity: AbstractEntity, entity_type: str, to_be_deleted: bool,
+                             cache_key: Optional[Tuple]) -> Optional[Tuple[str, int, int]]:
+    if entity_type != "prov" and isinstance(entity.g, EntityGraph):
+        if not to_be_deleted and not entity.g.is_dirty:
+            # Nothing changed since the entity was created, imported or committed
+            return "", 0, 0
+        cache: Optional[Tuple] = entity._update_query_cache
+        if cache is not None and cache[0] == cache_key[0] and cache[1] is cache_key[1] and \
+                cache[2] == cache_key[2]:
+            return cache[3]
+    return None
+
+
+def _get_update_data(entity: AbstractEntity, entity_type: str, to_be_deleted: bool,
+                     preexisting_graph: Graph) -> Tuple:
+    # Everything which is needed to build the update query, without any reference to the entity
     if to_be_deleted:
-        delete_string, removed_triples = get_delete_query(entity.g.identifier, preexisting_graph)
+        return entity.g.identifier, True, preexisting_graph, None, False
+    elif entity_type != "prov" and isinstance(entity.g, EntityGraph):
+        # Changes were recorded while they were being made: there's no need to diff the graphs
+        removed, added = entity.g.get_changes()
+        return entity.g.identifier, False, removed, added, False
+    else:
+        return entity.g.identifier, False, preexisting_graph, entity.g, True
+
+
+def _to_graph(triples: Iterable[Tuple]) -> Graph:
+    if isinstance(triples, Graph):
+        return triples
+    graph: Graph = Graph()
+    for triple in triples:
+        graph.add(triple)
+    return graph
+
+
+def _build_update_query(graph_iri: URIRef, to_be_deleted: bool, first: Iterable[Tuple],
+                        second: Optional[Iterable[Tuple]], compute_diff: bool) -> Tuple[str, int, int]:
+    if to_be_deleted:
+        delete_string, removed_triples = get_delete_query(graph_iri, _to_graph(first))
         if delete_string != "":
             return delete_string, 0, removed_triples
         else:
             return "", 0, 0
     else:
-        preexisting_iso: IsomorphicGraph = to_isomorphic(preexisting_graph)
-        current_iso: IsomorphicGraph = to_isomorphic(entity.g)
-        if preexisting_iso == current_iso:
-            # Both graphs have exactly the same content!
-            return "", 0, 0
-
-        in_both, in_first, in_second = graph_diff(preexisting_iso, current_iso)
-        delete_string, removed_triples = get_delete_query(entity.g.identifier, in_first)
-        insert_string, added_triples = get_insert_query(entity.g.identifier, in_second)
+        if compute_diff:
+            in_first, in_second = get_graph_diff(_to_graph(first), _to_graph(second))
+        else:
+            in_first, in_second = _to_graph(first), _to_graph(second)
+        delete_string, removed_triples = get_delete_query(graph_iri, in_first)
+        insert_string, added_triples = get_insert_query(graph_iri, in_second)
 
         if delete_string != "" and insert_string != "":
             return delete_string + '; ' + insert_string, added_triples, removed_triples
@@ -0,0 +1,216 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2016, Silvio Peroni <essepuntato@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+from __future__ import annotations
+
+import threading
+from http.client import HTTPConnection, HTTPSConnection, HTTPException
+from typing import TYPE_CHECKING
+from urllib.parse import urlencode, urlsplit
+
+from rdflib import Graph
+
+if TYPE_CHECKING:
+    from typing import Dict, List, Optional, Tuple
+    from urllib.parse import SplitResult
+
+# Formats accepted for the results of CONSTRUCT queries, from the fastest to parse to the slowest one
+rdf_accept: str = "application/n-triples, text/plain;q=0.9, text/turtle;q=0.8, application/rdf+xml;q=0.7"
+content_type_to_format: Dict[str, str] = {
+    "application/n-triples": "nt",
+    "text/plain": "nt",
+    "text/turtle": "turtle",
+    "application/x-turtle": "turtle",
+    "application/rdf+xml": "xml",
+    "application/ld+json": "json-ld"
+}
+
+
+class SparqlHTTPError(IOError):
+    """The error raised when a SPARQL endpoint answers with an HTTP error status."""
+
+    def __init__(self, status: int, reason: str, body: str = "") -> None:
+        super(SparqlHTTPError, self).__init__(f"HTTP Error {status}: {reason}. {body}".strip())
+        self.status: int = status
+
+
+class SparqlSession(object):
+    """
+    A minimal HTTP client for a single SPARQL endpoint, which keeps a persistent (keep-alive)
+    connection for each thread using it. Differently from ``SPARQLWrapper``, which opens a new
+    connection for every request, it avoids paying the TCP (and TLS) handshake each time,
+    and it can be safely shared by the threads of a pool.
+    """
+
+    def __init__(self, endpoint: str, timeout: float = 60.0, headers: Dict[str, str] = None) -> None:
+        """
+        Constructor of the ``SparqlSession`` class.
+
+        :param endpoint: The URL of the SPARQL endpoint
+        :type endpoint: str
+        :param timeout: The number of seconds after which a request is aborted
+        :type timeout: float
+        :param headers: Additional HTTP headers to be sent with every request
+        :type headers: Dict[str, str], optional
+        :raises ValueError: if the scheme of ``endpoint`` is neither 'http' nor 'https'.
+        """
+        url: SplitResult = urlsplit(endpoint)
+        if url.scheme not in ("http", "https"):
+            raise ValueError("endpoint must be an 'http' or 'https' URL!")
+
+        self.endpoint: str = endpoint
+        self.timeout: float = timeout
+        self.headers: Dict[str, str] = dict(headers) if headers is not None else {}
+        self._url: SplitResult = url
+        self._local: threading.local = threading.local()
+        self._connections: List[HTTPConnection] = []
+        self._lock: threading.Lock = threading.Lock()
+
+    def construct(self, query: str) -> Graph:
+        """
+        It runs a CONSTRUCT (or DESCRIBE) query and it parses its results.
+
+        :param query: The SPARQL query
+        :type query: str
+        :raises SparqlHTTPError: if the endpoint answers with an HTTP error status.
+        :return: The graph returned by the endpoint
+        """
+        body, content_type = self.post({"query": query}, accept=rdf_accept)
+        graph: Graph = Graph()
+        if len(body) > 0:
+            graph.parse(data=body, format=content_type_to_format.get(content_type, "nt"))
+        return graph
+
+    def update(self, update: str) -> None:
+        """
+        It runs a SPARQL UPDATE request.
+
+        :param update: The SPARQL update request
+        :type update: str
+        :raises SparqlHTTPError: if the endpoint answers with an HTTP error status.
+        :return: None
+        """
+        self.post({"update": update})
+
+    def post_graph(self, graph_iri: str, data: bytes, content_type: str = "application/n-triples") -> None:
+        """
+        It adds the given statements to a named graph, according to the SPARQL 1.1 Graph Store
+        HTTP Protocol. In this case, the endpoint of the session must be the URL of the graph store
+        (e.g. 'http://localhost:3030/dataset/data' for Apache Jena Fuseki).
+
+        :param graph_iri: The IRI of the named graph
+        :type graph_iri: str
+        :param data: The serialized statements
+        :type data: bytes
+        :param content_type: The media type of ``data``
+        :type content_type: str
+        :raises SparqlHTTPError: if the graph store answers with an HTTP error status.
+        :return: None
+        """
+        self.request("POST", data, {"Content-Type": content_type}, {"graph": str(graph_iri)})
+
+    def post(self, fields: Dict[str, str], accept: str = "*/*") -> Tuple[bytes, str]:
+        """
+        It sends a form to the endpoint, as SPARQL queries and updates are sent via POST.
+
+        :param fields: The fields of the form
+        :type fields: Dict[str, str]
+        :param accept: The value of the 'Accept' HTTP header
+        :type accept: str
+        :raises SparqlHTTPError: if the endpoint answers with an HTTP error status.
+        :return: The body of the response, together with its media type
+        """
+        return self.request("POST", urlencode(fields).encode("utf-8"),
+                            {"Content-Type": "application/x-www-form-urlencoded", "Accept": accept})
+
+    def request(self, method: str, body: Optional[bytes] = None, headers: Dict[str, str] = None,
+                params: Dict[str, str] = None) -> Tuple[bytes, str]:
+        """
+        It sends a request to the endpoint through the connection of the current thread.
+        A connection dropped by the server while idle is transparently reopened once.
+
+        :param method: The HTTP method
+        :type method: str
+        :param body: The body of the request
+        :type body: bytes, optional
+        :param headers: The HTTP headers of the request (in addition to the ones of the session)
+        :type headers: Dict[str, str], optional
+        :param params: Parameters to be added to the query string of the endpoint URL
+        :type params: Dict[str, str], optional
+        :raises SparqlHTTPError: if the endpoint answers with an HTTP error status.
+        :return: The body of the response, together with its media type
+        """
+        target: str = self._url.path or "/"
+        query_string: str = "&".join(part for part in (self._url.query, urlencode(params or {})) if part != "")
+        if query_string != "":
+            target += "?" + query_string
+        all_headers: Dict[str, str] = {**self.headers, **(headers or {})}
+
+        for attempt in range(2):
+            connection: HTTPConnection = self._get_connection()
+            try:
+                connection.request(method, target, body=body, headers=all_headers)
+                response = connection.getresponse()
+                data: bytes = response.read()
+                break
+            except (HTTPException, ConnectionError):
+                # Idle keep-alive connections can be closed by the server at any time
+                self._drop_connection()
+                if attempt > 0:
+                    raise
+
+        if response.getheader("Connection", "").lower() == "close":
+            self._drop_connection()
+        if response.status >= 400:
+            raise SparqlHTTPError(response.status, response.reason, data.decode("utf-8", errors="replace")[:500])
+        content_type: str = (response.getheader("Content-Type") or "").split(";")[0].strip().lower()
+        return data, content_type
+
+    def close(self) -> None:
+        """
+        It closes every connection opened by the session.
+
+        :return: None
+        """
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    def __enter__(self) -> SparqlSession:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def _get_connection(self) -> HTTPConnection:
+        connection: Optional[HTTPConnection] = getattr(self._local, "connection", None)
+        if connection is None:
+            connection_class = HTTPSConnection if self._url.scheme == "https" else HTTPConnection
+            connection = connection_class(self._url.hostname, self._url.port, timeout=self.timeout)
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    def _drop_connection(self) -> None:
+        connection: Optional[HTTPConnection] = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+            with self._lock:
+                if connection in self._connections:
+                    self._connections.remove(connection)
@@ -18,10 +18,11 @@ from __future__ import annotations
 import os
 import re
 from datetime import datetime
-from typing import TYPE_CHECKING
+from functools import lru_cache
+from typing import TYPE_CHECKING, NamedTuple
 
 if TYPE_CHECKING:
-    from typing import Optional, List, Tuple, Match, Dict, Set
+    from typing import Optional, List, Tuple, Match, Pattern, Dict, Set
     from rdflib import URIRef, Graph
     from oc_ocdm.graph.entities.bibliographic.bibliographic_resource import BibliographicResource
     from oc_ocdm.graph.entities.bibliographic.responsible_agent import ResponsibleAgent
@@ -170,92 +171,91 @@ def is_string_empty(string: str) -> bool:
 # Variable used in several functions
 entity_regex: str = r"^(.+)/([a-z][a-z])/(0[1-9]+0)?([1-9][0-9]*)$"
 prov_regex: str = r"^(.+)/([a-z][a-z])/(0[1-9]+0)?([1-9][0-9]*)/prov/([a-z][a-z])/([1-9][0-9]*)$"
+dataset_regex: str = r"^.+/[0-9]+(-[0-9]+)?(/[0-9]+)?$"
 
+_entity_pattern: Pattern = re.compile(entity_regex)
+_prov_pattern: Pattern = re.compile(prov_regex)
+_dataset_pattern: Pattern = re.compile(dataset_regex)
 
-def _get_match(regex: str, group: int, string: str) -> str:
-    match: Match = re.match(regex, string)
-    if match is not None:
-        return match.group(group)
-    else:
-        return ""
 
+class _IriParts(NamedTuple):
+    is_prov: bool
+    base_iri: Optional[str] = ""
+    short_name: Optional[str] = ""
+    prefix: Optional[str] = ""
+    count: Optional[str] = ""
+    subject_short_name: Optional[str] = ""
+    subject_prefix: Optional[str] = ""
+    subject_count: Optional[str] = ""
 
-def get_base_iri(res: URIRef) -> str:
-    string_iri: str = str(res)
+
+@lru_cache(maxsize=65536)
+def _parse_iri(string_iri: str) -> _IriParts:
+    # Every helper below reads from the same record, so that each IRI gets matched just once
     if "/prov/" in string_iri:
-        return _get_match(prov_regex, 1, string_iri)
+        match: Optional[Match] = _prov_pattern.match(string_iri)
+        if match is None:
+            return _IriParts(True)
+        base_iri, subject_short_name, subject_prefix, subject_count, short_name, count = match.groups()
+        return _IriParts(True, base_iri, short_name, "", count, subject_short_name, subject_prefix, subject_count)
     else:
-        return _get_match(entity_regex, 1, string_iri)
+        match: Optional[Match] = _entity_pattern.match(string_iri)
+        if match is None:
+            return _IriParts(False)
+        base_iri, short_name, prefix, count = match.groups()
+        return _IriParts(False, base_iri, short_name, prefix, count)
+
+
+def get_base_iri(res: URIRef) -> str:
+    return _parse_iri(str(res)).base_iri
 
 
 def get_short_name(res: URIRef) -> str:
-    string_iri: str = str(res)
-    if "/prov/" in string_iri:
-        return _get_match(prov_regex, 5, string_iri)
-    else:
-        return _get_match(entity_regex, 2, string_iri)
+    return _parse_iri(str(res)).short_name
 
 
 def get_prov_subject_short_name(prov_res: URIRef) -> str:
-    string_iri: str = str(prov_res)
-    if "/prov/" in string_iri:
-        return _get_match(prov_regex, 2, string_iri)
-    else:
-        return ""  # non-provenance entities do not have a prov_subject!
+    # Non-provenance entities do not have a prov_subject!
+    return _parse_iri(str(prov_res)).subject_short_name
 
 
 def get_prefix(res: URIRef) -> str:
-    string_iri: str = str(res)
-    if "/prov/" in string_iri:
-        return ""  # provenance entities cannot have a supplier prefix
-    else:
-        return _get_match(entity_regex, 3, string_iri)
+    # Provenance entities cannot have a supplier prefix
+    return _parse_iri(str(res)).prefix
 
 
 def get_prov_subject_prefix(prov_res: URIRef) -> str:
-    string_iri: str = str(prov_res)
-    if "/prov/" in string_iri:
-        return _get_match(prov_regex, 3, string_iri)
-    else:
-        return ""  # non-provenance entities do not have a prov_subject!
+    # Non-provenance entities do not have a prov_subject!
+    return _parse_iri(str(prov_res)).subject_prefix
 
 
 def get_count(res: URIRef) -> str:
-    string_iri: str = str(res)
-    if "/prov/" in string_iri:
-        return _get_match(prov_regex, 6, string_iri)
-    else:
-        return _get_match(entity_regex, 4, string_iri)
+    return _parse_iri(str(res)).count
 
 
 def get_prov_subject_count(prov_res: URIRef) -> str:
-    string_iri: str = str(prov_res)
-    if "/prov/" in string_iri:
-        return _get_match(prov_regex, 4, string_iri)
-    else:
-        return ""  # non-provenance entities do not have a prov_subject!
+    # Non-provenance entities do not have a prov_subject!
+    return _parse_iri(str(prov_res)).subject_count
 
 
 def get_resource_number(res: URIRef) -> int:
-    string_iri: str = str(res)
-    if "/prov/" in string_iri:
-        return int(_get_match(prov_regex, 4, string_iri))
+    parts: _IriParts = _parse_iri(str(res))
+    if parts.is_prov:
+        return int(parts.subject_count)
     else:
-        return int(_get_match(entity_regex, 4, string_iri))
+        return int(parts.count)
+
+
+def _ceil_to_multiple(number: int, step: int) -> int:
+    # The smallest multiple of 'step' which is greater than or equal to 'number'
+    return -(-number // step) * step
 
 
 def find_local_line_id(res: URIRef, n_file_item: int = 1) -> int:
     cur_number: int = get_resource_number(res)
 
-    cur_file_split: int = 0
-    while True:
-        if cur_number > cur_file_split:
-            cur_file_split += n_file_item
-        else:
-            cur_file_split -= n_file_item
-            break
-
-    return cur_number - cur_file_split
+    # The position of the resource among the ones stored in the same file
+    return (cur_number - 1) % n_file_item + 1
 
 
 def find_paths(res: URIRef, base_dir: str, base_iri: str, default_dir: str, dir_split: int,
@@ -277,23 +277,13 @@ def find_paths(res: URIRef, base_dir: str, base_iri: str, default_dir: str, dir_
         cur_number: int = get_resource_number(res)
 
         # Find the correct file number where to save the resources
-        cur_file_split: int = 0
-        while True:
-            if cur_number > cur_file_split:
-                cur_file_split += n_file_item
-            else:
-                break
+        cur_file_split: int = _ceil_to_multiple(cur_number, n_file_item)
 
         # The data have been split in multiple directories and it is not something related
         # with the provenance data of the whole corpus (e.g. provenance agents)
         if dir_split and not string_iri.startswith(base_iri + "prov/"):
             # Find the correct directory number where to save the file
-            cur_split: int = 0
-            while True:
-                if cur_number > cur_split:
-                    cur_split += dir_split
-                else:
-                    break
+            cur_split: int = _ceil_to_multiple(cur_number, dir_split)
 
             if "/prov/" in string_iri:  # provenance file of a bibliographic entity
                 subj_short_name: str = get_prov_subject_short_name(res)
@@ -365,4 +355,4 @@ def has_supplier_prefix(res: URIRef, base_iri: str) -> bool:
 
 def is_dataset(res: URIRef) -> bool:
     string_iri: str = str(res)
-    return re.search(r"^.+/[0-9]+(-[0-9]+)?(/[0-9]+)?$", string_iri) is None
+    return _dataset_pattern.search(string_iri) is None
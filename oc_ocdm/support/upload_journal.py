@@ -0,0 +1,189 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2016, Silvio Peroni <essepuntato@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+from __future__ import annotations
+
+import json
+import os
+import zlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Iterable, Iterator, Optional, Set, TextIO, Tuple
+
+
+class UploadJournal(object):
+    """
+    A durable, append-only journal of the changes to be uploaded to a triplestore.
+
+    Each change (e.g. the update query of an entity) is appended as a pending record, which is
+    acknowledged by a later record once the triplestore has accepted it. Records are lines made
+    of a CRC-32 checksum followed by a JSON array, so that a record which was only partially
+    written (e.g. because the process crashed) or which got corrupted is recognized and ignored
+    when the journal is read again. The changes which were never acknowledged can then be
+    uploaded again, in the same order in which they were appended.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Constructor of the ``UploadJournal`` class. The journal is created if it doesn't exist yet.
+
+        :param path: The path of the file containing the journal
+        :type path: str
+        """
+        self.path: str = path
+        self._file: Optional[TextIO] = None
+        self._next_id: int = 0
+        for record in self._iter_records():
+            if record[0] == "P":
+                self._next_id = max(self._next_id, record[1] + 1)
+
+    def append(self, graph_iri: Optional[str], data: str, n_added: int, n_removed: int) -> int:
+        """
+        It appends a pending change to the journal.
+
+        :param graph_iri: The IRI of the named graph where the statements in ``data`` must be added,
+          or None if ``data`` is a SPARQL update query
+        :type graph_iri: str, optional
+        :param data: Either a SPARQL update query or some statements in the N-Triples format
+        :type data: str
+        :param n_added: The number of statements added by the change
+        :type n_added: int
+        :param n_removed: The number of statements removed by the change
+        :type n_removed: int
+        :return: The identifier of the change inside the journal
+        """
+        item_id: int = self._next_id
+        self._next_id += 1
+        self._write_record(["P", item_id, None if graph_iri is None else str(graph_iri), data, n_added, n_removed])
+        return item_id
+
+    def acknowledge(self, item_ids: Iterable[int]) -> None:
+        """
+        It marks some changes as uploaded, so that they won't be uploaded again.
+
+        :param item_ids: The identifiers of the uploaded changes
+        :type item_ids: Iterable[int]
+        :return: None
+        """
+        item_ids = list(item_ids)
+        if len(item_ids) > 0:
+            self._write_record(["A", item_ids])
+
+    def iter_pending(self) -> Iterator[Tuple[int, Optional[str], str, int, int]]:
+        """
+        It iterates over the changes which were not acknowledged yet, in the order in which
+        they were appended. Only their identifiers are kept in memory.
+
+        :return: An iterator of tuples containing, respectively, the identifier of the change,
+          the IRI of its named graph (if any), its data and the numbers of added and removed statements
+        """
+        self.sync()
+        acknowledged: Set[int] = set()
+        for record in self._iter_records():
+            if record[0] == "A":
+                acknowledged.update(record[1])
+        for record in self._iter_records():
+            if record[0] == "P" and record[1] not in acknowledged:
+                yield tuple(record[1:])
+
+    def compact(self) -> int:
+        """
+        It rewrites the journal, keeping just the changes which were not acknowledged yet.
+        If there isn't any of them, the journal file is removed.
+
+        :return: The number of changes which were not acknowledged yet
+        """
+        tmp_path: str = self.path + ".tmp"
+        count: int = 0
+        with open(tmp_path, 'wt', encoding='utf-8') as tmp_file:
+            for item_id, graph_iri, data, n_added, n_removed in self.iter_pending():
+                tmp_file.write(self._encode_record(["P", item_id, graph_iri, data, n_added, n_removed]))
+                count += 1
+            tmp_file.flush()
+            os.fsync(tmp_file.fileno())
+        self.close()
+        if count > 0:
+            os.replace(tmp_path, self.path)
+        else:
+            os.remove(tmp_path)
+            if os.path.isfile(self.path):
+                os.remove(self.path)
+        return count
+
+    def sync(self) -> None:
+        """
+        It makes sure that every record appended so far is durably stored on disk.
+
+        :return: None
+        """
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        """
+        It syncs and closes the journal file. It is reopened if more records are appended.
+
+        :return: None
+        """
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> UploadJournal:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def _write_record(self, record: list) -> None:
+        if self._file is None:
+            dir_path: str = os.path.dirname(self.path)
+            if dir_path != "" and not os.path.isdir(dir_path):
+                os.makedirs(dir_path)
+            torn_record: bool = False
+            if os.path.isfile(self.path) and os.path.getsize(self.path) > 0:
+                with open(self.path, 'rb') as journal:
+                    journal.seek(-1, os.SEEK_END)
+                    torn_record = journal.read(1) != b'\n'
+            self._file = open(self.path, 'at', encoding='utf-8')
+            if torn_record:
+                # New records must not be appended to a partially written one
+                self._file.write('\n')
+        self._file.write(self._encode_record(record))
+        self._file.flush()
+
+    @staticmethod
+    def _encode_record(record: list) -> str:
+        payload: str = json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+        return f"{zlib.crc32(payload.encode('utf-8')):08x} {payload}\n"
+
+    def _iter_records(self) -> Iterator[list]:
+        if not os.path.isfile(self.path):
+            return
+        with open(self.path, 'rt', encoding='utf-8') as journal:
+            for line in journal:
+                if not line.endswith('\n') or len(line) < 10 or line[8] != ' ':
+                    # The last record could have been partially written
+                    continue
+                payload: str = line[9:-1]
+                try:
+                    if int(line[:8], 16) != zlib.crc32(payload.encode('utf-8')):
+                        continue
+                    yield json.loads(payload)
+                except ValueError:
+                    continue
@@ -15,6 +15,7 @@
 # SOFTWARE.
 import os
 import unittest
+from shutil import rmtree
 
 from oc_ocdm.counter_handler.filesystem_counter_handler import FilesystemCounterHandler
 
@@ -174,6 +175,128 @@ class TestFilesystemCounterHandler(unittest.TestCase):
         self.assertRaises(ValueError, self.counter_handler.increment_metadata_counter, "xyz", dataset_name)
         self.assertRaises(ValueError, self.counter_handler.increment_metadata_counter, "di", None)
 
+    def test_reserve_counter(self):
+        info_dir = self.info_dir + 'reserve' + os.sep
+        if os.path.exists(info_dir):
+            rmtree(info_dir)
+        for write_back in (False, True):
+            with self.subTest(write_back=write_back):
+                with FilesystemCounterHandler(info_dir, write_back=write_back, block_size=5) as counter_handler:
+                    counter_handler.set_counter(99, "br")
+                    self.assertEqual(100, counter_handler.reserve_counter(10, "br"))
+                    self.assertEqual(110, counter_handler.increment_counter("br"))
+                    self.assertEqual(1, counter_handler.reserve_counter(3, "br", "se", 2))
+                    self.assertRaises(ValueError, counter_handler.reserve_counter, 0, "br")
+                counter_handler = FilesystemCounterHandler(info_dir)
+                self.assertEqual(110, counter_handler.read_counter("br"))
+                self.assertEqual(3, counter_handler.read_counter("br", "se", 2))
+                rmtree(info_dir)
+
+    def test_read_and_set_counters(self):
+        info_dir = self.info_dir + 'batch' + os.sep
+        if os.path.exists(info_dir):
+            rmtree(info_dir)
+        for mode in ({}, {"write_back": True}, {"use_mmap": True}):
+            with self.subTest(**mode):
+                with FilesystemCounterHandler(info_dir, **mode) as counter_handler:
+                    counter_handler.set_counter(4, "br", "se", 3)
+                    counter_handler.set_counters({1: 2, 5: 12345, 3: 7}, "br", "se")
+                    self.assertDictEqual({1: 2, 2: 0, 3: 7, 5: 12345, 9: 0},
+                                         counter_handler.read_counters("br", "se", [9, 5, 3, 2, 1]))
+                    self.assertRaises(ValueError, counter_handler.set_counters, {0: 1}, "br", "se")
+                counter_handler = FilesystemCounterHandler(info_dir)
+                self.assertEqual(12345, counter_handler.read_counter("br", "se", 5))
+                self.assertEqual(7, counter_handler.read_counter("br", "se", 3))
+                self.assertRaises(ValueError, counter_handler.read_counters, "br", "se", [0])
+                rmtree(info_dir)
+
+    def test_write_back(self):
+        info_dir = self.info_dir + 'write_back' + os.sep
+        if os.path.exists(info_dir):
+            rmtree(info_dir)
+        with FilesystemCounterHandler(info_dir, write_back=True, block_size=10) as counter_handler:
+            for _ in range(15):
+                counter_handler.increment_counter("br")
+            counter_handler.increment_counter("br", "se", 3)
+            counter_handler.set_counter(5, "br", "se", 1)
+            self.assertEqual(15, counter_handler.read_counter("br"))
+            self.assertEqual(1, counter_handler.read_counter("br", "se", 3))
+            # Nothing was written to the counter files yet:
+            self.assertEqual(0, counter_handler._read_number(counter_handler._get_prov_path("br"), 1)[0])
+
+        counter_handler = FilesystemCounterHandler(info_dir)
+        self.assertEqual(15, counter_handler.read_counter("br"))
+        self.assertEqual(5, counter_handler.read_counter("br", "se", 1))
+        self.assertEqual(0, counter_handler.read_counter("br", "se", 2))
+        self.assertEqual(1, counter_handler.read_counter("br", "se", 3))
+        self.assertFalse(os.path.exists(info_dir + FilesystemCounterHandler._journal_name))
+        rmtree(info_dir)
+
+    def test_write_back_recovery(self):
+        info_dir = self.info_dir + 'recovery' + os.sep
+        if os.path.exists(info_dir):
+            rmtree(info_dir)
+        counter_handler = FilesystemCounterHandler(info_dir, write_back=True, block_size=10)
+        for _ in range(3):
+            counter_handler.increment_counter("br")
+        counter_handler.increment_counter("br", "se", 2)
+        counter_handler.increment_counter("br", "se", 2)
+        # The handler is abandoned without flushing, as if the process crashed:
+        counter_handler._journal.close()
+
+        counter_handler = FilesystemCounterHandler(info_dir)
+        # The whole reserved block is skipped, so that no identifier is handed out twice:
+        self.assertEqual(10, counter_handler.read_counter("br"))
+        self.assertEqual(2, counter_handler.read_counter("br", "se", 2))
+        self.assertFalse(os.path.exists(info_dir + FilesystemCounterHandler._journal_name))
+        rmtree(info_dir)
+
+
+    def test_use_mmap(self):
+        info_dir = self.info_dir + 'mmap' + os.sep
+        if os.path.exists(info_dir):
+            rmtree(info_dir)
+        with FilesystemCounterHandler(info_dir, use_mmap=True) as counter_handler:
+            with self.subTest("Increment"):
+                for _ in range(15):
+                    counter_handler.increment_counter("br")
+                self.assertEqual(15, counter_handler.read_counter("br"))
+            with self.subTest("Geometric growth"):
+                self.assertEqual(0, counter_handler.read_counter("br", "se", 5))
+                self.assertEqual(1, counter_handler.increment_counter("br", "se", 5))
+                counter_handler.set_counter(7, "br", "se", 6)
+                with open(counter_handler._get_prov_path("br"), 'rb') as file:
+                    self.assertEqual(10 * 3, len(file.read()))
+                counter_handler.set_counter(1, "br", "se", 11)
+                with open(counter_handler._get_prov_path("br"), 'rb') as file:
+                    self.assertEqual(20 * 3, len(file.read()))
+            with self.subTest("Line length increase"):
+                counter_handler.set_counter(123456, "br", "se", 1)
+                self.assertEqual(123456, counter_handler.read_counter("br", "se", 1))
+                self.assertEqual(7, counter_handler.read_counter("br", "se", 6))
+            with self.subTest("Padding removal"):
+                counter_handler.flush()
+                with open(counter_handler._get_prov_path("br"), 'rb') as file:
+                    self.assertEqual(11 * 7, len(file.read()))
+                self.assertEqual(1, counter_handler.read_counter("br", "se", 11))
+                self.assertEqual(0, counter_handler.read_counter("br", "se", 12))
+            with self.subTest("Close"):
+                counter_handler.close()
+                self.assertDictEqual({}, counter_handler._mapped_files)
+                # Files are mapped again when needed:
+                self.assertEqual(1, counter_handler.increment_counter("br", "se", 12))
+            self.assertRaises(ValueError, counter_handler.set_counter, 1, "br", "se", 0)
+
+        counter_handler = FilesystemCounterHandler(info_dir)
+        self.assertEqual(15, counter_handler.read_counter("br"))
+        self.assertEqual(123456, counter_handler.read_counter("br", "se", 1))
+        self.assertEqual(1, counter_handler.read_counter("br", "se", 5))
+        self.assertEqual(7, counter_handler.read_counter("br", "se", 6))
+        self.assertEqual(1, counter_handler.read_counter("br", "se", 12))
+        self.assertEqual(0, counter_handler.read_counter("br", "se", 13))
+        self.assertRaises(ValueError, FilesystemCounterHandler, info_dir, write_back=True, use_mmap=True)
+        rmtree(info_dir)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -152,6 +152,24 @@ class TestFilesystemCounterHandler(unittest.TestCase):
             self.assertRaises(ValueError, self.counter_handler.increment_counter, "br", "xyz")
             self.assertRaises(ValueError, self.counter_handler.increment_counter, "br", "se", -1)
 
+    def test_reserve_counter(self):
+        with self.subTest("Reserve BR counters"):
+            count = 99
+            self.counter_handler.entity_counters["br"] = count
+
+            result = self.counter_handler.reserve_counter(10, "br")
+            self.assertEqual(result, count + 1)
+            self.assertEqual(self.counter_handler.entity_counters["br"], count + 10)
+        with self.subTest("Reserve SE counters"):
+            identifier = 5
+            result = self.counter_handler.reserve_counter(3, "br", "se", identifier)
+            self.assertEqual(result, 1)
+            self.assertEqual(self.counter_handler.prov_counters["br"]["se"][identifier - 1], 3)
+        with self.subTest("Wrong inputs"):
+            self.assertRaises(ValueError, self.counter_handler.reserve_counter, 0, "br")
+            self.assertRaises(ValueError, self.counter_handler.reserve_counter, 1, "xyz")
+            self.assertRaises(ValueError, self.counter_handler.reserve_counter, 1, "br", "se", -1)
+
     def test_set_metadata_counter(self):
         dataset_name: str = "http://dataset/"
         with self.subTest("Set DI counter"):
@@ -0,0 +1,99 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2016, Silvio Peroni <essepuntato@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+import os
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from shutil import rmtree
+
+from oc_ocdm.counter_handler.shared_filesystem_counter_handler import SharedFilesystemCounterHandler
+
+info_dir = os.path.join('.', 'info_dir', 'shared') + os.sep
+
+
+def mint_identifiers(n: int):
+    with SharedFilesystemCounterHandler(info_dir, lease_size=7) as counter_handler:
+        identifiers = [counter_handler.increment_counter("br") for _ in range(n)]
+        identifiers.append(counter_handler.reserve_counter(10, "br"))
+        snapshots = [counter_handler.increment_counter("br", "se", 1) for _ in range(n)]
+    return identifiers, snapshots
+
+
+class TestSharedFilesystemCounterHandler(unittest.TestCase):
+    def setUp(self):
+        if os.path.exists(info_dir):
+            rmtree(info_dir)
+
+    def tearDown(self):
+        if os.path.exists(info_dir):
+            rmtree(info_dir)
+
+    def test_increment_counter(self):
+        counter_handler = SharedFilesystemCounterHandler(info_dir, lease_size=5)
+        with self.subTest("Leased identifiers"):
+            self.assertListEqual([1, 2, 3], [counter_handler.increment_counter("br") for _ in range(3)])
+            self.assertEqual(5, counter_handler.read_counter("br"))
+        with self.subTest("Other handler"):
+            other_handler = SharedFilesystemCounterHandler(info_dir, lease_size=5)
+            self.assertEqual(6, other_handler.increment_counter("br"))
+            self.assertEqual(4, counter_handler.increment_counter("br"))
+            self.assertEqual(10, counter_handler.read_counter("br"))
+        with self.subTest("Reserved range"):
+            self.assertEqual(11, counter_handler.reserve_counter(8, "br"))
+            self.assertEqual(18, counter_handler.read_counter("br"))
+        with self.subTest("Snapshot counters"):
+            self.assertEqual(1, counter_handler.increment_counter("br", "se", 3))
+            self.assertEqual(2, other_handler.increment_counter("br", "se", 3))
+            self.assertEqual(2, counter_handler.read_counter("br", "se", 3))
+        with self.subTest("Set counter"):
+            counter_handler.set_counter(30, "br")
+            self.assertEqual(31, counter_handler.increment_counter("br"))
+        with self.subTest("Flush"):
+            counter_handler.flush()
+            other_handler.flush()
+            self.assertEqual(31, counter_handler.read_counter("br"))
+
+    def test_increment_counters(self):
+        counter_handler = SharedFilesystemCounterHandler(info_dir, lease_size=5)
+        other_handler = SharedFilesystemCounterHandler(info_dir, lease_size=5)
+        with self.subTest("Snapshot counters"):
+            counter_handler.set_counter(3, "br", "se", 1)
+            self.assertDictEqual({1: 4, 2: 2}, counter_handler.increment_counters({1: 1, 2: 2}, "br", "se"))
+            self.assertDictEqual({1: 5, 5: 1}, other_handler.increment_counters({1: 1, 5: 1}, "br", "se"))
+            self.assertDictEqual({1: 5, 2: 2, 5: 1}, counter_handler.read_counters("br", "se", [1, 2, 5]))
+            self.assertRaises(ValueError, counter_handler.increment_counters, {1: 0}, "br", "se")
+            self.assertRaises(ValueError, counter_handler.increment_counters, {0: 1}, "br", "se")
+        with self.subTest("Leased counters"):
+            self.assertDictEqual({1: 2}, counter_handler.increment_counters({1: 2}, "br"))
+            self.assertDictEqual({1: 6}, other_handler.increment_counters({1: 1}, "br"))
+            self.assertEqual(10, counter_handler.read_counter("br"))
+
+    def test_many_processes(self):
+        n_processes, n = 4, 50
+        with ProcessPoolExecutor(n_processes) as executor:
+            results = list(executor.map(mint_identifiers, [n] * n_processes))
+        identifiers = [identifier for result in results for identifier in result[0]]
+        reserved = [identifier + i for result in results for identifier in result[0][-1:] for i in range(1, 10)]
+        self.assertEqual(len(identifiers) + len(reserved), len(set(identifiers + reserved)))
+        snapshots = sorted(snapshot for result in results for snapshot in result[1])
+        self.assertListEqual(list(range(1, n_processes * n + 1)), snapshots)
+
+        counter_handler = SharedFilesystemCounterHandler(info_dir)
+        self.assertEqual(max(identifiers + reserved), counter_handler.read_counter("br"))
+        self.assertEqual(n_processes * n, counter_handler.read_counter("br", "se", 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2016, Silvio Peroni <essepuntato@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+import os
+import sqlite3
+import unittest
+from shutil import rmtree
+
+from oc_ocdm.counter_handler.filesystem_counter_handler import FilesystemCounterHandler
+from oc_ocdm.counter_handler.sqlite_counter_handler import SqliteCounterHandler
+
+
+class TestSqliteCounterHandler(unittest.TestCase):
+    info_dir = os.path.join('.', 'info_dir', 'sqlite') + os.sep
+
+    def setUp(self):
+        if os.path.exists(self.info_dir):
+            rmtree(self.info_dir)
+        self.counter_handler = SqliteCounterHandler(self.info_dir + 'counters.db')
+
+    def tearDown(self):
+        self.counter_handler.close()
+        if os.path.exists(self.info_dir):
+            rmtree(self.info_dir)
+
+    def test_set_counter(self):
+        self.counter_handler.set_counter(4, "br")
+        self.counter_handler.set_counter(12345, "br", "se", 987654321)
+        self.assertEqual(4, self.counter_handler.read_counter("br"))
+        self.assertEqual(12345, self.counter_handler.read_counter("br", "se", 987654321))
+        self.assertRaises(ValueError, self.counter_handler.set_counter, -1, "br")
+        self.assertRaises(ValueError, self.counter_handler.set_counter, 1, "xx")
+        self.assertRaises(ValueError, self.counter_handler.set_counter, 1, "br", "xx", 1)
+        self.assertRaises(ValueError, self.counter_handler.set_counter, 1, "br", "se", 0)
+
+    def test_read_counter(self):
+        self.assertEqual(0, self.counter_handler.read_counter("ar"))
+        self.assertEqual(0, self.counter_handler.read_counter("ar", "se", 5))
+        self.assertRaises(ValueError, self.counter_handler.read_counter, "br", "se", -1)
+
+    def test_increment_counter(self):
+        self.assertEqual(1, self.counter_handler.increment_counter("br"))
+        self.assertEqual(2, self.counter_handler.increment_counter("br"))
+        self.assertEqual(1, self.counter_handler.increment_counter("br", "se", 3))
+        self.assertEqual(0, self.counter_handler.read_counter("br", "se", 2))
+
+    def test_increment_counter_without_upsert(self):
+        # The fallback used with SQLite versions older than 3.24.0
+        self.counter_handler._upsert_supported = False
+        self.assertEqual(1, self.counter_handler.increment_counter("br"))
+        self.assertEqual(2, self.counter_handler.increment_counter("br"))
+        self.assertEqual(3, self.counter_handler.reserve_counter(5, "br"))
+        self.assertEqual(1, self.counter_handler.increment_counter("br", "se", 3))
+        self.assertEqual(1, self.counter_handler.increment_metadata_counter("di", "dataset"))
+        self.assertEqual(7, self.counter_handler.read_counter("br"))
+
+    def test_reserve_counter(self):
+        self.counter_handler.set_counter(10, "br")
+        self.assertEqual(11, self.counter_handler.reserve_counter(5, "br"))
+        self.assertEqual(15, self.counter_handler.read_counter("br"))
+        self.assertRaises(ValueError, self.counter_handler.reserve_counter, 0, "br")
+
+    def test_increment_counters(self):
+        other_handler = SqliteCounterHandler(self.info_dir + 'counters.db')
+        try:
+            self.counter_handler.set_counter(3, "br", "se", 1)
+            self.assertDictEqual({1: 4, 2: 2}, self.counter_handler.increment_counters({1: 1, 2: 2}, "br", "se"))
+            self.assertDictEqual({1: 5, 5: 1}, other_handler.increment_counters({1: 1, 5: 1}, "br", "se"))
+            self.assertDictEqual({1: 5, 2: 2, 5: 1}, self.counter_handler.read_counters("br", "se", [1, 2, 5]))
+            self.assertRaises(ValueError, self.counter_handler.increment_counters, {1: 0}, "br", "se")
+            self.assertRaises(ValueError, self.counter_handler.increment_counters, {0: 1}, "br", "se")
+        finally:
+            other_handler.close()
+
+    def test_read_and_set_counters(self):
+        self.counter_handler.set_counters({1: 2, 5: 12345}, "br", "se")
+        self.assertDictEqual({1: 2, 2: 0, 5: 12345}, self.counter_handler.read_counters("br", "se", [5, 2, 1]))
+        self.assertRaises(ValueError, self.counter_handler.set_counters, {1: -1}, "br", "se")
+        self.assertRaises(ValueError, self.counter_handler.read_counters, "br", "se", [0])
+
+    def test_read_during_write(self):
+        self.counter_handler.set_counter(4, "br")
+        writer: sqlite3.Connection = sqlite3.connect(self.info_dir + 'counters.db', isolation_level=None)
+        try:
+            writer.execute("BEGIN IMMEDIATE")
+            writer.execute("UPDATE counters SET value = 5")
+            # The write lock held by another connection doesn't stop the readers
+            self.assertEqual(4, self.counter_handler.read_counter("br"))
+            self.assertDictEqual({1: 0}, self.counter_handler.read_counters("br", "se", [1]))
+            writer.execute("COMMIT")
+        finally:
+            writer.close()
+        self.assertEqual(5, self.counter_handler.read_counter("br"))
+
+    def test_metadata_counter(self):
+        dataset_name = "http://dataset/"
+        self.assertEqual(0, self.counter_handler.read_metadata_counter("di", dataset_name))
+        self.assertEqual(1, self.counter_handler.increment_metadata_counter("di", dataset_name))
+        self.counter_handler.set_metadata_counter(7, "di", dataset_name)
+        self.assertEqual(7, self.counter_handler.read_metadata_counter("di", dataset_name))
+        self.assertRaises(ValueError, self.counter_handler.read_metadata_counter, "di", None)
+        self.assertRaises(ValueError, self.counter_handler.read_metadata_counter, "br", dataset_name)
+
+    def test_import_filesystem_counters(self):
+        filesystem_dir = self.info_dir + 'filesystem' + os.sep
+        filesystem_handler = FilesystemCounterHandler(filesystem_dir)
+        filesystem_handler.set_counter(1500, "br")
+        filesystem_handler.set_counter(3, "br", "se", 2)
+        filesystem_handler.set_counter(123456, "br", "se", 40)
+        filesystem_handler.set_counter(2, "ra", "se", 1)
+        filesystem_handler.set_metadata_counter(9, "di", "dataset")
+
+        self.assertEqual(5, self.counter_handler.import_filesystem_counters(filesystem_dir))
+        with self.subTest("Entity counters"):
+            self.assertEqual(1500, self.counter_handler.read_counter("br"))
+            self.assertEqual(0, self.counter_handler.read_counter("ra"))
+        with self.subTest("Provenance counters"):
+            self.assertEqual(0, self.counter_handler.read_counter("br", "se", 1))
+            self.assertEqual(3, self.counter_handler.read_counter("br", "se", 2))
+            self.assertEqual(123456, self.counter_handler.read_counter("br", "se", 40))
+            self.assertEqual(2, self.counter_handler.read_counter("ra", "se", 1))
+        with self.subTest("Metadata counters"):
+            self.assertEqual(9, self.counter_handler.read_metadata_counter("di", "dataset"))
+        with self.subTest("Persistence"):
+            other_handler = SqliteCounterHandler(self.info_dir + 'counters.db')
+            self.assertEqual(4, other_handler.increment_counter("br", "se", 2))
+            other_handler.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
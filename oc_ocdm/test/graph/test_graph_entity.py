@@ -15,9 +15,80 @@
 # SOFTWARE.
 import unittest
 
+from oc_ocdm.graph.graph_entity import GraphEntity
+from oc_ocdm.graph.graph_set import GraphSet
+
 
 class TestGraphEntity(unittest.TestCase):
-    pass
+    resp_agent = 'http://resp_agent.test/'
+
+    def setUp(self):
+        self.graph_set = GraphSet("http://test/", "", "", False)
+        self.br = self.graph_set.add_br(self.resp_agent)
+        self.ar1 = self.graph_set.add_ar(self.resp_agent)
+        self.ar2 = self.graph_set.add_ar(self.resp_agent)
+        self.ra = self.graph_set.add_ra(self.resp_agent)
+
+    def test_mark_as_to_be_deleted(self):
+        self.br.has_contributor(self.ar1)
+        self.ar1.is_held_by(self.ra)
+
+        result = self.ar1.mark_as_to_be_deleted()
+        self.assertIsNone(result)
+        self.assertTrue(self.ar1.to_be_deleted)
+
+        triple = self.br.res, GraphEntity.iri_is_document_context_for, self.ar1.res
+        self.assertNotIn(triple, self.br.g)
+        # Outgoing references of the deleted entity are not touched:
+        triple = self.ar1.res, GraphEntity.iri_is_held_by, self.ra.res
+        self.assertIn(triple, self.ar1.g)
+
+    def test_merge(self):
+        self.br.has_contributor(self.ar2)
+        self.ar1.has_next(self.ar2)
+
+        result = self.ar1.merge(self.ar2)
+        self.assertIsNone(result)
+        self.assertTrue(self.ar2.to_be_deleted)
+        self.assertTrue(self.ar1.was_merged)
+
+        triple = self.br.res, GraphEntity.iri_is_document_context_for, self.ar1.res
+        self.assertIn(triple, self.br.g)
+        triple = self.br.res, GraphEntity.iri_is_document_context_for, self.ar2.res
+        self.assertNotIn(triple, self.br.g)
+        self.assertListEqual([], self.graph_set.get_referrers(self.ar2.res))
+
+    def test_was_modified(self):
+        with self.subTest("New entity"):
+            self.assertTrue(self.br.was_modified)
+            self.assertSetEqual(set(self.br.g), self.br.g.get_changes()[1])
+
+        self.graph_set.commit_changes()
+        with self.subTest("Committed entity"):
+            self.assertFalse(self.br.was_modified)
+            self.assertEqual(len(self.br.g), len(self.br.preexisting_graph))
+
+        with self.subTest("Modified entity"):
+            self.br.has_title("Title")
+            self.br.has_pub_date("2020")
+            self.assertTrue(self.br.was_modified)
+            removed, added = self.br.g.get_changes()
+            self.assertSetEqual(set(), removed)
+            self.assertEqual(2, len(added))
+
+        with self.subTest("Restored entity"):
+            self.br.remove_title()
+            self.br.remove_pub_date()
+            self.assertFalse(self.br.was_modified)
+
+        with self.subTest("Removed triples"):
+            self.br.remove_every_triple()
+            removed, added = self.br.g.get_changes()
+            self.assertSetEqual(set(self.br.preexisting_graph), removed)
+            self.assertSetEqual(set(), added)
+            for triple in self.br.preexisting_graph:
+                self.br.g.add(triple)
+            self.assertFalse(self.br.was_modified)
 
 
 if __name__ == '__main__':
@@ -13,10 +13,16 @@
 # DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
 # ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
 # SOFTWARE.
+import os
+import pickle
 import unittest
+from shutil import rmtree
 
-from rdflib import Graph
+from rdflib import Graph, URIRef
 
+from oc_ocdm.counter_handler.filesystem_counter_handler import FilesystemCounterHandler
+from oc_ocdm.counter_handler.shared_filesystem_counter_handler import SharedFilesystemCounterHandler
+from oc_ocdm.graph.graph_entity import GraphEntity
 from oc_ocdm.graph.graph_set import GraphSet
 from oc_ocdm.graph.entities.identifier import Identifier
 from oc_ocdm.graph.entities.bibliographic.agent_role import AgentRole
@@ -29,6 +35,7 @@ from oc_ocdm.graph.entities.bibliographic.reference_annotation import ReferenceA
 from oc_ocdm.graph.entities.bibliographic.reference_pointer import ReferencePointer
 from oc_ocdm.graph.entities.bibliographic.resource_embodiment import ResourceEmbodiment
 from oc_ocdm.graph.entities.bibliographic.responsible_agent import ResponsibleAgent
+from oc_ocdm.support.namespace_view import NamespaceManagerView
 
 
 class TestGraphSet(unittest.TestCase):
@@ -131,6 +138,28 @@ class TestGraphSet(unittest.TestCase):
         for graph in result:
             self.assertIsInstance(graph, Graph)
 
+    def test_namespace_manager(self):
+        br = self.graph_set.add_br(self.resp_agent)
+        ar = self.graph_set.add_ar(self.resp_agent)
+
+        self.assertIsNotNone(self.graph_set.namespace_manager)
+        self.assertIsInstance(br.g.namespace_manager, NamespaceManagerView)
+
+        prefixes = dict(br.g.namespaces())
+        self.assertEqual(str(prefixes["br"]), self.graph_set.g_br)
+        self.assertEqual(str(prefixes["fabio"]), str(GraphEntity.FABIO))
+
+        with self.subTest("Prefixes bound on one graph don't leak to the others"):
+            br.g.bind("ex", "http://example.org/")
+            br.g.add((br.res, URIRef("http://other.example.org/p"), URIRef("http://example.org/o")))
+            self.assertIn("ns1:p", br.g.serialize(format="turtle"))
+            self.assertEqual("http://example.org/", str(dict(br.g.namespaces())["ex"]))
+            for namespaces in (ar.g.namespaces(), self.graph_set.namespace_manager.namespaces()):
+                prefixes = dict(namespaces)
+                self.assertNotIn("ex", prefixes)
+                self.assertNotIn("ns1", prefixes)
+                self.assertEqual(str(prefixes["br"]), self.graph_set.g_br)
+
     def test_get_graph_iri(self):
         ar = self.graph_set.add_ar(self.resp_agent)
         iri = str(ar.g.identifier)
@@ -138,6 +167,96 @@ class TestGraphSet(unittest.TestCase):
         self.assertIsNotNone(result)
         self.assertEqual(iri, result)
 
+    def test_add_many(self):
+        first_br = self.graph_set.add_br(self.resp_agent)
+        brs = self.graph_set.add_many("br", 5, self.resp_agent)
+        self.assertEqual(5, len(brs))
+        first_count = int(str(first_br.res).rsplit("/", 1)[1])
+        for idx, br in enumerate(brs):
+            self.assertIsInstance(br, BibliographicResource)
+            self.assertEqual(URIRef(f"http://test/br/{first_count + idx + 1}"), br.res)
+            self.assertIs(br, self.graph_set.get_entity(br.res))
+        # The counter was advanced by the whole range:
+        next_br = self.graph_set.add_br(self.resp_agent)
+        self.assertEqual(URIRef(f"http://test/br/{first_count + 6}"), next_br.res)
+
+        self.assertListEqual([], self.graph_set.add_many("ar", 0, self.resp_agent))
+        self.assertRaises(ValueError, self.graph_set.add_many, "xyz", 1, self.resp_agent)
+
+    def test_get_entities(self):
+        br_list = [self.graph_set.add_br(self.resp_agent) for _ in range(5)]
+        ar = self.graph_set.add_ar(self.resp_agent)
+
+        with self.subTest("subtest 1"):
+            self.assertEqual(5, self.graph_set.count_entities("br"))
+            self.assertEqual(1, self.graph_set.count_entities("ar"))
+            self.assertEqual(0, self.graph_set.count_entities("ra"))
+            self.assertTupleEqual(tuple(br_list), self.graph_set.get_br())
+            self.assertTupleEqual((ar,), self.graph_set.get_ar())
+            self.assertTupleEqual(tuple(), self.graph_set.get_ra())
+            self.assertListEqual(br_list, list(self.graph_set.iter_entities("br")))
+
+        with self.subTest("subtest 2"):
+            # Entities removed from the set must disappear from the results:
+            del self.graph_set.res_to_entity[br_list[0].res]
+            self.graph_set.res_to_entity.pop(ar.res)
+
+            self.assertEqual(4, self.graph_set.count_entities("br"))
+            self.assertEqual(0, self.graph_set.count_entities("ar"))
+            self.assertTupleEqual(tuple(br_list[1:]), self.graph_set.get_br())
+            self.assertTupleEqual(tuple(), self.graph_set.get_ar())
+
+    def test_shared_store(self):
+        graph_set = GraphSet("http://test/", "", "", False, shared_store=True)
+        br1 = graph_set.add_br(self.resp_agent)
+        br2 = graph_set.add_br(self.resp_agent)
+        br1.has_title("Title 1")
+        br2.has_title("Title 2")
+
+        with self.subTest("subtest 1"):
+            # Each entity must only see its own triples:
+            self.assertIs(br1.g.store, br2.g.store)
+            self.assertEqual(str(br1.g.identifier), graph_set.g_br)
+            self.assertEqual(2, len(br1.g))
+            self.assertEqual(2, len(br2.g))
+            self.assertEqual("Title 1", br1.get_title())
+            self.assertEqual("Title 2", br2.get_title())
+            self.assertNotIn((br2.res, None, None), br1.g)
+
+        with self.subTest("subtest 2"):
+            br1.remove_every_triple()
+            self.assertEqual(0, len(br1.g))
+            self.assertEqual(2, len(br2.g))
+
+        with self.subTest("subtest 3"):
+            graph_set.commit_changes()
+            self.assertEqual(2, len(br2.preexisting_graph))
+            self.assertSetEqual(set(br2.g), set(br2.preexisting_graph))
+
+    def test_pickle(self):
+        for shared_store in (False, True):
+            with self.subTest(shared_store=shared_store):
+                graph_set = GraphSet("http://test/", "", "", False, shared_store=shared_store)
+                br = graph_set.add_br(self.resp_agent)
+                br.has_title("Title")
+                graph_set.commit_changes()
+                br.has_title("New title")
+
+                copy = pickle.loads(pickle.dumps(graph_set))
+                br_copy = copy.get_entity(br.res)
+                self.assertSetEqual(set(br.g), set(br_copy.g))
+                self.assertTupleEqual(br.g.get_changes(), br_copy.g.get_changes())
+                if shared_store:
+                    # Entity graphs are views over the stores of the unpickled set again:
+                    self.assertIs(copy._store, br_copy.g.store)
+                    self.assertIs(copy._preexisting_store, br_copy.preexisting_graph.store)
+                    self.assertSetEqual(set(br.preexisting_graph), set(br_copy.preexisting_graph))
+
+                # The index of the unpickled set is kept up to date:
+                ar = copy.add_ar(self.resp_agent)
+                br_copy.has_contributor(ar)
+                self.assertListEqual([br_copy], copy.get_referrers(ar.res))
+
     def test_get_orphans(self):
         br = self.graph_set.add_br(self.resp_agent)
         ar = self.graph_set.add_ar(self.resp_agent)
@@ -170,6 +289,92 @@ class TestGraphSet(unittest.TestCase):
             orphans_set = {o.res for o in orphans}
             self.assertSetEqual({br.res}, orphans_set)
 
+    def test_get_referrers(self):
+        br = self.graph_set.add_br(self.resp_agent)
+        ar = self.graph_set.add_ar(self.resp_agent)
+        ra = self.graph_set.add_ra(self.resp_agent)
+
+        with self.subTest("subtest 1"):
+            referrers = self.graph_set.get_referrers(ra.res)
+            self.assertIsNotNone(referrers)
+            self.assertListEqual([], referrers)
+
+        with self.subTest("subtest 2"):
+            br.has_contributor(ar)
+            ar.is_held_by(ra)
+
+            self.assertListEqual([br], self.graph_set.get_referrers(ar.res))
+            self.assertListEqual([ar], self.graph_set.get_referrers(ra.res))
+
+        with self.subTest("subtest 3"):
+            # Here we remove the reference from ar to ra:
+            ar.remove_is_held_by()
+
+            self.assertListEqual([], self.graph_set.get_referrers(ra.res))
+            self.assertListEqual([br], self.graph_set.get_referrers(ar.res))
+
+        with self.subTest("subtest 4"):
+            # Triples added through add_triples must be indexed too:
+            ra.add_triples([(ra.res, GraphEntity.iri_has_identifier, br.res)])
+
+            self.assertListEqual([ra], self.graph_set.get_referrers(br.res))
+
+    def test_counter_handler(self):
+        info_dir = os.path.join("oc_ocdm", "test", "graph", "shared_info_dir") + os.sep
+        try:
+            counter_handler = SharedFilesystemCounterHandler(info_dir, lease_size=10)
+            graph_set = GraphSet("http://test/", info_dir, "", False, counter_handler=counter_handler)
+            self.assertIs(counter_handler, graph_set.counter_handler)
+
+            graph_set.add_br(self.resp_agent)
+            graph_set.add_br(self.resp_agent)
+            # A whole lease was taken:
+            self.assertEqual(10, FilesystemCounterHandler(info_dir).read_counter("br"))
+            # The identifiers which were not handed out are given back when committing:
+            graph_set.commit_changes()
+            self.assertEqual(2, FilesystemCounterHandler(info_dir).read_counter("br"))
+        finally:
+            rmtree(info_dir, ignore_errors=True)
+
+    def test_counter_handler_write_back(self):
+        info_dir = os.path.join("oc_ocdm", "test", "graph", "write_back_info_dir") + os.sep
+        try:
+            counter_handler = FilesystemCounterHandler(info_dir, write_back=True, block_size=10)
+            graph_set = GraphSet("http://test/", info_dir, "", False, counter_handler=counter_handler)
+            graph_set.add_br(self.resp_agent)
+            graph_set.add_br(self.resp_agent)
+            journal_path = os.path.join(info_dir, FilesystemCounterHandler._journal_name)
+            self.assertTrue(os.path.isfile(journal_path))
+
+            # Buffered counters are persisted when committing:
+            graph_set.commit_changes()
+            self.assertFalse(os.path.isfile(journal_path))
+            self.assertEqual(2, FilesystemCounterHandler(info_dir).read_counter("br"))
+        finally:
+            rmtree(info_dir, ignore_errors=True)
+
+    def test_counter_handler_mmap(self):
+        info_dir = os.path.join("oc_ocdm", "test", "graph", "mmap_info_dir") + os.sep
+        try:
+            counter_handler = FilesystemCounterHandler(info_dir, use_mmap=True)
+            graph_set = GraphSet("http://test/", info_dir, "", False, counter_handler=counter_handler)
+            for _ in range(5):
+                graph_set.add_br(self.resp_agent)
+            self.assertGreater(len(counter_handler._mapped_files), 0)
+
+            # The memory-mapped pages are written to the disk when committing,
+            # without the padding lines appended when the files were grown:
+            graph_set.commit_changes()
+            self.assertEqual(5, FilesystemCounterHandler(info_dir).read_counter("br"))
+            with open(os.path.join(info_dir, "info_file_br.txt"), 'rb') as counter_file:
+                self.assertEqual(1, len(counter_file.readlines()))
+
+            # Mapped files are released when the set is closed:
+            graph_set.close()
+            self.assertDictEqual({}, counter_handler._mapped_files)
+        finally:
+            rmtree(info_dir, ignore_errors=True)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -17,6 +17,7 @@ import unittest
 
 from rdflib import Graph, BNode
 
+from oc_ocdm.counter_handler.in_memory_counter_handler import InMemoryCounterHandler
 from oc_ocdm.graph.graph_set import GraphSet
 
 from oc_ocdm.metadata.metadata_set import MetadataSet
@@ -68,6 +69,13 @@ class TestMetadataSet(unittest.TestCase):
         self.assertIsNotNone(result)
         self.assertEqual(iri, result)
 
+    def test_counter_handler(self):
+        counter_handler = InMemoryCounterHandler()
+        metadata_set = MetadataSet("http://test/", "./info_dir/", False, counter_handler=counter_handler)
+        self.assertIs(counter_handler, metadata_set.counter_handler)
+        metadata_set.add_di("ocdmTest", self.resp_agent)
+        self.assertEqual(1, counter_handler.read_metadata_counter("di", "ocdmTest"))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -13,13 +13,40 @@
 # DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
 # ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
 # SOFTWARE.
+import os
 import unittest
+from shutil import rmtree
+from threading import Barrier, Thread
 
 from rdflib import URIRef
 
+from oc_ocdm.counter_handler.in_memory_counter_handler import InMemoryCounterHandler
+from oc_ocdm.counter_handler.shared_filesystem_counter_handler import SharedFilesystemCounterHandler
+from oc_ocdm.counter_handler.sqlite_counter_handler import SqliteCounterHandler
 from oc_ocdm.graph.graph_set import GraphSet
 from oc_ocdm.prov.prov_set import ProvSet
 from oc_ocdm.prov.entities.snapshot_entity import SnapshotEntity
+from oc_ocdm.support.query_utils import get_update_query
+
+
+class FlushCountingCounterHandler(InMemoryCounterHandler):
+    def __init__(self) -> None:
+        super(FlushCountingCounterHandler, self).__init__()
+        self.flushes = 0
+
+    def flush(self) -> None:
+        self.flushes += 1
+
+
+class BarrierProvSet(ProvSet):
+    # Every set waits for the others after reading the snapshot counters, before minting any snapshot
+    def __init__(self, *args, barrier: Barrier, **kwargs) -> None:
+        super(BarrierProvSet, self).__init__(*args, **kwargs)
+        self.barrier = barrier
+
+    def _prefetch_snapshot_counters(self) -> None:
+        super(BarrierProvSet, self)._prefetch_snapshot_counters()
+        self.barrier.wait(timeout=30)
 
 
 class TestProvSet(unittest.TestCase):
@@ -37,6 +64,27 @@ class TestProvSet(unittest.TestCase):
         self.assertIsInstance(se, SnapshotEntity)
         self.assertEqual(str(se.g.identifier), str(prov_subj.res) + "/prov/")
 
+    def test_namespace_manager(self):
+        prov_subj = self.graph_set.add_br(self.resp_agent)
+        first_se = self.prov_set.add_se(prov_subj)
+        second_se = self.prov_set.add_se(prov_subj)
+
+        # Prefixes generated while serializing a snapshot don't leak to the other graphs:
+        first_se.g.add((first_se.res, URIRef("http://example.org/p"), URIRef("http://example.org/o")))
+        self.assertIn("ns1:p", first_se.g.serialize(format="turtle"))
+        self.assertNotIn("ns1", dict(second_se.g.namespaces()))
+        self.assertNotIn("ns1", dict(self.prov_set.namespace_manager.namespaces()))
+        self.assertIn("prov", dict(second_se.g.namespaces()))
+
+    def test_get_se(self):
+        prov_subj = self.graph_set.add_br(self.resp_agent)
+        se_list = [self.prov_set.add_se(prov_subj) for _ in range(3)]
+
+        result = self.prov_set.get_se()
+        self.assertIsNotNone(result)
+        self.assertTupleEqual(tuple(se_list), result)
+        self.assertEqual(3, self.prov_set.count_entities("se"))
+
     def test_generate_provenance(self):
         cur_time = 1607375859.846196
         cur_time_str = '2020-12-07T21:17:39+00:00'
@@ -216,6 +264,95 @@ class TestProvSet(unittest.TestCase):
             self.assertIsNotNone(se_a_2.get_update_action())
             self.assertEqual(f"The entity '{a.res}' has been modified.", se_a_2.get_description())
 
+    def test_generate_provenance_counters(self):
+        brs = [self.graph_set.add_br(self.resp_agent) for _ in range(3)]
+        self.prov_set.generate_provenance()
+        self.graph_set.commit_changes()
+        self.prov_set = ProvSet(self.graph_set, "http://test/", "./info_dir/", False)
+        brs[1].has_title("Title")
+        self.prov_set.generate_provenance()
+
+        self.assertIsNone(self.prov_set._snapshot_counters)
+        counter_handler = self.prov_set.counter_handler
+        for br, expected_count in zip(brs, (1, 2, 1)):
+            identifier = int(str(br.res).rsplit("/", 1)[1])
+            self.assertEqual(expected_count, counter_handler.read_counter("br", "se", identifier))
+        # The new snapshot of the modified entity and the invalidated one:
+        self.assertEqual(2, self.prov_set.count_entities("se"))
+
+    def test_generate_provenance_update_actions(self):
+        cur_time = 1607375859.846196
+        brs = [self.graph_set.add_br(self.resp_agent) for _ in range(4)]
+        self.prov_set.generate_provenance(cur_time)
+        self.graph_set.commit_changes()
+
+        brs[0].has_title("Title")
+        brs[1].mark_as_to_be_deleted()
+        brs[2].merge(brs[3])
+        self.prov_set = ProvSet(self.graph_set, "http://test/", "./info_dir/", False)
+        self.prov_set.generate_provenance(cur_time)
+
+        for br, description in zip(brs, ("modified", "deleted", "merged with")):
+            with self.subTest(description=description):
+                snapshot = self.prov_set.get_entity(URIRef(str(br.res) + "/prov/se/2"))
+                self.assertIsNotNone(snapshot)
+                self.assertIn(description, snapshot.get_description())
+                if description != "merged with":
+                    self.assertEqual(get_update_query(br)[0], snapshot.get_update_action())
+
+    def test_generate_provenance_unchanged(self):
+        brs = [self.graph_set.add_br(self.resp_agent) for _ in range(3)]
+        self.prov_set.generate_provenance()
+        self.graph_set.commit_changes()
+        # The last entity has no snapshot yet, e.g. because it was imported from a dataset without provenance:
+        identifier = int(str(brs[2].res).rsplit("/", 1)[1])
+        self.prov_set.counter_handler.set_counter(0, "br", "se", identifier)
+
+        self.prov_set = ProvSet(self.graph_set, "http://test/", "./info_dir/", False)
+        self.prov_set.generate_provenance()
+        self.assertEqual(1, self.prov_set.count_entities("se"))
+        self.assertIsNotNone(self.prov_set.get_entity(URIRef(str(brs[2].res) + "/prov/se/1")))
+
+        brs[0].has_title("Title")
+        brs[0].remove_title()
+        self.prov_set = ProvSet(self.graph_set, "http://test/", "./info_dir/", False)
+        self.prov_set.generate_provenance()
+        self.assertEqual(0, self.prov_set.count_entities("se"))
+
+    def test_generate_provenance_shared_counter_handler(self):
+        shared_dir = os.path.join('.', 'info_dir', 'shared_prov') + os.sep
+        br_res = URIRef("http://test/br/1")
+        for name, create_handler in (("SQLite", lambda: SqliteCounterHandler(shared_dir + 'counters.db')),
+                                     ("Shared filesystem", lambda: SharedFilesystemCounterHandler(shared_dir))):
+            with self.subTest(counter_handler=name):
+                if os.path.exists(shared_dir):
+                    rmtree(shared_dir)
+                counter_handlers = [create_handler() for _ in range(2)]
+                # The entity already has a snapshot and two processes modify it at the same time
+                counter_handlers[0].set_counter(1, "br", "se", 1)
+                barrier = Barrier(len(counter_handlers))
+                prov_sets = []
+                for i, counter_handler in enumerate(counter_handlers):
+                    graph_set = GraphSet("http://test/", counter_handler=counter_handler)
+                    graph_set.add_br(self.resp_agent, res=br_res).has_title(f"Title {i}")
+                    prov_sets.append(BarrierProvSet(graph_set, "http://test/", counter_handler=counter_handler,
+                                                    barrier=barrier))
+                threads = [Thread(target=prov_set.generate_provenance) for prov_set in prov_sets]
+                try:
+                    for thread in threads:
+                        thread.start()
+                    for thread in threads:
+                        thread.join()
+                    snapshots = sorted(str(se.res) for prov_set in prov_sets for se in prov_set.get_se()
+                                       if se.get_description() is not None)
+                    self.assertListEqual([f"{br_res}/prov/se/2", f"{br_res}/prov/se/3"], snapshots)
+                    self.assertEqual(3, counter_handlers[0].read_counter("br", "se", 1))
+                finally:
+                    for counter_handler in counter_handlers:
+                        counter_handler.close()
+                    if os.path.exists(shared_dir):
+                        rmtree(shared_dir)
+
     def test_retrieve_last_snapshot(self):
         br = self.graph_set.add_br(self.resp_agent)
         br_res = br.res
@@ -236,6 +373,16 @@ class TestProvSet(unittest.TestCase):
         prov_subject = URIRef('https://w3id.org/oc/corpus/br/abc')
         self.assertRaises(ValueError, self.prov_set._retrieve_last_snapshot, prov_subject)
 
+    def test_counter_handler(self):
+        counter_handler = FlushCountingCounterHandler()
+        prov_set = ProvSet(self.graph_set, "http://test/", "./info_dir/", False, counter_handler=counter_handler)
+        self.assertIs(counter_handler, prov_set.counter_handler)
+
+        prov_subj = self.graph_set.add_br(self.resp_agent)
+        prov_set.generate_provenance()
+        self.assertEqual(1, counter_handler.read_counter("br", "se", int(prov_subj.res.split("/")[-1])))
+        self.assertEqual(1, counter_handler.flushes)
+
 
 if __name__ == '__main__':
     unittest.main()
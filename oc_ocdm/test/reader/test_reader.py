@@ -0,0 +1,122 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2016, Silvio Peroni <essepuntato@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+import os
+import unittest
+from shutil import rmtree
+from zipfile import ZipFile
+
+from rdflib import URIRef
+
+from oc_ocdm.graph.graph_set import GraphSet
+from oc_ocdm.reader import Reader
+from oc_ocdm.support.reporter import Reporter
+from oc_ocdm.test.sparql_server import SparqlServer
+
+
+class TestReader(unittest.TestCase):
+    data_dir = os.path.join("oc_ocdm", "test", "reader", "data")
+    triple = '<http://test/br/1> <http://purl.org/dc/terms/title> "A title . <with> \\"brackets\\"" .\n'
+    quad = '<http://test/br/1> <http://purl.org/dc/terms/title> "A title" <http://test/br/> .\n'
+
+    def setUp(self):
+        os.makedirs(self.data_dir, exist_ok=True)
+        self.reader = Reader(repok=Reporter(print_sentences=False), reperr=Reporter(print_sentences=False))
+
+    def tearDown(self):
+        rmtree(self.data_dir)
+
+    def test_guess_format(self):
+        with self.subTest("Content"):
+            self.assertEqual("json-ld", Reader._guess_format("a.nt", b'  [{"@id": "http://test/br/1"}]'))
+            self.assertEqual("rdfxml", Reader._guess_format("a", b'<?xml version="1.0"?>\n<rdf:RDF/>'))
+            self.assertEqual("nt11", Reader._guess_format("a.nq", ("# comment\n" + self.triple).encode()))
+            self.assertEqual("nquads", Reader._guess_format("a.nt", self.quad.encode()))
+        with self.subTest("Extension"):
+            self.assertEqual("turtle", Reader._guess_format("a.ttl", b'@prefix ex: <http://ex/> .'))
+            self.assertEqual("trig", Reader._guess_format("a.trig", b'@prefix ex: <http://ex/> .'))
+        with self.subTest("Unknown"):
+            self.assertIsNone(Reader._guess_format("a", b'@prefix ex: <http://ex/> .'))
+
+    def test_load(self):
+        nt_path = os.path.join(self.data_dir, "1.nt")
+        with open(nt_path, 'wt', encoding='utf-8') as f:
+            f.write(self.quad)
+        zip_path = os.path.join(self.data_dir, "2.zip")
+        with ZipFile(zip_path, mode="w") as archive:
+            archive.writestr("2.json", '[{"@id": "http://test/br/", "@graph": [{"@id": "http://test/br/1", '
+                                       '"http://purl.org/dc/terms/title": [{"@value": "A title"}]}]}]')
+
+        for path in (nt_path, zip_path):
+            with self.subTest(path=path):
+                loaded_graph = self.reader.load(path)
+                self.assertIsNotNone(loaded_graph)
+                quads = [(s, p, o, c.identifier) for s, p, o, c in loaded_graph.quads()]
+                self.assertEqual(1, len(quads))
+                self.assertEqual(URIRef("http://test/br/"), quads[0][3])
+
+        with self.subTest("Wrong guess"):
+            # A Turtle file starting like an N-Triples one:
+            ttl_path = os.path.join(self.data_dir, "3.ttl")
+            with open(ttl_path, 'wt', encoding='utf-8') as f:
+                f.write('<http://test/br/1> <http://purl.org/dc/terms/title> "A title" .\n'
+                        '@prefix dcterms: <http://purl.org/dc/terms/> .\n'
+                        '<http://test/br/2> dcterms:title "Another title" .\n')
+            with open(ttl_path, 'rb') as f:
+                self.assertEqual("nt11", Reader._guess_format(ttl_path, f.read()))
+            loaded_graph = self.reader.load(ttl_path)
+            self.assertIsNotNone(loaded_graph)
+            self.assertEqual(2, len(loaded_graph))
+
+        with self.subTest("Explicit format"):
+            self.assertIsNone(self.reader.load(nt_path, format="json-ld"))
+            self.assertFalse(self.reader.reperr.is_empty())
+            self.assertIsNotNone(self.reader.load(nt_path, format="nquads"))
+
+    def test_import_entities_from_triplestore(self):
+        g_set = GraphSet("http://test/", "", "", False)
+        brs = [g_set.add_br("http://resp_agent.test/") for _ in range(5)]
+        for index, br in enumerate(brs):
+            br.has_title(f"Title {index}")
+        missing_res = URIRef("http://test/br/999")
+
+        with SparqlServer() as server:
+            for br in brs:
+                for triple in br.g:
+                    server.dataset.graph(br.g.identifier).add(triple)
+
+            new_g_set = GraphSet("http://test/", "", "", False)
+            imported = Reader.import_entities_from_triplestore(new_g_set, server.url,
+                                                               [br.res for br in brs] + [missing_res],
+                                                               "http://resp_agent.test/", batch_size=2, workers=3)
+            with self.subTest("Batches"):
+                self.assertEqual(3, len(server.requests))
+            with self.subTest("Imported entities"):
+                self.assertSetEqual({br.res for br in brs}, {entity.res for entity in imported})
+                for br in brs:
+                    entity = new_g_set.get_entity(br.res)
+                    self.assertSetEqual(set(br.g), set(entity.g))
+                    self.assertSetEqual(set(br.g), set(entity.preexisting_graph))
+                    self.assertFalse(entity.was_modified)
+            with self.subTest("Single entity"):
+                entity = Reader.import_entity_from_triplestore(GraphSet("http://test/", "", "", False), server.url,
+                                                               brs[0].res, "http://resp_agent.test/")
+                self.assertEqual(brs[0].res, entity.res)
+                self.assertRaises(ValueError, Reader.import_entity_from_triplestore, new_g_set, server.url,
+                                  missing_res, "http://resp_agent.test/")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2016, Silvio Peroni <essepuntato@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from rdflib import Dataset, URIRef
+
+
+class SparqlServer(object):
+    """
+    A stand-in SPARQL endpoint, backed by an in-memory ``rdflib`` dataset, to be used by tests.
+    It also accepts statements posted to a named graph through the Graph Store HTTP Protocol.
+    """
+
+    def __init__(self) -> None:
+        self.dataset = Dataset(default_union=True)
+        self.requests = []
+        # HTTP status codes to be answered to the next requests, instead of processing them
+        self.failures = []
+        # If specified, requests whose body is larger than this number of bytes are rejected
+        self.max_request_size = None
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return "http://127.0.0.1:%d/sparql" % self._server.server_address[1]
+
+    @property
+    def graph_store_url(self) -> str:
+        return "http://127.0.0.1:%d/data" % self._server.server_address[1]
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def do_POST(self) -> None:
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with server._lock:
+                    server.requests.append((self.command, self.path, self.headers.get("Content-Type"), body))
+                    status = server.failures.pop(0) if len(server.failures) > 0 else None
+                    if status is None and server.max_request_size is not None and \
+                            len(body) > server.max_request_size:
+                        status = 413
+                    if status is None:
+                        status, content_type, payload = server._process(self.path, self.headers.get("Content-Type"), body)
+                    else:
+                        content_type, payload = "text/plain", b"Failure"
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        return Handler
+
+    def _process(self, path, content_type, body):
+        url = urlsplit(path)
+        if url.path == "/data":
+            return self._process_graph_store(parse_qs(url.query), content_type, body)
+        if content_type != "application/x-www-form-urlencoded":
+            return 415, "text/plain", b"Unsupported media type"
+        fields = parse_qs(body.decode("utf-8"))
+        try:
+            if "query" in fields:
+                result = self.dataset.query(fields["query"][0])
+                return 200, "application/n-triples", result.graph.serialize(format="nt").encode("utf-8")
+            elif "update" in fields:
+                self.dataset.update(fields["update"][0])
+                return 200, "text/plain", b""
+        except Exception as e:
+            return 400, "text/plain", str(e).encode("utf-8")
+        return 400, "text/plain", b"Missing query"
+
+    def _process_graph_store(self, params, content_type, body):
+        if content_type != "application/n-triples":
+            return 415, "text/plain", b"Unsupported media type"
+        if "graph" not in params:
+            return 400, "text/plain", b"Missing graph"
+        try:
+            self.dataset.graph(URIRef(params["graph"][0])).parse(data=body.decode("utf-8"), format="nt")
+        except Exception as e:
+            return 400, "text/plain", str(e).encode("utf-8")
+        return 204, "text/plain", b""
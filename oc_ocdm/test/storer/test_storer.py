@@ -16,13 +16,18 @@
 import json
 import os
 import unittest
-from rdflib import compare, ConjunctiveGraph, URIRef
+from rdflib import compare, ConjunctiveGraph, Literal, URIRef
 from shutil import rmtree
+from urllib.parse import parse_qs
 from zipfile import ZipFile
 
+from oc_ocdm.graph.graph_entity import GraphEntity
 from oc_ocdm.graph.graph_set import GraphSet
 from oc_ocdm.prov.prov_set import ProvSet
 from oc_ocdm.storer import Storer
+from oc_ocdm.support.reporter import Reporter
+from oc_ocdm.support.upload_journal import UploadJournal
+from oc_ocdm.test.sparql_server import SparqlServer
 
 
 class TestStorer(unittest.TestCase):
@@ -138,6 +143,277 @@ class TestStorer(unittest.TestCase):
             self.assertTrue(os.path.exists(os.path.join(base_dir_3, "br", "060", "10000", "1000.nt.lock")))
             self.assertTrue(os.path.exists(os.path.join(base_dir_3, "br", "060", "10000", "1000", "prov", "se.nq.lock")))
 
+    def test_store_all_existing_file(self):
+        base_dir = os.path.join("oc_ocdm", "test", "storer", "data", "rdf") + os.sep
+        storer = Storer(self.prov_set, context_map={}, dir_split=10000, n_file_item=1000, default_dir="_",
+                        output_format='nquads', zip_output=False, repok=Reporter(print_sentences=False))
+        self.prov_set.generate_provenance()
+        storer.store_all(base_dir, self.base_iri)
+        self.graph_set.commit_changes()
+        self.br.has_title("Title")
+        self.prov_set.generate_provenance()
+        # The second snapshot is merged with the stored one:
+        storer.store_all(base_dir, self.base_iri)
+
+        stored_g = ConjunctiveGraph()
+        stored_g.parse(os.path.join(base_dir, "br", "060", "10000", "1000", "prov", "se.nq"), format="nquads")
+        expected_graph = URIRef("http://test/br/0601/prov/")
+        self.assertEqual(2, len(set(stored_g.subjects())))
+        for s, p, o, c in stored_g.quads():
+            self.assertEqual(expected_graph, c.identifier)
+
+    def test_store_all_workers(self):
+        for i in range(5):
+            self.graph_set.add_br(self.resp_agent).has_title(f"Title {i}")
+        base_dir = os.path.join("oc_ocdm", "test", "storer", "data", "rdf_seq") + os.sep
+        storer = Storer(self.graph_set, context_map={}, dir_split=10000, n_file_item=2, default_dir="_",
+                        output_format='nquads', zip_output=False, repok=Reporter(print_sentences=False))
+        expected_paths = storer.store_all(base_dir, self.base_iri)
+        expected_sentences = storer.repok.get_articles_as_string()
+        self.assertEqual(3, len(expected_paths))
+
+        for process_pool in (False, True):
+            with self.subTest(process_pool=process_pool):
+                base_dir_w = os.path.join("oc_ocdm", "test", "storer", "data", f"rdf_{process_pool}") + os.sep
+                storer = Storer(self.graph_set, context_map={}, dir_split=10000, n_file_item=2, default_dir="_",
+                                output_format='nquads', zip_output=False, repok=Reporter(print_sentences=False))
+                paths = storer.store_all(base_dir_w, self.base_iri, workers=3, process_pool=process_pool)
+                self.assertEqual([path.replace(base_dir, base_dir_w) for path in expected_paths], paths)
+                self.assertEqual(expected_sentences.replace(base_dir, base_dir_w),
+                                 storer.repok.get_articles_as_string())
+                for expected_path, path in zip(expected_paths, paths):
+                    expected_g = ConjunctiveGraph()
+                    expected_g.parse(expected_path, format="nquads")
+                    stored_g = ConjunctiveGraph()
+                    stored_g.parse(path, format="nquads")
+                    self.assertTrue(compare.isomorphic(expected_g, stored_g))
+
+    def test_upload_all(self):
+        for i in range(6):
+            self.graph_set.add_br(self.resp_agent).has_title(f"Title {i}")
+        base_dir = os.path.join("oc_ocdm", "test", "storer", "data", "upload") + os.sep
+        journal_path = os.path.join(base_dir, "upload.journal")
+        expected_quads = {triple + (entity.g.identifier,)
+                          for entity in self.graph_set.res_to_entity.values() for triple in entity.g}
+
+        for workers in (1, 3):
+            with self.subTest("Every batch is uploaded", workers=workers), SparqlServer() as server:
+                storer = Storer(self.graph_set, repok=Reporter(print_sentences=False),
+                                reperr=Reporter(print_sentences=False))
+                self.assertTrue(storer.upload_all(server.url, base_dir, batch_size=3, workers=workers))
+                self.assertEqual(3, len(server.requests))
+                self.assertSetEqual(expected_quads, set(server.dataset.quads()))
+                self.assertEqual(3, len(storer.repok.articles[-1]))
+                self.assertEqual(0, len(storer.reperr.articles[-1]))
+                self.assertFalse(os.path.exists(journal_path))
+
+        with self.subTest("Transient failures are retried"), SparqlServer() as server:
+            server.failures = [503, 429]
+            storer = Storer(self.graph_set, repok=Reporter(print_sentences=False),
+                            reperr=Reporter(print_sentences=False))
+            self.assertTrue(storer.upload_all(server.url, base_dir, batch_size=10, backoff=0.01))
+            self.assertEqual(3, len(server.requests))
+            self.assertSetEqual(expected_quads, set(server.dataset.quads()))
+
+        with self.subTest("Other failures are reported"), SparqlServer() as server:
+            server.failures = [400]
+            storer = Storer(self.graph_set, repok=Reporter(print_sentences=False),
+                            reperr=Reporter(print_sentences=False))
+            self.assertFalse(storer.upload_all(server.url, base_dir, batch_size=4, backoff=0.01))
+            self.assertEqual(2, len(server.requests))
+            self.assertEqual(1, len(storer.repok.articles[-1]))
+            self.assertEqual(2, len(storer.reperr.articles[-1]))
+            self.assertIn("[3]", storer.reperr.articles[-1][0])
+            self.assertIn("[5] The changes of 4 entities", storer.reperr.articles[-1][1])
+            self.assertTrue(os.path.isfile(journal_path))
+
+        with self.subTest("Pending changes are uploaded again"), SparqlServer() as server:
+            storer = Storer(GraphSet(self.base_iri), repok=Reporter(print_sentences=False),
+                            reperr=Reporter(print_sentences=False))
+            self.assertTrue(storer.resume_upload(server.url, base_dir))
+            self.assertEqual(1, len(server.requests))
+            self.assertSetEqual({triple + (entity.g.identifier,)
+                                 for entity in list(self.graph_set.res_to_entity.values())[:4] for triple in entity.g},
+                                set(server.dataset.quads()))
+            self.assertFalse(os.path.exists(journal_path))
+            # Nothing is left to be uploaded:
+            self.assertTrue(storer.resume_upload(server.url, base_dir))
+            self.assertEqual(1, len(server.requests))
+
+        with self.subTest("Interrupted upload"), SparqlServer() as server:
+            with UploadJournal(journal_path) as journal:
+                journal.append(None, 'INSERT DATA { <http://test/br/1> <http://test/p> "A" }', 1, 0)
+                journal.append(None, 'INSERT DATA { <http://test/br/2> <http://test/p> "B" }', 1, 0)
+                journal.acknowledge([0])
+            with open(journal_path, 'at', encoding='utf-8') as f:
+                # A record which was being written when the process crashed
+                f.write('00000000 ["A",[1')
+            storer = Storer(GraphSet(self.base_iri), repok=Reporter(print_sentences=False),
+                            reperr=Reporter(print_sentences=False))
+            self.assertTrue(storer.resume_upload(server.url, base_dir))
+            self.assertSetEqual({(URIRef("http://test/br/2"), URIRef("http://test/p"), Literal("B"))},
+                                set(server.dataset.triples((None, None, None))))
+
+        with self.subTest("Single entities"), SparqlServer() as server:
+            server.failures = [400]
+            storer = Storer(self.graph_set, repok=Reporter(print_sentences=False),
+                            reperr=Reporter(print_sentences=False))
+            self.assertFalse(storer.upload(self.br, server.url, base_dir))
+            self.assertTrue(storer.resume_upload(server.url, base_dir))
+            self.assertSetEqual({triple + (self.br.g.identifier,) for triple in self.br.g},
+                                set(server.dataset.quads()))
+
+        old_title = 'GRAPH <http://test/br/> { <http://test/br/1> <http://test/p> "Old" }'
+        new_title = 'GRAPH <http://test/br/> { <http://test/br/1> <http://test/p> "New" }'
+        conflicting_changes = [f'INSERT DATA {{ {old_title} }}',
+                               f'DELETE DATA {{ {old_title} }} ; INSERT DATA {{ {new_title} }}',
+                               f'DELETE DATA {{ {new_title} }}',
+                               f'INSERT DATA {{ {old_title} }}']
+        expected_quads.add((URIRef("http://test/br/1"), URIRef("http://test/p"), Literal("Old"),
+                            URIRef("http://test/br/")))
+        with self.subTest("Conflicting pending changes"), SparqlServer() as server:
+            with UploadJournal(journal_path) as journal:
+                for update_query in conflicting_changes:
+                    journal.append(None, update_query, 1, 1)
+            storer = Storer(self.graph_set, repok=Reporter(print_sentences=False),
+                            reperr=Reporter(print_sentences=False))
+            self.assertTrue(storer.upload_all(server.url, base_dir, batch_size=1, workers=4))
+            # Pending changes are uploaded one at a time, in order, before the new ones:
+            self.assertListEqual(conflicting_changes,
+                                 [parse_qs(body.decode("utf-8"))["update"][0] for _, _, _, body in
+                                  server.requests[:len(conflicting_changes)]])
+            self.assertSetEqual(expected_quads, set(server.dataset.quads()))
+            self.assertFalse(os.path.exists(journal_path))
+
+        with self.subTest("Pending changes which still fail"), SparqlServer() as server:
+            with UploadJournal(journal_path) as journal:
+                for update_query in conflicting_changes:
+                    journal.append(None, update_query, 1, 1)
+            server.failures = [503, 400]
+            storer = Storer(self.graph_set, repok=Reporter(print_sentences=False),
+                            reperr=Reporter(print_sentences=False))
+            self.assertFalse(storer.upload_all(server.url, base_dir, batch_size=1, workers=4, backoff=0.01))
+            # The upload stops at the first failure, and the new changes are only journaled:
+            self.assertEqual(2, len(server.requests))
+            self.assertIn("[5] The changes of 11 entities", storer.reperr.articles[-1][-1])
+            self.assertTrue(storer.resume_upload(server.url, base_dir, workers=4))
+            self.assertEqual(4, len(server.requests))
+            self.assertSetEqual(expected_quads, set(server.dataset.quads()))
+            self.assertFalse(os.path.exists(journal_path))
+
+    def test_upload_all_adaptive_batches(self):
+        for i in range(6):
+            self.graph_set.add_br(self.resp_agent).has_title(f"Title {i}")
+        base_dir = os.path.join("oc_ocdm", "test", "storer", "data", "upload") + os.sep
+        expected_quads = {triple + (entity.g.identifier,)
+                          for entity in self.graph_set.res_to_entity.values() for triple in entity.g}
+
+        with self.subTest("Batches bounded by statements"), SparqlServer() as server:
+            storer = Storer(self.graph_set, repok=Reporter(print_sentences=False),
+                            reperr=Reporter(print_sentences=False))
+            self.assertTrue(storer.upload_all(server.url, base_dir, batch_size=10, max_triples=4))
+            # 1 + 2 + 2 + 2 + 2 + 2 + 2 statements
+            self.assertEqual(4, len(server.requests))
+            self.assertSetEqual(expected_quads, set(server.dataset.quads()))
+
+        with self.subTest("Batches bounded by bytes"), SparqlServer() as server:
+            storer = Storer(self.graph_set, repok=Reporter(print_sentences=False),
+                            reperr=Reporter(print_sentences=False))
+            self.assertTrue(storer.upload_all(server.url, base_dir, batch_size=10, max_bytes=1))
+            self.assertEqual(7, len(server.requests))
+            self.assertSetEqual(expected_quads, set(server.dataset.quads()))
+
+        with self.subTest("Request bodies bounded by bytes"), SparqlServer() as server:
+            max_bytes = 800
+            storer = Storer(self.graph_set, repok=Reporter(print_sentences=False),
+                            reperr=Reporter(print_sentences=False))
+            self.assertTrue(storer.upload_all(server.url, base_dir, batch_size=10, max_bytes=max_bytes))
+            # The URL-encoded bodies received by the endpoint never exceed the limit:
+            self.assertLess(1, len(server.requests))
+            self.assertLess(len(server.requests), 7)
+            for _, _, _, body in server.requests:
+                self.assertLessEqual(len(body), max_bytes)
+            self.assertSetEqual(expected_quads, set(server.dataset.quads()))
+
+        with self.subTest("Batches rejected as too large are split"), SparqlServer() as server:
+            server.max_request_size = 1500
+            storer = Storer(self.graph_set, repok=Reporter(print_sentences=False),
+                            reperr=Reporter(print_sentences=False))
+            self.assertTrue(storer.upload_all(server.url, base_dir, batch_size=10))
+            statuses = [len(body) > server.max_request_size for _, _, _, body in server.requests]
+            self.assertTrue(statuses[0])
+            self.assertIn(False, statuses)
+            self.assertSetEqual(expected_quads, set(server.dataset.quads()))
+            self.assertEqual(0, len(storer.reperr.articles[-1]))
+
+        with self.subTest("Queries too large to be sent"), SparqlServer() as server:
+            server.max_request_size = 10
+            storer = Storer(self.graph_set, repok=Reporter(print_sentences=False),
+                            reperr=Reporter(print_sentences=False))
+            self.assertFalse(storer.upload_all(server.url, base_dir, batch_size=10))
+            self.assertEqual(8, len(storer.reperr.articles[-1]))
+            self.assertEqual(0, len(storer.repok.articles[-1]))
+            self.assertEqual(0, len(server.dataset))
+
+    def test_upload_all_insertions(self):
+        titles = [self.graph_set.add_br(self.resp_agent) for _ in range(3)]
+        for i, br in enumerate(titles):
+            br.has_title(f"Title {i}")
+        base_dir = os.path.join("oc_ocdm", "test", "storer", "data", "upload") + os.sep
+        os.makedirs(base_dir)
+
+        def get_expected_quads():
+            return {triple + (entity.g.identifier,)
+                    for entity in self.graph_set.res_to_entity.values() for triple in entity.g}
+
+        with self.subTest("Arguments"):
+            storer = Storer(self.graph_set)
+            self.assertRaises(ValueError, storer.upload_all, "http://127.0.0.1/sparql",
+                              graph_store_url="http://127.0.0.1/data", bulk_load_path="bulk.nq")
+
+        with self.subTest("Bulk load file"), SparqlServer() as server:
+            bulk_load_path = os.path.join(base_dir, "bulk.nq")
+            storer = Storer(self.graph_set, repok=Reporter(print_sentences=False),
+                            reperr=Reporter(print_sentences=False))
+            self.assertTrue(storer.upload_all(server.url, base_dir, bulk_load_path=bulk_load_path))
+            self.assertEqual(0, len(server.requests))
+            stored_g = ConjunctiveGraph()
+            stored_g.parse(bulk_load_path, format="nquads")
+            self.assertSetEqual(get_expected_quads(), {(s, p, o, c.identifier) for s, p, o, c in stored_g.quads()})
+            self.assertEqual("7 added statements were written to the bulk load file "
+                             f"{bulk_load_path}.", storer.repok.get_last_sentence())
+
+        with self.subTest("Graph store"), SparqlServer() as server:
+            storer = Storer(self.graph_set, repok=Reporter(print_sentences=False),
+                            reperr=Reporter(print_sentences=False))
+            self.assertTrue(storer.upload_all(server.url, base_dir, batch_size=2,
+                                              graph_store_url=server.graph_store_url))
+            self.assertListEqual(["/data?graph=http%3A%2F%2Ftest%2Fbr%2F"] * 2,
+                                 [path for _, path, _, _ in server.requests])
+            self.assertSetEqual(get_expected_quads(), set(server.dataset.quads()))
+
+            self.graph_set.commit_changes()
+            server.requests.clear()
+            titles[0].remove_title()
+            titles[0].has_title("New title")
+            titles[1].has_subtitle("Subtitle")
+            self.assertTrue(storer.upload_all(server.url, base_dir, graph_store_url=server.graph_store_url))
+            self.assertListEqual(["application/n-triples", "application/x-www-form-urlencoded"],
+                                 sorted(content_type for _, _, content_type, _ in server.requests))
+            self.assertSetEqual(get_expected_quads(), set(server.dataset.quads()))
+
+        with self.subTest("Graph store failures"), SparqlServer() as server:
+            self.graph_set.commit_changes()
+            titles[2].has_subtitle("Subtitle")
+            server.failures = [400]
+            storer = Storer(self.graph_set, repok=Reporter(print_sentences=False),
+                            reperr=Reporter(print_sentences=False))
+            self.assertFalse(storer.upload_all(server.url, base_dir, graph_store_url=server.graph_store_url))
+            # Without a graph store, pending statements are uploaded through update queries:
+            self.assertTrue(storer.resume_upload(server.url, base_dir))
+            self.assertEqual("application/x-www-form-urlencoded", server.requests[-1][2])
+            self.assertIn((titles[2].res, GraphEntity.iri_has_subtitle, Literal("Subtitle")), server.dataset)
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
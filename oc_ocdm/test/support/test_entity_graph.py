@@ -0,0 +1,75 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2016, Silvio Peroni <essepuntato@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+import pickle
+import unittest
+
+from rdflib import ConjunctiveGraph, Literal, URIRef
+from rdflib.namespace import NamespaceManager
+
+from oc_ocdm.support.entity_graph import EntityGraph, SubjectGraph
+
+added_triples = []
+
+
+def on_add(triple):
+    added_triples.append(triple)
+
+
+class TestEntityGraph(unittest.TestCase):
+    subject = URIRef("http://test/br/1")
+    title = URIRef("http://purl.org/dc/terms/title")
+
+    def test_pickle(self):
+        namespace_manager = NamespaceManager(ConjunctiveGraph())
+        namespace_manager.bind("test", "http://test/")
+        graphs = {
+            "EntityGraph": EntityGraph(URIRef("http://test/br/"), on_add=on_add,
+                                       namespace_manager=namespace_manager),
+            "SubjectGraph": SubjectGraph(ConjunctiveGraph().store, URIRef("http://test/br/"), self.subject,
+                                         on_add=on_add, namespace_manager=namespace_manager)
+        }
+        other_subject = URIRef("http://test/br/2")
+        for name, graph in graphs.items():
+            with self.subTest(name):
+                if name == "SubjectGraph":
+                    # Triples of other subjects sharing the same store are not pickled
+                    graph.store.add((other_subject, self.title, Literal("Other title")), graph)
+                graph.add((self.subject, self.title, Literal("Old title")))
+                graph.reset_changes()
+                graph.remove((self.subject, self.title, None))
+                graph.add((self.subject, self.title, Literal("New title")))
+
+                data = pickle.dumps(graph)
+                self.assertNotIn(b"Other title", data)
+                copy = pickle.loads(data)
+                self.assertIs(type(graph), type(copy))
+                self.assertEqual(graph.identifier, copy.identifier)
+                self.assertSetEqual(set(graph), set(copy))
+                self.assertTrue(copy.is_dirty)
+                self.assertTupleEqual(graph.get_changes(), copy.get_changes())
+                self.assertEqual(graph.version, copy.version)
+                self.assertEqual(URIRef("http://test/"), dict(copy.namespace_manager.namespaces())["test"])
+
+                # The callback is not pickled (entity sets attach their own callback again):
+                self.assertIsNone(copy.on_add)
+                added_triples.clear()
+                copy.add((self.subject, self.title, Literal("Another title")))
+                self.assertListEqual([], added_triples)
+                self.assertTrue(copy.is_dirty)
+
+
+if __name__ == '__main__':
+    unittest.main()
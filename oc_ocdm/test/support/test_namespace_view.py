@@ -0,0 +1,75 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2016, Silvio Peroni <essepuntato@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+import pickle
+import unittest
+
+from rdflib import Graph, Literal, URIRef
+
+from oc_ocdm.support.namespace_view import NamespaceManagerView
+
+
+class TestNamespaceManagerView(unittest.TestCase):
+    subject = URIRef("http://test/br/1")
+
+    def setUp(self):
+        holder = Graph()
+        holder.bind("test", "http://test/")
+        self.shared = holder.namespace_manager
+        self.first = Graph(namespace_manager=NamespaceManagerView(self.shared))
+        self.second = Graph(namespace_manager=NamespaceManagerView(self.shared))
+
+    def test_shared_prefixes(self):
+        self.first.add((self.subject, URIRef("http://purl.org/dc/terms/title"), Literal("Title")))
+        self.assertIn("dcterms:title", self.first.serialize(format="turtle"))
+        self.assertEqual("dcterms:title", self.first.namespace_manager.qname(URIRef("http://purl.org/dc/terms/title")))
+        self.assertFalse(self.first.namespace_manager.is_private)
+
+        with self.subTest("Prefixes bound on the shared namespace manager"):
+            self.shared.bind("ex", "http://example.org/")
+            self.assertEqual(URIRef("http://example.org/"), dict(self.first.namespaces())["ex"])
+
+    def test_copy_on_write(self):
+        with self.subTest("Explicit binding"):
+            self.first.bind("ex", "http://example.org/")
+            self.assertTrue(self.first.namespace_manager.is_private)
+            self.assertEqual(URIRef("http://example.org/"), dict(self.first.namespaces())["ex"])
+            self.assertEqual(URIRef("http://test/"), dict(self.first.namespaces())["test"])
+            self.assertNotIn("ex", dict(self.second.namespaces()))
+            self.assertNotIn("ex", dict(self.shared.namespaces()))
+
+        with self.subTest("Prefix generated by a serializer"):
+            self.second.add((self.subject, URIRef("http://other.example.org/p"), Literal("A")))
+            self.assertIn("ns1:p", self.second.serialize(format="turtle"))
+            self.assertTrue(self.second.namespace_manager.is_private)
+            self.assertNotIn("ns1", dict(self.first.namespaces()))
+            self.assertNotIn("ns1", dict(self.shared.namespaces()))
+
+        with self.subTest("Missing prefix"):
+            view = NamespaceManagerView(self.shared)
+            self.assertRaises(KeyError, view.compute_qname, "http://other.example.org/p", False)
+            self.assertFalse(view.is_private)
+
+    def test_pickle(self):
+        self.first.bind("ex", "http://example.org/")
+        for graph in (self.first, self.second):
+            with self.subTest(is_private=graph.namespace_manager.is_private):
+                copy = pickle.loads(pickle.dumps(graph.namespace_manager))
+                self.assertEqual(graph.namespace_manager.is_private, copy.is_private)
+                self.assertDictEqual(dict(graph.namespaces()), dict(copy.namespaces()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2016, Silvio Peroni <essepuntato@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+import io
+import unittest
+
+from rdflib import ConjunctiveGraph, Graph, Literal, URIRef, XSD
+
+from oc_ocdm.support.nt_writer import write_nt, write_nq, iter_quads
+
+
+class TestNtWriter(unittest.TestCase):
+    def setUp(self):
+        self.cg = ConjunctiveGraph()
+        self.graph_iri = URIRef("http://test/br/")
+        self.triples = [
+            (URIRef("http://test/br/1"), URIRef("http://test/p"), URIRef("http://test/o")),
+            (URIRef("http://test/br/1"), URIRef("http://test/p"), Literal('A "quoted"\ntitle \\ with àccents')),
+            (URIRef("http://test/br/1"), URIRef("http://test/p"), Literal("Title", lang="en")),
+            (URIRef("http://test/br/1"), URIRef("http://test/p"), Literal("2020", datatype=XSD.gYear))
+        ]
+        self.cg.addN((*triple, self.graph_iri) for triple in self.triples)
+
+    def test_write_nt(self):
+        stream = io.BytesIO()
+        result = write_nt(self.cg.triples((None, None, None)), stream, chunk_size=10)
+        self.assertEqual(len(self.triples), result)
+        expected = self.cg.serialize(format="nt11", encoding="utf-8")
+        self.assertListEqual(sorted(expected.splitlines()), sorted(stream.getvalue().splitlines()))
+
+        g = Graph()
+        g.parse(data=stream.getvalue().decode("utf-8"), format="nt11")
+        self.assertSetEqual(set(self.triples), set(g))
+
+    def test_write_nq(self):
+        stream = io.BytesIO()
+        result = write_nq(iter_quads(self.cg), stream)
+        self.assertEqual(len(self.triples), result)
+        expected = self.cg.serialize(format="nquads", encoding="utf-8")
+        self.assertListEqual(sorted(expected.strip().splitlines()), sorted(stream.getvalue().splitlines()))
+
+        cg = ConjunctiveGraph()
+        cg.parse(data=stream.getvalue().decode("utf-8"), format="nquads")
+        self.assertSetEqual({(*triple, self.graph_iri) for triple in self.triples},
+                            {(s, p, o, c.identifier) for s, p, o, c in cg.quads()})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2016, Silvio Peroni <essepuntato@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+import unittest
+
+from rdflib import BNode, Graph, Literal, URIRef
+
+from oc_ocdm.graph.graph_entity import GraphEntity
+from oc_ocdm.graph.graph_set import GraphSet
+from oc_ocdm.support.query_utils import get_delete_query, get_graph_diff, get_insert_data, get_insert_query, \
+    get_update_query, get_update_queries
+
+
+class TestQueryUtils(unittest.TestCase):
+    resp_agent = 'http://resp_agent.test/'
+
+    def setUp(self):
+        self.graph_set = GraphSet("http://test/", "", "", False)
+
+    def test_get_graph_diff(self):
+        s = URIRef("http://test/br/1")
+        first = Graph()
+        first.add((s, GraphEntity.iri_title, Literal("A")))
+        first.add((s, GraphEntity.iri_has_subtitle, Literal("B")))
+        second = Graph()
+        second.add((s, GraphEntity.iri_title, Literal("A")))
+        second.add((s, GraphEntity.iri_has_edition, Literal("C")))
+
+        with self.subTest("Without blank nodes"):
+            in_first, in_second = get_graph_diff(first, second)
+            self.assertSetEqual({(s, GraphEntity.iri_has_subtitle, Literal("B"))}, set(in_first))
+            self.assertSetEqual({(s, GraphEntity.iri_has_edition, Literal("C"))}, set(in_second))
+
+        with self.subTest("With blank nodes"):
+            first.add((s, GraphEntity.iri_relation, BNode()))
+            second.add((s, GraphEntity.iri_relation, BNode()))
+            in_first, in_second = get_graph_diff(first, second)
+            self.assertEqual(1, len(in_first))
+            self.assertEqual(1, len(in_second))
+
+        with self.subTest("Same content"):
+            in_first, in_second = get_graph_diff(first, first)
+            self.assertEqual(0, len(in_first))
+            self.assertEqual(0, len(in_second))
+
+    def test_get_update_query(self):
+        br = self.graph_set.add_br(self.resp_agent)
+        self.graph_set.commit_changes()
+
+        with self.subTest("Unmodified entity"):
+            self.assertTupleEqual(("", 0, 0), get_update_query(br, entity_type="graph"))
+
+        with self.subTest("Modified entity"):
+            br.has_title("Title")
+            update_query, added, removed = get_update_query(br, entity_type="graph")
+            self.assertTrue(update_query.startswith("INSERT DATA"))
+            self.assertEqual(1, added)
+            self.assertEqual(0, removed)
+            # The result is cached until the entity changes again:
+            self.assertIs(br._update_query_cache[3], get_update_query(br, entity_type="graph"))
+
+        with self.subTest("Modified entity after caching"):
+            br.remove_title()
+            self.assertTupleEqual(("", 0, 0), get_update_query(br, entity_type="graph"))
+
+        with self.subTest("Deleted entity"):
+            br.mark_as_to_be_deleted()
+            update_query, added, removed = get_update_query(br, entity_type="graph")
+            self.assertTrue(update_query.startswith("DELETE DATA"))
+            self.assertEqual(0, added)
+            self.assertEqual(1, removed)
+
+    def test_get_update_queries(self):
+        brs = [self.graph_set.add_br(self.resp_agent) for _ in range(6)]
+        for br in brs:
+            br.has_title("Old title")
+        self.graph_set.commit_changes()
+        brs[0].has_title("New title")
+        brs[1].has_subtitle("Subtitle")
+        brs[2].mark_as_to_be_deleted()
+        brs[3].remove_title()
+        # brs[4] is left untouched, while the update query of brs[5] is already cached:
+        brs[5].has_edition("2nd")
+        cached_result = get_update_query(brs[5])
+
+        results = get_update_queries(brs, entity_type="graph")
+        self.assertIs(cached_result, results[5])
+        self.assertTupleEqual(("", 0, 0), results[4])
+        for br, result in zip(brs, results):
+            with self.subTest(br=str(br.res)):
+                # Computed results get cached as well:
+                self.assertIs(result, get_update_query(br))
+                br._update_query_cache = None
+                self.assertTupleEqual(get_update_query(br), result)
+
+    def test_statements_order(self):
+        graph_iri = URIRef("http://test/br/")
+        triples = [(URIRef(f"http://test/br/{i}"), GraphEntity.iri_title, Literal(f"Title {i}")) for i in range(10)]
+        graphs = [Graph(), Graph()]
+        for triple in triples:
+            graphs[0].add(triple)
+        for triple in reversed(triples):
+            graphs[1].add(triple)
+        # Queries don't depend on the order in which the triples were added:
+        for get_query in (get_insert_query, get_delete_query):
+            with self.subTest(query=get_query.__name__):
+                query, num_of_statements = get_query(graph_iri, graphs[0])
+                self.assertTupleEqual((query, num_of_statements), get_query(graph_iri, graphs[1]))
+                statements = query.split("{ ", 2)[2].rsplit(" }", 2)[0].splitlines()
+                self.assertEqual(num_of_statements, len(statements))
+                self.assertListEqual(sorted(statements), statements)
+
+    def test_get_insert_data(self):
+        br = self.graph_set.add_br(self.resp_agent)
+        graph_iri = URIRef("http://test/br/")
+
+        with self.subTest("New entity"):
+            self.assertTupleEqual((graph_iri, list(br.g)), get_insert_data(br))
+
+        self.graph_set.commit_changes()
+        with self.subTest("Unmodified entity"):
+            self.assertTupleEqual((graph_iri, []), get_insert_data(br))
+
+        with self.subTest("Entity with added triples"):
+            br.has_title("Title")
+            self.assertTupleEqual((graph_iri, [(br.res, GraphEntity.iri_title, Literal("Title"))]),
+                                  get_insert_data(br))
+
+        self.graph_set.commit_changes()
+        with self.subTest("Entity with removed triples"):
+            br.has_title("New title")
+            self.assertIsNone(get_insert_data(br))
+
+        with self.subTest("Deleted entity"):
+            br.mark_as_to_be_deleted()
+            self.assertIsNone(get_insert_data(br))
+
+
+if __name__ == '__main__':
+    unittest.main()
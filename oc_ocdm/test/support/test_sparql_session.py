@@ -0,0 +1,55 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2016, Silvio Peroni <essepuntato@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+import unittest
+
+from rdflib import Literal, URIRef
+
+from oc_ocdm.support.sparql_session import SparqlHTTPError, SparqlSession
+from oc_ocdm.test.sparql_server import SparqlServer
+
+
+class TestSparqlSession(unittest.TestCase):
+    def test_construct_and_update(self):
+        with SparqlServer() as server, SparqlSession(server.url) as session:
+            session.update('INSERT DATA { GRAPH <http://test/br/> { <http://test/br/1> <http://test/p> "A" . '
+                           '<http://test/br/2> <http://test/p> "B" } }')
+            graph = session.construct('CONSTRUCT { ?s ?p ?o } WHERE { VALUES ?s { <http://test/br/2> } ?s ?p ?o }')
+            self.assertSetEqual({(URIRef("http://test/br/2"), URIRef("http://test/p"), Literal("B"))}, set(graph))
+            self.assertEqual(2, len(server.requests))
+
+    def test_post_graph(self):
+        with SparqlServer() as server, SparqlSession(server.graph_store_url) as session:
+            session.post_graph("http://test/br/", b'<http://test/br/1> <http://test/p> "A" .\n')
+            self.assertSetEqual({(URIRef("http://test/br/1"), URIRef("http://test/p"), Literal("A"),
+                                  URIRef("http://test/br/"))}, set(server.dataset.quads()))
+            self.assertEqual("/data?graph=http%3A%2F%2Ftest%2Fbr%2F", server.requests[0][1])
+
+    def test_http_error(self):
+        with SparqlServer() as server, SparqlSession(server.url) as session:
+            server.failures.append(503)
+            with self.assertRaises(SparqlHTTPError) as context:
+                session.update('INSERT DATA { <http://test/br/1> <http://test/p> "A" }')
+            self.assertEqual(503, context.exception.status)
+            # The connection is still usable:
+            session.update('INSERT DATA { <http://test/br/1> <http://test/p> "A" }')
+            self.assertEqual(1, len(server.dataset))
+
+    def test_invalid_endpoint(self):
+        self.assertRaises(ValueError, SparqlSession, "ftp://test/sparql")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -20,7 +20,9 @@ from rdflib import Namespace, URIRef
 
 from oc_ocdm.graph.graph_set import GraphSet
 from oc_ocdm.prov.prov_set import ProvSet
-from oc_ocdm.support.support import get_ordered_contributors_from_br, find_paths
+from oc_ocdm.support.support import get_ordered_contributors_from_br, find_paths, find_local_line_id, get_base_iri,\
+    get_short_name, get_prefix, get_count, get_resource_number, get_prov_subject_short_name, get_prov_subject_prefix,\
+    get_prov_subject_count
 
 
 class TestSupport(unittest.TestCase):
@@ -124,6 +126,47 @@ class TestSupport(unittest.TestCase):
             is_json = True)
         self.assertEqual((cur_dir_path, cur_file_path), ('support/test/data/rdfbr/060/10000/1000/prov', 'support/test/data/rdfbr/060/10000/1000/prov/se.json'))
 
+    def test_find_paths_large_number(self):
+        cur_dir_path, cur_file_path = find_paths(
+            res = URIRef('https://w3id.org/oc/meta/br/0601234567891'),
+            base_dir = os.path.join('support', 'test', 'data', 'rdf') + os.sep,
+            base_iri = 'https://w3id.org/oc/meta/',
+            default_dir = '_',
+            dir_split = 10000,
+            n_file_item = 1,
+            is_json = False)
+        self.assertEqual((cur_dir_path, cur_file_path), ('support/test/data/rdf/br/060/1234570000', 'support/test/data/rdf/br/060/1234570000/1234567891.nt'))
+
+    def test_iri_helpers(self):
+        with self.subTest("Graph entity"):
+            res = URIRef('https://w3id.org/oc/meta/br/0601234')
+            self.assertEqual('https://w3id.org/oc/meta', get_base_iri(res))
+            self.assertEqual('br', get_short_name(res))
+            self.assertEqual('060', get_prefix(res))
+            self.assertEqual('1234', get_count(res))
+            self.assertEqual(1234, get_resource_number(res))
+            self.assertEqual('', get_prov_subject_short_name(res))
+        with self.subTest("Provenance entity"):
+            res = URIRef('https://w3id.org/oc/meta/ra/0605/prov/se/2')
+            self.assertEqual('https://w3id.org/oc/meta', get_base_iri(res))
+            self.assertEqual('se', get_short_name(res))
+            self.assertEqual('', get_prefix(res))
+            self.assertEqual('2', get_count(res))
+            self.assertEqual(5, get_resource_number(res))
+            self.assertEqual('ra', get_prov_subject_short_name(res))
+            self.assertEqual('060', get_prov_subject_prefix(res))
+            self.assertEqual('5', get_prov_subject_count(res))
+        with self.subTest("Unknown IRI"):
+            res = URIRef('https://w3id.org/oc/meta/')
+            self.assertEqual('', get_short_name(res))
+            self.assertRaises(ValueError, get_resource_number, res)
+
+    def test_find_local_line_id(self):
+        self.assertEqual(1, find_local_line_id(URIRef('https://w3id.org/oc/meta/br/0601234567891'), 1))
+        self.assertEqual(891, find_local_line_id(URIRef('https://w3id.org/oc/meta/br/0601234567891'), 1000))
+        self.assertEqual(1000, find_local_line_id(URIRef('https://w3id.org/oc/meta/br/0602000'), 1000))
+        self.assertEqual(5, find_local_line_id(URIRef('https://w3id.org/oc/meta/br/0601005/prov/se/1'), 1000))
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
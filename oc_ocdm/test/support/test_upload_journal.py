@@ -0,0 +1,78 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2016, Silvio Peroni <essepuntato@gmail.com>
+#
+# Permission to use, copy, modify, and/or distribute this software for any purpose
+# with or without fee is hereby granted, provided that the above copyright notice
+# and this permission notice appear in all copies.
+#
+# THE SOFTWARE IS PROVIDED "AS IS" AND THE AUTHOR DISCLAIMS ALL WARRANTIES WITH
+# REGARD TO THIS SOFTWARE INCLUDING ALL IMPLIED WARRANTIES OF MERCHANTABILITY AND
+# FITNESS. IN NO EVENT SHALL THE AUTHOR BE LIABLE FOR ANY SPECIAL, DIRECT, INDIRECT,
+# OR CONSEQUENTIAL DAMAGES OR ANY DAMAGES WHATSOEVER RESULTING FROM LOSS OF USE,
+# DATA OR PROFITS, WHETHER IN AN ACTION OF CONTRACT, NEGLIGENCE OR OTHER TORTIOUS
+# ACTION, ARISING OUT OF OR IN CONNECTION WITH THE USE OR PERFORMANCE OF THIS
+# SOFTWARE.
+import os
+import unittest
+from shutil import rmtree
+
+from oc_ocdm.support.upload_journal import UploadJournal
+
+
+class TestUploadJournal(unittest.TestCase):
+    base_dir = os.path.join("oc_ocdm", "test", "support", "upload_journal")
+
+    def setUp(self):
+        self.journal_path = os.path.join(self.base_dir, "upload.journal")
+
+    def tearDown(self):
+        if os.path.exists(self.base_dir):
+            rmtree(self.base_dir)
+
+    def test_pending_changes(self):
+        with UploadJournal(self.journal_path) as journal:
+            first = journal.append(None, 'INSERT DATA { <http://test/br/1> <http://test/p> "Ä\\n" }', 1, 0)
+            second = journal.append("http://test/br/", '<http://test/br/2> <http://test/p> "B" .\n', 1, 0)
+            third = journal.append(None, 'DELETE DATA { <http://test/br/3> <http://test/p> "C" }', 0, 1)
+            journal.acknowledge([first, third])
+
+        journal = UploadJournal(self.journal_path)
+        with self.subTest("Reopened journal"):
+            self.assertListEqual([(second, "http://test/br/", '<http://test/br/2> <http://test/p> "B" .\n', 1, 0)],
+                                 list(journal.iter_pending()))
+            self.assertEqual(3, journal.append(None, "", 0, 0))
+
+        with self.subTest("Compaction"):
+            self.assertEqual(2, journal.compact())
+            with open(self.journal_path, 'rt', encoding='utf-8') as f:
+                self.assertEqual(2, len(f.readlines()))
+            journal.acknowledge([second, 3])
+            self.assertEqual(0, journal.compact())
+            self.assertFalse(os.path.exists(self.journal_path))
+
+    def test_damaged_records(self):
+        with UploadJournal(self.journal_path) as journal:
+            journal.append(None, "INSERT DATA { <http://test/br/1> <http://test/p> 'A' }", 1, 0)
+            journal.append(None, "INSERT DATA { <http://test/br/2> <http://test/p> 'B' }", 1, 0)
+        with open(self.journal_path, 'rt', encoding='utf-8') as f:
+            records = f.readlines()
+
+        with self.subTest("Corrupted record"):
+            with open(self.journal_path, 'wt', encoding='utf-8') as f:
+                f.write(records[0].replace("'A'", "'X'") + records[1])
+            self.assertListEqual([1], [item_id for item_id, *_ in UploadJournal(self.journal_path).iter_pending()])
+
+        with self.subTest("Partially written record"):
+            with open(self.journal_path, 'wt', encoding='utf-8') as f:
+                f.write(records[0] + records[1][:20])
+            journal = UploadJournal(self.journal_path)
+            self.assertListEqual([0], [item_id for item_id, *_ in journal.iter_pending()])
+            # New records are not affected by the partially written one:
+            journal.acknowledge([0])
+            self.assertListEqual([], list(journal.iter_pending()))
+            journal.close()
+
+
+if __name__ == '__main__':
+    unittest.main()